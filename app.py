@@ -1,8 +1,13 @@
 import os
+import base64
+import tempfile
 import pandas as pd
 import dash
-from dash import html, dcc, Input, Output, State
+from dash import html, dcc, dash_table, ctx, Input, Output, State
+from flask import request, jsonify, abort, Response, stream_with_context, send_from_directory, send_file
+from werkzeug.utils import secure_filename
 import dash_bootstrap_components as dbc
+import plotly.graph_objects as go
 
 from email_service import (
     _send_email,
@@ -11,7 +16,34 @@ from email_service import (
     get_employee_email
 )
 from jd_generator import generate_jd_pdf
-from salary_slip_engine import generate_salary_slip
+from salary_slip_engine import (
+    generate_salary_slip,
+    calculate_salary_components,
+    salary_slip_sections,
+    DEDUCTION_MODE
+)
+from company import COMPANY_NAME
+from employee_store import (
+    load_employee_master,
+    get_employee_details,
+    get_employee_index,
+    query_employees,
+    search_employees,
+    get_search_index,
+    master_signature,
+    employee_added,
+    DOJ_COLUMN,
+    MASTER_COLUMNS
+)
+from storage import file_lock, atomic_path, parse_document_name
+import metrics
+import payroll_ledger
+import payroll_rollups
+import payroll_register
+import employee_import
+import jd_index
+import document_store
+import llm_usage
 
 # ==========================================
 # CONFIGURATION
@@ -24,79 +56,61 @@ LOGO_PATH = "static/logo.png"
 # ==========================================
 # DATA FUNCTIONS
 # ==========================================
-def get_employee_details(employee_id):
-    if not os.path.exists(EMPLOYEE_FILE):
-        return {}
-
-    df = pd.read_excel(EMPLOYEE_FILE)
-
-    row = df[df["Employee ID"] == employee_id]
-
-    if row.empty:
-        return {}
-
-    row = row.iloc[0]
-
-    return {
-        "designation": row.get("Designation", ""),
-        "department": row.get("Department", ""),
-        "doj": row.get("Date of Joining (DD-MM-YYYY)", ""),
-        "uan": row.get("UAN", ""),
-        "pf_number": row.get("PF Number", ""),
-        "employee_pan": row.get("PAN", ""),
-        "bank_account": row.get("Bank Account Number", "")
-    }
-
 def get_jd_dropdown_options():
     if not os.path.exists(PDF_FOLDER):
         return []
 
-    files = [f for f in os.listdir(PDF_FOLDER) if f.startswith("JD_")]
-
     roles = set()
-    for f in files:
-        role = f.replace("JD_", "").rsplit("_", 1)[0]
-        role = role.replace("_", " ")
-        roles.add(role)
+    for f in os.listdir(PDF_FOLDER):
+        parsed = parse_document_name(f)
+        if parsed and parsed[0] == "JD":
+            roles.add(parsed[1].replace("_", " "))
 
     return [{"label": role, "value": role} for role in roles]
 
+def _document_url(path):
+    return f"/documents/{parse_document_name(path)[2]}"
+
 def append_employee_to_excel(data):
-    if os.path.exists(EMPLOYEE_FILE):
-        df = pd.read_excel(EMPLOYEE_FILE)
-    else:
-        df = pd.DataFrame(columns=[
-            "Employee ID", "Name", "Email", "Designation",
-            "Department", "Date of Joining (DD-MM-YYYY)",
-            "UAN", "PF Number", "PAN", "Bank Account Number"
-        ])
+    # Read-modify-write under a cross-process lock; the workbook is
+    # replaced atomically so concurrent readers never see a partial file.
+    with file_lock(EMPLOYEE_FILE):
+        before = master_signature(EMPLOYEE_FILE)
+        if os.path.exists(EMPLOYEE_FILE):
+            df = load_employee_master(EMPLOYEE_FILE)
+        else:
+            df = pd.DataFrame(columns=MASTER_COLUMNS)
 
-    # Prevent duplicate ID
-    if data["Employee ID"] in df["Employee ID"].values:
-        return False, "Employee ID already exists."
+        # Prevent duplicate ID
+        if data["Employee ID"] in df["Employee ID"].values:
+            return False, "Employee ID already exists."
 
-    df = pd.concat([df, pd.DataFrame([data])], ignore_index=True)
-    df.to_excel(EMPLOYEE_FILE, index=False)
+        df = pd.concat([df, pd.DataFrame([data])], ignore_index=True)
+        with metrics.stage("excel_write"), atomic_path(EMPLOYEE_FILE) as tmp_path:
+            df.to_excel(tmp_path, index=False, engine="openpyxl")
 
-    return True, "Employee Created Successfully!"
+        employee_added(data, before, EMPLOYEE_FILE)
 
-def get_employee_dropdown_options():
-    if not os.path.exists(EMPLOYEE_FILE):
-        return []
+    return True, "Employee Created Successfully!"
 
-    df = pd.read_excel(EMPLOYEE_FILE)
+def employee_search_options(search_value, selected=None):
+    # Only matches go to the browser; the selected employee stays in the
+    # list so the dropdown keeps showing its label.
+    results = search_employees(search_value, path=EMPLOYEE_FILE) if search_value else []
 
-    options = []
-    for _, row in df.iterrows():
-        label = f"{row['Employee ID']} - {row['Name']}"
-        value = row["Employee ID"]
-        options.append({"label": label, "value": value})
+    if selected and selected not in {r["employee_id"] for r in results}:
+        index = get_search_index(EMPLOYEE_FILE)
+        match = index.get(selected) if index else None
+        results.insert(0, match or {"employee_id": selected, "name": ""})
 
-    return options
+    return [
+        {"label": f"{r['employee_id']} - {r['name']}", "value": r["employee_id"]}
+        for r in results
+    ]
 
 def get_total_employees():
-    if os.path.exists(EMPLOYEE_FILE):
-        df = pd.read_excel(EMPLOYEE_FILE)
+    df = load_employee_master(EMPLOYEE_FILE)
+    if df is not None:
         return len(df)
     return 0
 
@@ -124,6 +138,87 @@ app = dash.Dash(
 )
 
 server = app.server
+metrics.init_app(server)
+
+
+@server.route("/api/employees/search")
+def employee_search_api():
+    query = request.args.get("q", "")
+    limit = min(request.args.get("limit", 20, type=int), 100)
+    return jsonify(search_employees(query, limit, path=EMPLOYEE_FILE))
+
+
+@server.route("/api/jds/search")
+def jd_search_api():
+    query = request.args.get("q", "")
+    limit = min(request.args.get("limit", jd_index.SEARCH_LIMIT, type=int), 100)
+    results = jd_index.search_jds(query, limit)
+    for result in results:
+        result["snippet"] = result["snippet"].replace(jd_index.MARK_START, "").replace(jd_index.MARK_END, "")
+    return jsonify(results)
+
+
+@server.route("/exports/register/<month>.<fmt>")
+def export_register(month, fmt):
+    if fmt not in payroll_register.EXPORTS:
+        abort(404)
+    try:
+        month = payroll_ledger.normalize_month(month)
+    except ValueError:
+        abort(404)
+
+    generate, mimetype = payroll_register.EXPORTS[fmt]
+    # No Content-Length, so the body goes out chunked as it is produced.
+    return Response(
+        stream_with_context(generate(month)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=Payroll_Register_{month}.{fmt}"},
+    )
+
+
+@server.route("/documents/<document_id>")
+def download_document(document_id):
+    path = document_store.document_path(document_id)
+    if path is None:
+        abort(404)
+
+    # send_file hands the open file to the server (sendfile where it can)
+    # and answers If-None-Match / If-Modified-Since and Range requests.
+    # Re-rendering replaces the file, which changes its ETag.
+    response = send_file(
+        path,
+        mimetype="application/pdf",
+        as_attachment=request.args.get("download") == "1",
+        download_name=os.path.basename(path),
+        conditional=True,
+        etag=True,
+        max_age=0,
+    )
+    response.cache_control.private = True
+    return response
+
+
+@server.route("/documents/slips/<month>.zip")
+def download_month_slips(month):
+    try:
+        month = payroll_ledger.normalize_month(month)
+    except ValueError:
+        abort(404)
+
+    return Response(
+        stream_with_context(document_store.iter_month_slips_zip(month)),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=Salary_Slips_{month}.zip"},
+    )
+
+
+@server.route("/exports/import-errors/<name>")
+def import_error_report(name):
+    if os.path.basename(name) != name or not name.endswith("_errors.csv"):
+        abort(404)
+    return send_from_directory(
+        os.path.abspath(employee_import.IMPORT_ERRORS_DIR), name, as_attachment=True
+    )
 
 # ==========================================
 # SIDEBAR WITH LOGO
@@ -142,9 +237,13 @@ sidebar = html.Div(
             [
                 dbc.NavLink("Dashboard", href="/", active="exact"),
                 dbc.NavLink("Job Description", href="/jd"),
+                dbc.NavLink("JD Search", href="/jd-search"),
                 dbc.NavLink("Salary Slip", href="/salary"),
                 dbc.NavLink("Email Service", href="/email"),
                 dbc.NavLink("Create Employee", href="/create-employee"),  # NEW
+                dbc.NavLink("Bulk Import", href="/import-employees"),
+                dbc.NavLink("Employee Directory", href="/employees"),
+                dbc.NavLink("Payroll Analytics", href="/analytics"),
             ],
             vertical=True,
             pills=True,
@@ -243,94 +342,170 @@ jd_layout = dbc.Container([
 
 ], fluid=True)
 
+# ==========================================
+# JD SEARCH PAGE
+# ==========================================
+
+jd_search_layout = dbc.Container([
+
+    html.H2("Search Job Descriptions", className="mb-4"),
+
+    dcc.Input(
+        id="jd-search-query",
+        type="search",
+        placeholder="Skill or keyword, e.g. Spark",
+        debounce=True,
+        className="form-control mb-3",
+    ),
+
+    html.Div(id="jd-search-results")
+
+], fluid=True)
+
+
+def _highlighted(snippet):
+    # Split the index's highlight markers into <mark> elements.
+    children = []
+    for i, part in enumerate(snippet.split(jd_index.MARK_START)):
+        if i == 0:
+            children.append(part)
+            continue
+        marked, _, rest = part.partition(jd_index.MARK_END)
+        children += [html.Mark(marked), rest]
+    return children
+
 # ==========================================
 # SALARY PAGE
 # ==========================================
 
-salary_layout = dbc.Container([
+def salary_layout():
 
-    html.H2("Generate Salary Slip", className="mb-4"),
+    optional = "(blank = statutory)" if DEDUCTION_MODE == "statutory" else "(Optional)"
 
-    dbc.Row([
-        dbc.Col(dcc.Input(id="emp-name", placeholder="Employee Name", className="form-control")),
-        dbc.Col(dcc.Dropdown(
-            id="emp-id",
-            options=get_employee_dropdown_options(),
-            placeholder="Select Employee",
-        )),
-    ], className="mb-3"),
+    return dbc.Container([
 
-    dbc.Row([
-        dbc.Col(dcc.Input(id="basic", type="number", placeholder="Basic", className="form-control")),
-        dbc.Col(dcc.Input(id="hra", type="number", placeholder="HRA", className="form-control")),
-        dbc.Col(dcc.Input(id="allowance", type="number", placeholder="Allowance", className="form-control")),
-        dbc.Col(dcc.Input(id="bonus", type="number", placeholder="Bonus", className="form-control")),
-    ], className="mb-3"),
+        html.H2("Generate Salary Slip", className="mb-4"),
 
-    dbc.Row([
-        dbc.Col(dcc.Input(id="pf", type="number", placeholder="Provident Fund (Optional)", className="form-control")),
-        dbc.Col(dcc.Input(id="tds", type="number", placeholder="TDS (Optional)", className="form-control")),
-        dbc.Col(dcc.Input(id="pt", type="number", placeholder="Professional Tax (Optional)", className="form-control")),
-    ], className="mb-3"),
+        dbc.Row([
+            dbc.Col(dcc.Input(id="emp-name", placeholder="Employee Name", className="form-control")),
+            dbc.Col(dcc.Dropdown(
+                id="emp-id",
+                options=[],
+                placeholder="Search Employee by ID, Name or Email",
+            )),
+        ], className="mb-3"),
 
-    dbc.Button("Generate Salary Slip", id="generate-salary", color="success", size="lg"),
-    html.Br(),
-    html.Br(),
-    html.Div(id="salary-output")
+        dbc.Row([
+            dbc.Col(dcc.Input(id="basic", type="number", placeholder="Basic", className="form-control")),
+            dbc.Col(dcc.Input(id="hra", type="number", placeholder="HRA", className="form-control")),
+            dbc.Col(dcc.Input(id="allowance", type="number", placeholder="Allowance", className="form-control")),
+            dbc.Col(dcc.Input(id="bonus", type="number", placeholder="Bonus", className="form-control")),
+        ], className="mb-3"),
 
-], fluid=True)
+        dbc.Row([
+            dbc.Col(dcc.Input(id="pf", type="number", placeholder=f"Provident Fund {optional}", className="form-control")),
+            dbc.Col(dcc.Input(id="tds", type="number", placeholder=f"TDS {optional}", className="form-control")),
+            dbc.Col(dcc.Input(id="pt", type="number", placeholder=f"Professional Tax {optional}", className="form-control")),
+        ], className="mb-3"),
 
+        html.Div(id="salary-preview", className="mb-3"),
 
-email_layout = dbc.Container([
+        dbc.Button("Confirm & Generate PDF", id="generate-salary", color="success", size="lg"),
+        html.Br(),
+        html.Br(),
+        html.Div(id="salary-output")
 
-    html.H2("Email Service", className="mb-4"),
+    ], fluid=True)
 
-    dcc.Dropdown(
-        id="email-type",
-        options=[
-            {"label": "Send Salary Slip", "value": "salary"},
-            {"label": "Send Job Description", "value": "jd"},
-        ],
-        placeholder="Select Email Type"
-    ),
 
-    html.Br(),
+def _preview_cell(value):
+    # As the PDF prints it, but blank instead of "nan".
+    return "" if pd.isna(value) else str(value)
 
-    html.Div(
-        id="salary-fields",
-        children=[
-            dcc.Dropdown(
-                id="email-employee-id",
-                options=get_employee_dropdown_options(),
-                placeholder="Select Employee"
-            )
-        ]
-    ),
 
-    html.Div(
-        id="jd-fields",
-        children=[
-            dcc.Dropdown(
-                id="email-role",
-                options=get_jd_dropdown_options(),
-                placeholder="Select JD Role"
-            ),
+def _preview_table(rows, header=True):
+    head = [html.Thead(html.Tr([html.Th(c) for c in rows[0]]))] if header else []
+    body = rows[1:] if header else rows
+    return dbc.Table(
+        head + [html.Tbody([html.Tr([html.Td(_preview_cell(c)) for c in row]) for row in body])],
+        bordered=True, size="sm", className="mb-0",
+    )
+
+
+def salary_slip_preview(data):
+    # Same sections as the PDF, from the same rows.
+    sections = salary_slip_sections(data)
+
+    return dbc.Card([
+        dbc.CardHeader("Preview"),
+        dbc.CardBody([
+            html.H5(COMPANY_NAME, className="text-center"),
+            html.Hr(),
+            _preview_table(sections["employee"], header=False),
             html.Br(),
-            dcc.Input(
-                id="email-to",
-                placeholder="Recipient Email",
-                className="form-control"
-            ),
-        ]
-    ),
+            dbc.Row([
+                dbc.Col(_preview_table(sections["earnings"])),
+                dbc.Col(_preview_table(sections["deductions"])),
+            ]),
+            html.Br(),
+            html.H4(f"Net Pay: ₹ {data['net']}"),
+            html.P(f"Net Pay (in words): {data['net_words']}", className="mb-0"),
+        ]),
+    ])
 
-    html.Br(),
-    dbc.Button("Send Email", id="send-email", color="info"),
-    html.Br(),
-    html.Br(),
-    html.Div(id="email-output")
 
-], fluid=True)
+def email_layout():
+
+    return dbc.Container([
+
+        html.H2("Email Service", className="mb-4"),
+
+        dcc.Dropdown(
+            id="email-type",
+            options=[
+                {"label": "Send Salary Slip", "value": "salary"},
+                {"label": "Send Job Description", "value": "jd"},
+            ],
+            placeholder="Select Email Type"
+        ),
+
+        html.Br(),
+
+        html.Div(
+            id="salary-fields",
+            children=[
+                dcc.Dropdown(
+                    id="email-employee-id",
+                    options=[],
+                    placeholder="Select Employee"
+                )
+            ]
+        ),
+
+        html.Div(
+            id="jd-fields",
+            children=[
+                dcc.Dropdown(
+                    id="email-role",
+                    options=get_jd_dropdown_options(),
+                    placeholder="Select JD Role"
+                ),
+                html.Br(),
+                dcc.Input(
+                    id="email-to",
+                    placeholder="Recipient Email",
+                    className="form-control"
+                ),
+            ]
+        ),
+
+        html.Br(),
+        dbc.Button("Send Email", id="send-email", color="info"),
+        html.Br(),
+        html.Br(),
+        html.Div(id="email-output")
+
+    ], fluid=True)
 
 
 create_employee_layout = dbc.Container([
@@ -362,6 +537,11 @@ create_employee_layout = dbc.Container([
         dbc.Col(dcc.Input(id="new-bank", placeholder="Bank Account", className="form-control")),
     ], className="mb-3"),
 
+    dbc.Row([
+        dbc.Col(dcc.Input(id="new-ifsc", placeholder="IFSC", className="form-control")),
+        dbc.Col(),
+    ], className="mb-3"),
+
     dbc.Button("Create Employee", id="create-employee-btn", color="success", size="lg"),
     html.Br(),
     html.Br(),
@@ -369,6 +549,215 @@ create_employee_layout = dbc.Container([
 
 ], fluid=True)
 
+# ==========================================
+# BULK IMPORT PAGE
+# ==========================================
+
+import_layout = dbc.Container([
+
+    html.H2("Bulk Import Employees", className="mb-4"),
+
+    html.P(
+        "Upload a CSV or Excel file with the employee master columns: "
+        + ", ".join(MASTER_COLUMNS) + ". Employee ID, Name and Email are required.",
+        className="text-muted",
+    ),
+
+    dbc.Checklist(
+        id="import-dry-run",
+        options=[{"label": "Validate only", "value": "dry-run"}],
+        value=[],
+        switch=True,
+        className="mb-3",
+    ),
+
+    dcc.Upload(
+        id="import-upload",
+        children=html.Div(["Drag and drop or ", html.A("select a file")]),
+        accept=".csv,.xlsx",
+        style={
+            "borderWidth": "1px", "borderStyle": "dashed", "borderRadius": "5px",
+            "padding": "40px", "textAlign": "center",
+        },
+    ),
+
+    html.Br(),
+    dcc.Loading(html.Div(id="import-output")),
+
+], fluid=True)
+
+# ==========================================
+# EMPLOYEE DIRECTORY PAGE
+# ==========================================
+
+DIRECTORY_PAGE_SIZE = 25
+
+# PAN and bank details stay out of the directory.
+DIRECTORY_COLUMNS = ["Employee ID", "Name", "Email", "Designation", "Department", DOJ_COLUMN]
+
+def directory_layout():
+    index = get_employee_index(EMPLOYEE_FILE)
+
+    def facet_options(column):
+        values = index.facet_values(column) if index else []
+        return [{"label": v, "value": v} for v in values]
+
+    return dbc.Container([
+
+        html.H2("Employee Directory", className="mb-4"),
+
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(
+                id="dir-department",
+                options=facet_options("Department"),
+                placeholder="All Departments",
+                multi=True,
+            )),
+            dbc.Col(dcc.Dropdown(
+                id="dir-designation",
+                options=facet_options("Designation"),
+                placeholder="All Designations",
+                multi=True,
+            )),
+            dbc.Col(dcc.DatePickerRange(
+                id="dir-joined",
+                start_date_placeholder_text="Joined From",
+                end_date_placeholder_text="Joined To",
+                display_format="DD-MM-YYYY",
+                clearable=True,
+            )),
+        ], className="mb-3"),
+
+        html.P(id="dir-count", className="text-muted"),
+
+        dash_table.DataTable(
+            id="dir-table",
+            columns=[
+                {"name": "Date of Joining" if c == DOJ_COLUMN else c, "id": c}
+                for c in DIRECTORY_COLUMNS
+            ],
+            page_current=0,
+            page_size=DIRECTORY_PAGE_SIZE,
+            page_action="custom",
+            sort_action="custom",
+            sort_mode="single",
+            sort_by=[],
+            style_table={"overflowX": "auto"},
+            style_cell={"textAlign": "left", "padding": "6px"},
+        )
+
+    ], fluid=True)
+
+def _directory_records(page):
+    page = page.reindex(columns=DIRECTORY_COLUMNS)
+    records = []
+    for row in page.itertuples(index=False):
+        record = {}
+        for column, value in zip(DIRECTORY_COLUMNS, row):
+            if pd.isna(value):
+                value = ""
+            elif isinstance(value, pd.Timestamp):
+                value = value.strftime("%d-%m-%Y")
+            record[column] = str(value)
+        records.append(record)
+    return records
+
+# ==========================================
+# PAYROLL ANALYTICS PAGE
+# ==========================================
+
+ANALYTICS_MONTHS = 24
+
+def _chart(title):
+    fig = go.Figure()
+    fig.update_layout(
+        title=title,
+        barmode="stack",
+        template="plotly_white",
+        margin={"l": 40, "r": 20, "t": 50, "b": 40},
+        legend={"orientation": "h"},
+    )
+    return fig
+
+def analytics_layout():
+    # Reads the pre-aggregated month x department rollups, never the ledger.
+    rows = payroll_rollups.month_department_totals(ANALYTICS_MONTHS)
+
+    if not rows:
+        return dbc.Container([
+            html.H2("Payroll Analytics", className="mb-4"),
+            dbc.Alert("No payroll has been recorded yet.", color="info")
+        ], fluid=True)
+
+    months = sorted({r["month"] for r in rows})
+    departments = sorted({r["department"] for r in rows})
+
+    by_month = {m: {a: 0 for a in payroll_rollups.AMOUNTS} for m in months}
+    for r in rows:
+        for a in payroll_rollups.AMOUNTS:
+            by_month[r["month"]][a] += r[a]
+
+    trend = _chart("Payroll Cost by Month")
+    trend.add_trace(go.Scatter(x=months, y=[by_month[m]["gross"] for m in months], name="Gross"))
+    trend.add_trace(go.Scatter(x=months, y=[by_month[m]["net"] for m in months], name="Net"))
+
+    split = _chart("Gross by Department")
+    for department in departments:
+        cells = {r["month"]: r["gross"] for r in rows if r["department"] == department}
+        split.add_trace(go.Bar(x=months, y=[cells.get(m, 0) for m in months], name=department))
+
+    deductions = _chart("Deduction Mix")
+    for column, label in (("pf", "PF"), ("pt", "Professional Tax"), ("tds", "TDS")):
+        deductions.add_trace(go.Bar(x=months, y=[by_month[m][column] for m in months], name=label))
+
+    latest = months[-1]
+    headcount = sum(r["headcount"] for r in rows if r["month"] == latest)
+
+    return dbc.Container([
+
+        html.H2("Payroll Analytics", className="mb-4"),
+
+        dbc.Row([
+            dbc.Col(dbc.Card([
+                dbc.CardBody([
+                    html.H4(f"₹ {by_month[latest]['gross']:,.0f}", className="card-title"),
+                    html.P(f"Gross Payroll ({latest})")
+                ])
+            ], color="primary", inverse=True), md=4),
+
+            dbc.Col(dbc.Card([
+                dbc.CardBody([
+                    html.H4(f"₹ {by_month[latest]['net']:,.0f}", className="card-title"),
+                    html.P(f"Net Payroll ({latest})")
+                ])
+            ], color="success", inverse=True), md=4),
+
+            dbc.Col(dbc.Card([
+                dbc.CardBody([
+                    html.H4(headcount, className="card-title"),
+                    html.P(f"Employees Paid ({latest})")
+                ])
+            ], color="warning", inverse=True), md=4),
+        ], className="mb-4"),
+
+        html.P([
+            f"Payroll register for {latest}: ",
+            html.A("CSV", href=f"/exports/register/{latest}.csv"),
+            " | ",
+            html.A("Excel", href=f"/exports/register/{latest}.xlsx"),
+        ]),
+
+        dbc.Row([
+            dbc.Col(dcc.Graph(figure=trend), md=12),
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col(dcc.Graph(figure=split), md=6),
+            dbc.Col(dcc.Graph(figure=deductions), md=6),
+        ])
+
+    ], fluid=True)
+
 # ==========================================
 # PAGE ROUTING
 # ==========================================
@@ -378,12 +767,20 @@ create_employee_layout = dbc.Container([
 def render_page(pathname):
     if pathname == "/jd":
         return jd_layout
+    elif pathname == "/jd-search":
+        return jd_search_layout
     elif pathname == "/salary":
-        return salary_layout
+        return salary_layout()
     elif pathname == "/email":
-        return email_layout
+        return email_layout()
     elif pathname == "/create-employee":
         return create_employee_layout
+    elif pathname == "/import-employees":
+        return import_layout
+    elif pathname == "/employees":
+        return directory_layout()
+    elif pathname == "/analytics":
+        return analytics_layout()
     else:
         return dashboard_layout()
 # ==========================================
@@ -396,6 +793,7 @@ def render_page(pathname):
     Output("kpi-jd", "children"),
     Input("interval-refresh", "n_intervals")
 )
+@metrics.track_callback("update_kpis")
 def update_kpis(n):
     return (
         get_total_employees(),
@@ -413,56 +811,124 @@ def update_kpis(n):
     State("jd-role", "value"),
     State("jd-dept", "value"),
 )
+@metrics.track_callback("generate_jd")
 def generate_jd(n, role, dept):
     if not n:
         return ""
 
-    file_path = generate_jd_pdf({
-        "role": role,
-        "department": dept
-    })
+    try:
+        file_path = generate_jd_pdf({
+            "role": role,
+            "department": dept
+        })
+    except llm_usage.BudgetExceeded as e:
+        return dbc.Alert(str(e), color="warning")
 
-    return dbc.Alert("JD Generated Successfully!", color="success")
+    return dbc.Alert([
+        "JD Generated Successfully! ",
+        html.A("Open PDF", href=_document_url(file_path), target="_blank", className="alert-link"),
+    ], color="success")
 
-# ==========================================
-# SALARY CALLBACK
-# ==========================================
 
 @app.callback(
-    Output("salary-output", "children"),
-    Input("generate-salary", "n_clicks"),
-    State("emp-name", "value"),
-    State("emp-id", "value"),
-    State("basic", "value"),
-    State("hra", "value"),
-    State("allowance", "value"),
-    State("bonus", "value"),
-    State("pf", "value"),
-    State("tds", "value"),
-    State("pt", "value"),
+    Output("jd-search-results", "children"),
+    Input("jd-search-query", "value"),
 )
-def generate_salary(n, name, emp_id, basic, hra, allowance, bonus, pf, tds, pt):
+@metrics.track_callback("search_jds")
+def search_jds(query):
 
-    if not n:
+    if not query:
         return ""
 
+    results = jd_index.search_jds(query)
+    if not results:
+        return dbc.Alert("No job descriptions match.", color="secondary")
+
+    return dbc.ListGroup([
+        dbc.ListGroupItem([
+            html.Div([
+                html.A(r["role"], href=f"/documents/{r['document_id']}", target="_blank"),
+                html.Small(f" {r['department']} · {r['created_at'][:10]}", className="text-muted"),
+            ]),
+            html.Small(_highlighted(r["snippet"])),
+        ])
+        for r in results
+    ])
+
+# ==========================================
+# SALARY CALLBACK
+# ==========================================
+
+def _salary_input(name, emp_id, basic, hra, allowance, bonus, pf, tds, pt):
     # 🔥 Fetch employee details from Excel
-    employee_details = get_employee_details(emp_id)
+    employee_details = get_employee_details(emp_id) if emp_id else {}
 
-    generate_salary_slip({
+    return {
         "name": name,
         "employee_id": emp_id,
         "basic": basic or 0,
         "hra": hra or 0,
         "allowance": allowance or 0,
         "bonus": bonus or 0,
-        "pf": pf or 0,
-        "tds": tds or 0,
-        "pt": pt or 0,
+        # Blank deductions stay None: 0 in manual mode, computed in
+        # statutory mode.
+        "pf": pf,
+        "tds": tds,
+        "pt": pt,
         **employee_details  # 🔥 merge details here
-    })
+    }
+
+
+SALARY_FIELDS = [
+    ("emp-name", "value"), ("emp-id", "value"),
+    ("basic", "value"), ("hra", "value"), ("allowance", "value"), ("bonus", "value"),
+    ("pf", "value"), ("tds", "value"), ("pt", "value"),
+]
+
+
+@app.callback(
+    Output("salary-preview", "children"),
+    [Input(component, prop) for component, prop in SALARY_FIELDS],
+)
+@metrics.track_callback("preview_salary")
+def preview_salary(name, emp_id, basic, hra, allowance, bonus, pf, tds, pt):
+
+    # Updates on every keystroke; no PDF is built until confirmed.
+    if not emp_id and not any([basic, hra, allowance, bonus]):
+        return html.P("Select an employee and enter amounts to preview the slip.",
+                      className="text-muted")
+
+    data = _salary_input(name, emp_id, basic, hra, allowance, bonus, pf, tds, pt)
+
+    # Statutory mode rejects unknown states and tax regimes.
+    try:
+        return salary_slip_preview(calculate_salary_components(data))
+    except ValueError as e:
+        return dbc.Alert(str(e), color="danger")
 
-    return dbc.Alert("Salary Slip Generated Successfully!", color="success")
+
+@app.callback(
+    Output("salary-output", "children"),
+    Input("generate-salary", "n_clicks"),
+    [State(component, prop) for component, prop in SALARY_FIELDS],
+)
+@metrics.track_callback("generate_salary")
+def generate_salary(n, name, emp_id, basic, hra, allowance, bonus, pf, tds, pt):
+
+    if not n:
+        return ""
+
+    try:
+        path = generate_salary_slip(
+            _salary_input(name, emp_id, basic, hra, allowance, bonus, pf, tds, pt)
+        )
+    except ValueError as e:
+        return dbc.Alert(str(e), color="danger")
+
+    return dbc.Alert([
+        "Salary Slip Generated Successfully! ",
+        html.A("Open PDF", href=_document_url(path), target="_blank", className="alert-link"),
+    ], color="success")
 
     
 @app.callback(
@@ -488,6 +954,7 @@ def toggle_email_fields(email_type):
     State("email-role", "value"),
     State("email-to", "value"),
 )
+@metrics.track_callback("handle_email")
 def handle_email(n, email_type, employee_id, role, to_email):
 
     if not n:
@@ -550,9 +1017,11 @@ def handle_email(n, email_type, employee_id, role, to_email):
     State("new-pf", "value"),
     State("new-pan", "value"),
     State("new-bank", "value"),
+    State("new-ifsc", "value"),
 )
+@metrics.track_callback("create_employee")
 def create_employee(n, emp_id, name, email, designation, department,
-                    doj, uan, pf, pan, bank):
+                    doj, uan, pf, pan, bank, ifsc):
 
     if not n:
         return ""
@@ -571,6 +1040,7 @@ def create_employee(n, emp_id, name, email, designation, department,
         "PF Number": pf,
         "PAN": pan,
         "Bank Account Number": bank,
+        "IFSC": (ifsc or "").strip().upper() or None,
     })
 
     if success:
@@ -578,6 +1048,125 @@ def create_employee(n, emp_id, name, email, designation, department,
     else:
         return dbc.Alert(message, color="danger")
 
+
+@app.callback(
+    Output("import-output", "children"),
+    Input("import-upload", "contents"),
+    State("import-upload", "filename"),
+    State("import-dry-run", "value"),
+)
+@metrics.track_callback("import_employees")
+def import_employees(contents, filename, dry_run):
+
+    if not contents:
+        return ""
+
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in (".csv", ".xlsx"):
+        return dbc.Alert("Upload a .csv or .xlsx file.", color="danger")
+
+    _, encoded = contents.split(",", 1)
+
+    # Keep the uploaded name; the error report is named after it.
+    with tempfile.TemporaryDirectory() as upload_dir:
+        upload_path = os.path.join(upload_dir, secure_filename(filename) or f"upload{extension}")
+        with open(upload_path, "wb") as f:
+            f.write(base64.b64decode(encoded))
+
+        try:
+            summary = employee_import.import_employees(
+                upload_path, dry_run=bool(dry_run), master_path=EMPLOYEE_FILE
+            )
+        except Exception as e:
+            return dbc.Alert(f"Import failed: {e}", color="danger")
+
+    action = "would be added" if dry_run else "added"
+    children = [dbc.Alert(
+        f"{summary['accepted']} of {summary['rows']} employees {action} "
+        f"in {summary['seconds']}s.",
+        color="success" if not summary["rejected"] else "warning",
+    )]
+
+    if summary["ignored_columns"]:
+        children.append(html.P(f"Ignored columns: {', '.join(summary['ignored_columns'])}"))
+
+    if summary["error_report"]:
+        name = os.path.basename(summary["error_report"])
+        children.append(html.A(
+            f"Download the {summary['rejected']} rejected rows with reasons",
+            href=f"/exports/import-errors/{name}",
+            className="btn btn-outline-warning",
+        ))
+
+    return html.Div(children)
+
+# ==========================================
+# EMPLOYEE SEARCH CALLBACKS
+# ==========================================
+
+@app.callback(
+    Output("emp-id", "options"),
+    Input("emp-id", "search_value"),
+    State("emp-id", "value")
+)
+@metrics.track_callback("search_salary_employee")
+def search_salary_employee(search_value, selected):
+    if not search_value and not selected:
+        return dash.no_update
+    return employee_search_options(search_value, selected)
+
+@app.callback(
+    Output("email-employee-id", "options"),
+    Input("email-employee-id", "search_value"),
+    State("email-employee-id", "value")
+)
+@metrics.track_callback("search_email_employee")
+def search_email_employee(search_value, selected):
+    if not search_value and not selected:
+        return dash.no_update
+    return employee_search_options(search_value, selected)
+
+# ==========================================
+# EMPLOYEE DIRECTORY CALLBACK
+# ==========================================
+
+@app.callback(
+    Output("dir-table", "data"),
+    Output("dir-table", "page_count"),
+    Output("dir-table", "page_current"),
+    Output("dir-count", "children"),
+    Input("dir-table", "page_current"),
+    Input("dir-table", "page_size"),
+    Input("dir-table", "sort_by"),
+    Input("dir-department", "value"),
+    Input("dir-designation", "value"),
+    Input("dir-joined", "start_date"),
+    Input("dir-joined", "end_date"),
+)
+@metrics.track_callback("update_directory")
+def update_directory(page_current, page_size, sort_by, departments, designations,
+                     joined_from, joined_to):
+
+    # A new filter starts again from the first page.
+    if ctx.triggered_id in ("dir-department", "dir-designation", "dir-joined"):
+        page_current = 0
+
+    sort = sort_by[0] if sort_by else {}
+
+    page, total = query_employees(
+        filters={"Department": departments, "Designation": designations},
+        joined_from=joined_from,
+        joined_to=joined_to,
+        sort_by=sort.get("column_id"),
+        descending=sort.get("direction") == "desc",
+        page=page_current or 0,
+        page_size=page_size,
+        path=EMPLOYEE_FILE,
+    )
+
+    page_count = max(1, -(-total // page_size))
+    return _directory_records(page), page_count, page_current or 0, f"{total:,} employees"
+
 # ==========================================
 # RUN SERVER ON 8080
 # ==========================================
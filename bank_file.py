@@ -0,0 +1,236 @@
+"""
+Bulk bank transfer (NEFT/RTGS) file for a payroll run.
+
+Joins the net pay recorded in the payroll ledger with the bank account
+in the employee master and writes one line per transfer in a single
+streaming pass. Totals and checksums go into the trailer, so nothing
+has to be held back to write the header.
+
+    python bank_file.py --run payroll-20260131093000-1a2b3c4d
+    python bank_file.py --month 2026-01 -o salaries.csv
+
+File layout (comma separated):
+
+    H,<batch ref>,<debit account>,<value date YYYYMMDD>,<created YYYYmmddHHMMSS>
+    D,<seq>,<NEFT|RTGS>,<amount>,<beneficiary account>,<IFSC>,<beneficiary name>,<employee id>,<narration>
+    T,<transfers>,<total amount>,<account hash total>,<SHA-256 of the D lines>
+
+Employees without a usable account or IFSC, or with no net pay, are
+skipped and listed in a separate exceptions file. A debit account is
+required (HRMS_DEBIT_ACCOUNT or --debit-account).
+"""
+
+import os
+import re
+import csv
+import sys
+import hashlib
+import argparse
+from datetime import datetime
+
+import pandas as pd
+
+import payroll_ledger
+from employee_store import load_employee_master
+from storage import atomic_path
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+DEBIT_ACCOUNT = os.getenv("HRMS_DEBIT_ACCOUNT", "")
+BANK_FILES_DIR = "data/bank_files"
+
+# RTGS is only available from Rs 2,00,000.
+RTGS_THRESHOLD_PAISE = 200000 * 100
+
+# Hash total is the sum of beneficiary account numbers modulo this.
+HASH_TOTAL_MODULUS = 10 ** 18
+
+NAME_LENGTH = 35
+NARRATION_LENGTH = 30
+
+_NAME_CHARS = re.compile(r"[^A-Za-z0-9 .]")
+_IFSC = re.compile(r"^[A-Z]{4}0[A-Z0-9]{6}$")
+
+
+# ==========================================
+# MASTER LOOKUP
+# ==========================================
+
+def _account_number(value):
+    # The master reads account numbers as text; see employee_store.ID_COLUMNS.
+    if value is None or pd.isna(value):
+        return ""
+    return re.sub(r"\s", "", str(value))
+
+
+def _ifsc(value):
+    if value is None or pd.isna(value):
+        return ""
+    return str(value).strip().upper()
+
+
+def _beneficiaries():
+    df = load_employee_master()
+    if df is None:
+        return {}
+
+    ifsc = df["IFSC"] if "IFSC" in df.columns else [""] * len(df)
+    return {
+        str(employee_id): (_account_number(account), name, _ifsc(code))
+        for employee_id, name, account, code in zip(
+            df["Employee ID"], df["Name"], df["Bank Account Number"], ifsc
+        )
+    }
+
+
+# ==========================================
+# FILE
+# ==========================================
+
+def _rupees(paise):
+    sign = "-" if paise < 0 else ""
+    return f"{sign}{abs(paise) // 100}.{abs(paise) % 100:02d}"
+
+
+def _clean_name(name):
+    if name is None or (isinstance(name, float) and pd.isna(name)):
+        return ""
+    return _NAME_CHARS.sub(" ", str(name)).strip()[:NAME_LENGTH]
+
+
+def write_bank_file(path, run_id=None, month=None, value_date=None, debit_account=None):
+    """
+    Writes the transfer file for a payroll run (or, without a run, the
+    latest computations of `month`) and an exceptions CSV next to it.
+    Returns a summary dict.
+    """
+
+    if not run_id and not month:
+        raise ValueError("A payroll run or a month is required.")
+
+    month = payroll_ledger.normalize_month(month) if month else None
+    value_date = value_date or datetime.now().strftime("%Y%m%d")
+    debit_account = debit_account or DEBIT_ACCOUNT
+    if not debit_account:
+        raise ValueError("No debit account: set HRMS_DEBIT_ACCOUNT or pass --debit-account.")
+    batch_ref = run_id or f"SALARY-{month}"
+
+    beneficiaries = _beneficiaries()
+    exceptions_path = f"{os.path.splitext(path)[0]}_exceptions.csv"
+
+    count = 0
+    total = 0
+    hash_total = 0
+    digest = hashlib.sha256()
+    skipped = 0
+
+    with atomic_path(path) as tmp_path, atomic_path(exceptions_path) as tmp_exceptions, \
+            open(tmp_path, "w", newline="", encoding="ascii", errors="replace") as f, \
+            open(tmp_exceptions, "w", newline="", encoding="utf-8") as ef:
+
+        exceptions = csv.writer(ef)
+        exceptions.writerow(["Employee ID", "Month", "Net Pay", "Reason"])
+
+        # Lines are written by hand (every field is sanitized to be
+        # comma-free) so the checksum covers exactly the bytes on disk.
+        def write(record):
+            line = ",".join(str(v) for v in record) + "\n"
+            f.write(line)
+            return line
+
+        write(["H", batch_ref, debit_account, value_date, datetime.now().strftime("%Y%m%d%H%M%S")])
+
+        for rows in payroll_ledger.iter_latest(["net"], start=month, end=month, run_id=run_id):
+            for row in rows:
+                employee_id = row["employee_id"]
+                net = row["net"] or 0
+                account, name, ifsc = beneficiaries.get(employee_id, ("", None, ""))
+
+                reason = None
+                if employee_id not in beneficiaries:
+                    reason = "Employee not found in master"
+                elif not account.isdigit():
+                    reason = "Missing or invalid bank account number"
+                elif not ifsc:
+                    reason = "Missing IFSC"
+                elif not _IFSC.match(ifsc):
+                    reason = f"Invalid IFSC {ifsc}"
+                elif net <= 0:
+                    reason = "No net pay"
+
+                if reason:
+                    exceptions.writerow([employee_id, row["month"], _rupees(net), reason])
+                    skipped += 1
+                    continue
+
+                count += 1
+                total += net
+                hash_total = (hash_total + int(account)) % HASH_TOTAL_MODULUS
+
+                record = [
+                    "D",
+                    count,
+                    "RTGS" if net >= RTGS_THRESHOLD_PAISE else "NEFT",
+                    _rupees(net),
+                    account,
+                    ifsc,
+                    _clean_name(name),
+                    _clean_name(employee_id),
+                    f"SALARY {row['month']}"[:NARRATION_LENGTH],
+                ]
+                digest.update(write(record).encode("ascii", "replace"))
+
+        write(["T", count, _rupees(total), hash_total, digest.hexdigest()])
+
+    return {
+        "path": path,
+        "exceptions_path": exceptions_path,
+        "batch_ref": batch_ref,
+        "transfers": count,
+        "total": _rupees(total),
+        "hash_total": hash_total,
+        "sha256": digest.hexdigest(),
+        "skipped": skipped,
+    }
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a NEFT/RTGS bulk transfer file")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--run", help="payroll run ID")
+    source.add_argument("--month", help="latest computations for this pay month")
+    parser.add_argument("--value-date", help="YYYYMMDD, defaults to today")
+    parser.add_argument("--debit-account", help="defaults to $HRMS_DEBIT_ACCOUNT")
+    parser.add_argument("-o", "--output")
+    args = parser.parse_args(argv)
+
+    if not (args.debit_account or DEBIT_ACCOUNT):
+        parser.error("a debit account is required: set HRMS_DEBIT_ACCOUNT or pass --debit-account")
+
+    output = args.output or os.path.join(
+        BANK_FILES_DIR,
+        f"{args.run or 'SALARY-' + payroll_ledger.normalize_month(args.month)}.csv",
+    )
+
+    summary = write_bank_file(
+        output,
+        run_id=args.run,
+        month=args.month,
+        value_date=args.value_date,
+        debit_account=args.debit_account,
+    )
+
+    print(f"{summary['transfers']} transfers, total {summary['total']} -> {summary['path']}")
+    if summary["skipped"]:
+        print(f"{summary['skipped']} skipped, see {summary['exceptions_path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
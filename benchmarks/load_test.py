@@ -0,0 +1,444 @@
+"""
+Concurrent-user load test for the Dash callback endpoints.
+
+Each virtual user replays HR sessions against /_dash-update-component:
+page load, dashboard interval refreshes, salary slip generation,
+employee creation and a salary slip email send.
+
+Usage (from the repository root):
+
+    python -m benchmarks.load_test --users 20 --sessions 5
+    python -m benchmarks.load_test --users 50 --duration 120 --json out.json
+
+By default the app is served in-process on a throwaway copy of the data
+with the OpenAI client and SendGrid replaced by local stubs. Pass --url to
+target an already running deployment instead; that deployment must have
+SENDGRID_HOST pointed at a stand-in so no real mail is sent.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.chdir(REPO_ROOT)
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "bench-stub")
+
+from benchmarks.stubs import MailStandIn, StubLLMClient  # noqa: E402
+from benchmarks.synthetic import employee_id, make_salary_inputs, write_employee_master  # noqa: E402
+
+CALLBACK_URL = "/_dash-update-component"
+
+
+# ==========================================
+# DASH CALLBACK PAYLOADS
+# ==========================================
+
+def _prop(component_id, prop, value=None):
+    item = {"id": component_id, "property": prop}
+    if value is not None:
+        item["value"] = value
+    return item
+
+
+def callback_payload(outputs, inputs, state=()):
+    """
+    Builds the JSON body the Dash renderer posts for a callback.
+    `outputs` is a list of (id, property); `inputs`/`state` are lists of
+    (id, property, value).
+    """
+
+    output_specs = [_prop(cid, prop) for cid, prop in outputs]
+
+    if len(outputs) == 1:
+        output = f"{outputs[0][0]}.{outputs[0][1]}"
+        output_field = output_specs[0]
+    else:
+        output = ".." + "...".join(f"{cid}.{prop}" for cid, prop in outputs) + ".."
+        output_field = output_specs
+
+    return {
+        "output": output,
+        "outputs": output_field,
+        "inputs": [_prop(cid, prop, value) for cid, prop, value in inputs],
+        "changedPropIds": [f"{cid}.{prop}" for cid, prop, _ in inputs],
+        "state": [_prop(cid, prop, value) for cid, prop, value in state],
+    }
+
+
+def render_page_payload(pathname):
+    return callback_payload(
+        [("page-content", "children")],
+        [("url", "pathname", pathname)],
+    )
+
+
+def update_kpis_payload(tick):
+    return callback_payload(
+        [("kpi-employees", "children"), ("kpi-salary", "children"), ("kpi-jd", "children")],
+        [("interval-refresh", "n_intervals", tick)],
+    )
+
+
+def generate_salary_payload(salary):
+    return callback_payload(
+        [("salary-output", "children")],
+        [("generate-salary", "n_clicks", 1)],
+        [
+            ("emp-name", "value", salary["name"]),
+            ("emp-id", "value", salary["employee_id"]),
+            ("basic", "value", salary["basic"]),
+            ("hra", "value", salary["hra"]),
+            ("allowance", "value", salary["allowance"]),
+            ("bonus", "value", salary["bonus"]),
+            ("pf", "value", salary["pf"]),
+            ("tds", "value", salary["tds"]),
+            ("pt", "value", salary["pt"]),
+        ],
+    )
+
+
+def create_employee_payload(emp_id):
+    return callback_payload(
+        [("create-employee-output", "children")],
+        [("create-employee-btn", "n_clicks", 1)],
+        [
+            ("new-emp-id", "value", emp_id),
+            ("new-name", "value", f"Load Test {emp_id}"),
+            ("new-email", "value", f"{emp_id.lower()}@example.com"),
+            ("new-designation", "value", "Analyst"),
+            ("new-department", "value", "Operations"),
+            ("new-doj", "value", "01-04-2025"),
+            ("new-uan", "value", None),
+            ("new-pf", "value", None),
+            ("new-pan", "value", None),
+            ("new-bank", "value", None),
+            ("new-ifsc", "value", "HDFC0001234"),
+        ],
+    )
+
+
+def handle_email_payload(emp_id):
+    return callback_payload(
+        [("email-output", "children")],
+        [("send-email", "n_clicks", 1)],
+        [
+            ("email-type", "value", "salary"),
+            ("email-employee-id", "value", emp_id),
+            ("email-role", "value", None),
+            ("email-to", "value", None),
+        ],
+    )
+
+
+def generate_jd_payload(role):
+    return callback_payload(
+        [("jd-output", "children")],
+        [("generate-jd", "n_clicks", 1)],
+        [
+            ("jd-role", "value", role),
+            ("jd-dept", "value", "Engineering"),
+        ],
+    )
+
+
+# ==========================================
+# RESULTS
+# ==========================================
+
+class Recorder:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.server_errors = defaultdict(int)
+        self.first_server_error = {}
+
+    def record(self, name, elapsed, ok):
+        with self.lock:
+            self.latencies[name].append(elapsed)
+            if not ok:
+                self.errors[name] += 1
+
+    def record_server_error(self, name, status, body):
+        # A 5xx means the callback itself crashed (e.g. a payload that no
+        # longer matches its signature), not that the app is slow.
+        with self.lock:
+            self.server_errors[name] += 1
+            self.first_server_error.setdefault(name, f"HTTP {status}: {body[:500]}")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(recorder, wall_time):
+    summary = {}
+    for name, values in sorted(recorder.latencies.items()):
+        values = sorted(values)
+        summary[name] = {
+            "count": len(values),
+            "errors": recorder.errors.get(name, 0),
+            "server_errors": recorder.server_errors.get(name, 0),
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": values[-1],
+            "throughput": len(values) / wall_time if wall_time else 0.0,
+        }
+    return summary
+
+
+def print_summary(summary, wall_time, users):
+    print()
+    print(f"{users} users, {wall_time:.1f}s wall time")
+    print(f"{'callback':<18} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p90 ms':>9} "
+          f"{'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'req/s':>8}")
+    print("-" * 92)
+    for name, row in summary.items():
+        print(f"{name:<18} {row['count']:>7} {row['errors']:>7} "
+              f"{row['p50'] * 1e3:>9.1f} {row['p90'] * 1e3:>9.1f} "
+              f"{row['p95'] * 1e3:>9.1f} {row['p99'] * 1e3:>9.1f} "
+              f"{row['max'] * 1e3:>9.1f} {row['throughput']:>8.2f}")
+    print()
+
+
+# ==========================================
+# VIRTUAL USER
+# ==========================================
+
+class VirtualUser:
+
+    def __init__(self, base_url, user_no, args, recorder, stop_at):
+        self.base_url = base_url.rstrip("/")
+        self.user_no = user_no
+        self.args = args
+        self.recorder = recorder
+        self.stop_at = stop_at
+        self.http = requests.Session()
+        self.created = []
+
+    def _timed(self, name, method, path, payload=None):
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = self.http.request(
+                method, self.base_url + path, json=payload, timeout=self.args.timeout
+            )
+            ok = response.status_code in (200, 204)
+            if response.status_code >= 500:
+                self.recorder.record_server_error(name, response.status_code, response.text)
+            if ok and payload is not None and response.status_code == 200:
+                ok = "danger" not in response.text
+        except requests.RequestException:
+            ok = False
+        self.recorder.record(name, time.perf_counter() - start, ok)
+        return ok
+
+    def callback(self, name, payload):
+        return self._timed(name, "POST", CALLBACK_URL, payload)
+
+    def session(self, session_no):
+        args = self.args
+
+        self._timed("page_load", "GET", "/_dash-layout")
+        self._timed("page_load", "GET", "/_dash-dependencies")
+        self.callback("render_page", render_page_payload("/"))
+
+        for tick in range(args.refreshes):
+            self.callback("update_kpis", update_kpis_payload(tick + 1))
+
+        salary = next(make_salary_inputs(1, seed=self.user_no * 1000 + session_no))
+        salary["employee_id"] = employee_id((self.user_no * 7919 + session_no) % args.employees + 1)
+
+        self.callback("render_page", render_page_payload("/salary"))
+        self.callback("generate_salary", generate_salary_payload(salary))
+
+        new_id = f"LT{self.user_no:03d}{session_no:04d}{uuid.uuid4().hex[:6].upper()}"
+        self.callback("render_page", render_page_payload("/create-employee"))
+        if self.callback("create_employee", create_employee_payload(new_id)):
+            self.created.append(new_id)
+
+        if args.with_jd:
+            self.callback("render_page", render_page_payload("/jd"))
+            self.callback("generate_jd", generate_jd_payload(f"Load Test Role {self.user_no}"))
+
+        self.callback("render_page", render_page_payload("/email"))
+        self.callback("handle_email", handle_email_payload(salary["employee_id"]))
+
+    def run(self):
+        session_no = 0
+        while True:
+            if self.stop_at is not None:
+                if time.monotonic() >= self.stop_at:
+                    break
+            elif session_no >= self.args.sessions:
+                break
+            self.session(session_no)
+            session_no += 1
+        return self.created
+
+
+# ==========================================
+# IN-PROCESS TARGET
+# ==========================================
+
+class LocalTarget:
+    """
+    Serves app.server on a throwaway copy of the data with stubbed
+    OpenAI and SendGrid, using a threaded WSGI server.
+    """
+
+    def __init__(self, employees, llm_latency, mail_latency):
+        self.work_dir = tempfile.mkdtemp(prefix="hrms-load-")
+        self.master = os.path.join(self.work_dir, "Employee_Master.xlsx")
+        self.pdf_dir = os.path.join(self.work_dir, "generated_pdfs")
+        os.makedirs(self.pdf_dir)
+
+        write_employee_master(self.master, employees)
+
+        self.mail = MailStandIn(latency=mail_latency).start()
+
+        import app
+        import document_store
+        import email_service
+        import employee_store
+        import jd_generator
+        import jd_index
+        import llm_usage
+        import payroll_ledger
+        import payroll_rollups
+        import salary_slip_engine
+
+        app.EMPLOYEE_FILE = self.master
+        app.PDF_FOLDER = self.pdf_dir
+        email_service.EMPLOYEE_FILE = self.master
+        employee_store.EMPLOYEE_FILE = self.master
+        email_service.PDF_FOLDER = self.pdf_dir
+        email_service.SENDGRID_API_KEY = "SG.load-test-stub"
+        email_service.SENDGRID_HOST = self.mail.host
+        salary_slip_engine.PDF_DIR = self.pdf_dir
+        jd_generator.PDF_DIR = self.pdf_dir
+        jd_generator.client = StubLLMClient(latency=llm_latency)
+        payroll_ledger.LEDGER_DIR = os.path.join(self.work_dir, "payroll_ledger")
+        payroll_rollups.ROLLUP_DB = os.path.join(self.work_dir, "payroll_rollups.sqlite")
+        document_store.DOCUMENT_DB = os.path.join(self.work_dir, "documents.sqlite")
+        document_store.PDF_DIR = self.pdf_dir
+        jd_index.JD_INDEX_DB = os.path.join(self.work_dir, "jd_index.sqlite")
+        llm_usage.LLM_USAGE_DB = os.path.join(self.work_dir, "llm_usage.sqlite")
+
+        from werkzeug.serving import make_server
+
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        self.httpd = make_server("127.0.0.1", 0, app.server, threaded=True)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def employee_ids(self):
+        import pandas as pd
+        return set(pd.read_excel(self.master)["Employee ID"].astype(str))
+
+    def close(self):
+        self.httpd.shutdown()
+        self.mail.stop()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HRMS Dash callback load test")
+    parser.add_argument("--url", help="target an existing deployment instead of serving in-process")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--sessions", type=int, default=3, help="sessions per user")
+    parser.add_argument("--duration", type=float,
+                        help="run for this many seconds instead of a fixed session count")
+    parser.add_argument("--refreshes", type=int, default=3,
+                        help="dashboard interval refreshes per session")
+    parser.add_argument("--employees", type=int, default=1000,
+                        help="synthetic employee master size (in-process only)")
+    parser.add_argument("--with-jd", action="store_true", help="include JD generation in sessions")
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    parser.add_argument("--mail-latency", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="write the summary to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    target = None
+    if args.url:
+        base_url = args.url
+    else:
+        print(f"Starting in-process target with {args.employees} employees ...", flush=True)
+        target = LocalTarget(args.employees, args.llm_latency, args.mail_latency)
+        base_url = target.url
+
+    recorder = Recorder()
+    stop_at = time.monotonic() + args.duration if args.duration else None
+    users = [VirtualUser(base_url, i, args, recorder, stop_at) for i in range(args.users)]
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.users) as pool:
+            created = [emp for batch in pool.map(lambda u: u.run(), users) for emp in batch]
+        wall_time = time.perf_counter() - start
+
+        summary = summarize(recorder, wall_time)
+        print_summary(summary, wall_time, args.users)
+
+        integrity = None
+        if target is not None:
+            missing = set(created) - target.employee_ids()
+            integrity = {"created": len(created), "missing_from_master": len(missing)}
+            print(f"Employees created: {len(created)}, missing from master: {len(missing)}")
+
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({
+                    "users": args.users,
+                    "wall_time": wall_time,
+                    "callbacks": summary,
+                    "integrity": integrity,
+                }, f, indent=2)
+    finally:
+        if target is not None:
+            target.close()
+
+    if recorder.server_errors:
+        print("Callbacks failed with server errors; the numbers above are not valid:", file=sys.stderr)
+        for name, count in sorted(recorder.server_errors.items()):
+            print(f"  {name}: {count} x {recorder.first_server_error[name]}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,507 @@
+"""
+Micro-benchmarks for the payroll, rendering, lookup and email paths.
+
+Usage (from the repository root):
+
+    python -m benchmarks.run                      # run and print results
+    python -m benchmarks.run --save-baseline      # store results as the baseline
+    python -m benchmarks.run --compare            # fail on regressions vs baseline
+    python -m benchmarks.run --sizes 1000,10000 --only get_employee_details
+
+Timings depend on the machine, so no baseline is shipped. Create one on
+the machine that will run --compare (e.g. the CI runner) from a clean
+checkout of the reference revision, then commit it:
+
+    python -m benchmarks.run --save-baseline
+    git add benchmarks/baselines/baseline.json
+
+Refresh it the same way after an intended performance change or a
+runner change. --compare exits with an error when no baseline exists.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(REPO_ROOT, "benchmarks")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baselines", "baseline.json")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+WORK_DIR = os.path.join(BENCH_DIR, ".work")
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# The app modules resolve data paths relative to the repository root
+# and build an OpenAI client at import time.
+os.chdir(REPO_ROOT)
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "bench-stub")
+
+import app  # noqa: E402
+import document_store  # noqa: E402
+import email_service  # noqa: E402
+import employee_store  # noqa: E402
+import jd_generator  # noqa: E402
+import jd_index  # noqa: E402
+import llm_usage  # noqa: E402
+import payroll_ledger  # noqa: E402
+import payroll_rollups  # noqa: E402
+import salary_slip_engine  # noqa: E402
+import statutory  # noqa: E402
+
+from benchmarks.stubs import MailStandIn, StubLLMClient  # noqa: E402
+from benchmarks.synthetic import (  # noqa: E402
+    employee_id,
+    make_salary_inputs,
+    populate_pdf_folder,
+    write_employee_master,
+)
+
+
+# ==========================================
+# HELPERS
+# ==========================================
+
+@contextlib.contextmanager
+def patched(module, **attrs):
+    original = {name: getattr(module, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in original.items():
+            setattr(module, name, value)
+
+
+def measure(fn, repeat, budget, ops=1, warmup=0):
+    """
+    Runs fn up to `repeat` times (at least once), stopping early once
+    `budget` seconds have been spent. Returns per-operation timings.
+    The first `warmup` calls are not timed.
+    """
+
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    spent = 0.0
+
+    while len(timings) < repeat:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed / ops)
+        spent += elapsed
+        if spent >= budget:
+            break
+
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+        "runs": len(timings),
+        "ops": ops,
+    }
+
+
+def pdf_sizes(directory):
+    """
+    Median file size and size per page of the PDFs in `directory`.
+    """
+
+    files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".pdf")]
+    if not files:
+        return {}
+
+    sizes = []
+    per_page = []
+    for path in files:
+        with open(path, "rb") as f:
+            content = f.read()
+        pages = max(1, len(re.findall(rb"/Type\s*/Page\b", content)))
+        sizes.append(len(content))
+        per_page.append(len(content) / pages)
+
+    return {
+        "bytes": statistics.median(sizes),
+        "bytes_per_page": round(statistics.median(per_page)),
+    }
+
+
+@contextlib.contextmanager
+def scratch_ledger():
+    # Slip and JD generation record to the payroll ledger and the local
+    # document, JD and LLM usage stores; keep benchmark runs out of them.
+    with tempfile.TemporaryDirectory() as ledger_dir, \
+            patched(payroll_ledger, LEDGER_DIR=os.path.join(ledger_dir, "ledger")), \
+            patched(payroll_rollups, ROLLUP_DB=os.path.join(ledger_dir, "rollups.sqlite")), \
+            patched(document_store, DOCUMENT_DB=os.path.join(ledger_dir, "documents.sqlite")), \
+            patched(jd_index, JD_INDEX_DB=os.path.join(ledger_dir, "jd_index.sqlite")), \
+            patched(llm_usage, LLM_USAGE_DB=os.path.join(ledger_dir, "llm_usage.sqlite")):
+        yield
+
+
+def master_file(size):
+    path = os.path.join(WORK_DIR, f"Employee_Master_{size}.xlsx")
+    if not os.path.exists(path):
+        print(f"  generating {size}-row employee master ...", flush=True)
+        write_employee_master(path, size)
+    return path
+
+
+def pdf_folder(size):
+    path = os.path.join(WORK_DIR, f"generated_pdfs_{size}")
+    marker = os.path.join(path, ".complete")
+    if not os.path.exists(marker):
+        shutil.rmtree(path, ignore_errors=True)
+        print(f"  generating {size}-file PDF folder ...", flush=True)
+        populate_pdf_folder(path, size, jd_files=max(1, size // 50))
+        open(marker, "w").close()
+    return path
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ==========================================
+# BENCHMARKS
+# ==========================================
+
+def bench_calculate_salary_components(ctx, size):
+    inputs = list(make_salary_inputs(size))
+
+    def run():
+        for data in inputs:
+            salary_slip_engine.calculate_salary_components(dict(data))
+
+    return measure(run, ctx.repeat, ctx.budget, ops=size)
+
+
+def bench_statutory_deductions(ctx, size):
+    inputs = list(make_salary_inputs(size))
+    for data in inputs:
+        data.update(pf=None, tds=None, pt=None)
+
+    def run():
+        statutory.fill_deductions([dict(data) for data in inputs])
+
+    return measure(run, ctx.repeat, ctx.budget, ops=size)
+
+
+def bench_generate_salary_slip(ctx):
+    inputs = list(make_salary_inputs(ctx.render_count))
+
+    with tempfile.TemporaryDirectory() as out_dir, scratch_ledger(), \
+            patched(salary_slip_engine, PDF_DIR=out_dir):
+
+        def run():
+            for data in inputs:
+                salary_slip_engine.generate_salary_slip(dict(data))
+
+        result = measure(run, ctx.repeat, ctx.budget, ops=len(inputs))
+        result.update(pdf_sizes(out_dir))
+        return result
+
+
+def bench_generate_jd_pdf(ctx):
+    stub = StubLLMClient()
+
+    with tempfile.TemporaryDirectory() as out_dir, scratch_ledger(), \
+            patched(jd_generator, PDF_DIR=out_dir, client=stub):
+
+        def run():
+            for i in range(ctx.render_count):
+                jd_generator.generate_jd_pdf({
+                    "role": f"Data Engineer {i}",
+                    "department": "Engineering",
+                })
+
+        result = measure(run, ctx.repeat, ctx.budget, ops=ctx.render_count)
+        result.update(pdf_sizes(out_dir))
+        return result
+
+
+def bench_get_employee_details(ctx, size):
+    target = employee_id(size // 2 + 1)
+
+    with patched(employee_store, EMPLOYEE_FILE=master_file(size)):
+        # The first call loads the workbook (or sidecar); time lookups only.
+        return measure(
+            lambda: employee_store.get_employee_details(target),
+            ctx.repeat, ctx.budget, warmup=1
+        )
+
+
+def bench_load_employee_master(ctx, size):
+    # A fresh process: nothing cached in memory, sidecar already on disk.
+    path = master_file(size)
+    employee_store.load_employee_master(path)
+
+    def run():
+        employee_store.invalidate(path)
+        employee_store.load_employee_master(path)
+
+    return measure(run, ctx.repeat, ctx.budget)
+
+
+def bench_search_employees(ctx, size):
+    queries = ["pri", "priya ver", employee_id(size // 2 + 1)[:7], "verma1"]
+
+    with patched(employee_store, EMPLOYEE_FILE=master_file(size)):
+        employee_store.get_search_index().warm()
+
+        def run():
+            for query in queries:
+                employee_store.search_employees(query)
+
+        return measure(run, ctx.repeat, ctx.budget, ops=len(queries))
+
+
+def bench_get_latest_salary_slip(ctx, size):
+    folder = pdf_folder(size)
+    target = employee_id(1)
+
+    with patched(email_service, PDF_FOLDER=folder):
+        return measure(
+            lambda: email_service.get_latest_salary_slip(target),
+            ctx.repeat, ctx.budget
+        )
+
+
+def bench_update_kpis(ctx, size):
+    with patched(app, EMPLOYEE_FILE=master_file(size), PDF_FOLDER=pdf_folder(size)):
+        return measure(lambda: app.update_kpis(0), ctx.repeat, ctx.budget)
+
+
+def bench_send_email(ctx):
+    with tempfile.TemporaryDirectory() as out_dir, scratch_ledger(), \
+            patched(salary_slip_engine, PDF_DIR=out_dir):
+        attachment = salary_slip_engine.generate_salary_slip(
+            next(make_salary_inputs(1))
+        )
+
+        with MailStandIn() as stand_in, patched(
+            email_service,
+            SENDGRID_API_KEY="SG.bench-stub",
+            SENDGRID_HOST=stand_in.host,
+        ):
+            def run():
+                for _ in range(ctx.send_count):
+                    email_service._send_email(
+                        "employee@example.com",
+                        "Salary Slip",
+                        "Please find attached your salary slip.",
+                        attachment,
+                    )
+
+            return measure(run, ctx.repeat, ctx.budget, ops=ctx.send_count)
+
+
+SIZED_BENCHMARKS = {
+    "calculate_salary_components": bench_calculate_salary_components,
+    "statutory_deductions": bench_statutory_deductions,
+    "get_employee_details": bench_get_employee_details,
+    "load_employee_master": bench_load_employee_master,
+    "search_employees": bench_search_employees,
+    "get_latest_salary_slip": bench_get_latest_salary_slip,
+    "update_kpis": bench_update_kpis,
+}
+
+FIXED_BENCHMARKS = {
+    "generate_salary_slip": bench_generate_salary_slip,
+    "generate_jd_pdf": bench_generate_jd_pdf,
+    "_send_email": bench_send_email,
+}
+
+
+def run_benchmarks(ctx):
+    results = {}
+
+    for name, bench in SIZED_BENCHMARKS.items():
+        if ctx.only and name not in ctx.only:
+            continue
+        for size in ctx.sizes:
+            key = f"{name}[{size}]"
+            print(f"{key} ...", flush=True)
+            results[key] = bench(ctx, size)
+
+    for name, bench in FIXED_BENCHMARKS.items():
+        if ctx.only and name not in ctx.only:
+            continue
+        print(f"{name} ...", flush=True)
+        results[name] = bench(ctx)
+
+    return results
+
+
+# ==========================================
+# BASELINES
+# ==========================================
+
+def compare(results, baseline, threshold):
+    """
+    Returns (rows, regressions) comparing medians against the baseline.
+    """
+
+    rows = []
+    regressions = []
+
+    for key, current in results.items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            rows.append((key, current["median"], None, None))
+            continue
+
+        ratio = current["median"] / base["median"] if base["median"] else None
+        rows.append((key, current["median"], base["median"], ratio))
+
+        if ratio is not None and ratio > 1 + threshold:
+            regressions.append(key)
+
+    return rows, regressions
+
+
+def format_seconds(value):
+    if value is None:
+        return "-"
+    if value < 1e-3:
+        return f"{value * 1e6:.1f} us"
+    if value < 1:
+        return f"{value * 1e3:.2f} ms"
+    return f"{value:.2f} s"
+
+
+def print_table(rows):
+    print()
+    print(f"{'benchmark':<42} {'median/op':>12} {'baseline':>12} {'ratio':>8}")
+    print("-" * 77)
+    for key, current, base, ratio in rows:
+        ratio_text = f"{ratio:.2f}x" if ratio is not None else "-"
+        print(f"{key:<42} {format_seconds(current):>12} {format_seconds(base):>12} {ratio_text:>8}")
+    print()
+
+
+def format_bytes(value):
+    if value is None:
+        return "-"
+    if value < 1024:
+        return f"{value:.0f} B"
+    if value < 2**20:
+        return f"{value / 1024:.1f} KB"
+    return f"{value / 2**20:.2f} MB"
+
+
+def print_sizes(results, baseline):
+    sized = {key: r for key, r in results.items() if "bytes" in r}
+    if not sized:
+        return
+
+    print(f"{'output size':<42} {'file':>12} {'per page':>12} {'baseline':>12}")
+    print("-" * 81)
+    for key, result in sized.items():
+        base = baseline.get("results", {}).get(key, {}).get("bytes_per_page")
+        print(f"{key:<42} {format_bytes(result['bytes']):>12} "
+              f"{format_bytes(result['bytes_per_page']):>12} {format_bytes(base):>12}")
+    print()
+
+
+def write_json(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HRMS micro-benchmarks")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma separated employee master sizes")
+    parser.add_argument("--only", default="",
+                        help="comma separated benchmark names to run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=30.0,
+                        help="max seconds spent repeating a single benchmark")
+    parser.add_argument("--render-count", type=int, default=20)
+    parser.add_argument("--send-count", type=int, default=20)
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="allowed slowdown vs baseline before failing")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true",
+                        help="exit non-zero if any benchmark regressed")
+
+    args = parser.parse_args(argv)
+    args.sizes = [int(s) for s in args.sizes.split(",") if s]
+    args.only = {s.strip() for s in args.only.split(",") if s.strip()}
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.compare and not os.path.exists(args.baseline):
+        print(f"No baseline at {os.path.relpath(args.baseline, REPO_ROOT)}; "
+              f"create one with --save-baseline (see the module docstring).")
+        return 2
+
+    results = run_benchmarks(args)
+
+    payload = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+        },
+        "results": results,
+    }
+
+    stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    write_json(os.path.join(RESULTS_DIR, f"bench_{stamp}.json"), payload)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    rows, regressions = compare(results, baseline, args.threshold)
+    print_table(rows)
+    print_sizes(results, baseline)
+
+    if args.save_baseline:
+        write_json(args.baseline, payload)
+        print(f"Baseline written to {os.path.relpath(args.baseline, REPO_ROOT)}")
+
+    if regressions:
+        print(f"Regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+        if args.compare:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+# ==========================================
+# STUB LLM CLIENT
+# ==========================================
+
+STUB_JD_CONTENT = {
+    "job_summary": "Own the delivery of reliable, well-tested software for internal HR platforms.",
+    "key_responsibilities": [
+        "Design and build features end to end",
+        "Review code and mentor junior engineers",
+        "Work with HR and finance on payroll automation",
+    ],
+    "required_skills": ["Python", "SQL", "REST APIs"],
+    "preferred_skills": ["Dash", "Pandas", "Spark"],
+    "qualifications": "Bachelor's degree in Computer Science or equivalent experience.",
+    "compensation_note": "Competitive compensation in line with market standards.",
+    "compliance_note": "Employment is subject to applicable Indian labour laws.",
+}
+
+
+class StubLLMClient:
+    """
+    Drop-in replacement for the OpenAI client used by jd_generator.
+    Returns a fixed JD after an optional artificial latency.
+    """
+
+    def __init__(self, latency=0.0, content=None):
+        self.latency = latency
+        self.payload = json.dumps(content or STUB_JD_CONTENT)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        message = SimpleNamespace(content=self.payload)
+        usage = SimpleNamespace(
+            prompt_tokens=350,
+            completion_tokens=250,
+            total_tokens=600,
+        )
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=message)],
+            usage=usage,
+            model=kwargs.get("model", "stub"),
+        )
+
+
+# ==========================================
+# LOCAL SENDGRID STAND-IN
+# ==========================================
+
+class _MailHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        with server.lock:
+            server.received += 1
+            server.bytes_received += length
+
+        self.send_response(202)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MailStandIn:
+    """
+    Minimal HTTP server that accepts SendGrid v3 mail/send requests.
+    Use as a context manager; `host` is suitable for SENDGRID_HOST.
+    """
+
+    def __init__(self, latency=0.0, port=0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _MailHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.lock = threading.Lock()
+        self.httpd.received = 0
+        self.httpd.bytes_received = 0
+        self._thread = None
+
+    @property
+    def host(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    @property
+    def received(self):
+        return self.httpd.received
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,129 @@
+import os
+import random
+from datetime import date, timedelta
+
+import pandas as pd
+
+# ==========================================
+# SYNTHETIC DATA GENERATORS
+# ==========================================
+
+MASTER_COLUMNS = [
+    "Employee ID", "Name", "Email", "Designation",
+    "Department", "Date of Joining (DD-MM-YYYY)",
+    "UAN", "PF Number", "PAN", "Bank Account Number", "IFSC"
+]
+
+DEPARTMENTS = [
+    "Engineering", "Finance", "Human Resources", "Operations",
+    "Sales", "Marketing", "Legal", "Research"
+]
+
+DESIGNATIONS = [
+    "Analyst", "Associate", "Senior Associate", "Manager",
+    "Senior Manager", "Consultant", "Engineer", "Director"
+]
+
+FIRST_NAMES = [
+    "Aarav", "Vivaan", "Aditya", "Ishaan", "Diya", "Ananya",
+    "Saanvi", "Meera", "Rohan", "Kabir", "Priya", "Nisha"
+]
+
+LAST_NAMES = [
+    "Sharma", "Verma", "Iyer", "Nair", "Patel", "Reddy",
+    "Gupta", "Mehta", "Rao", "Singh", "Das", "Kulkarni"
+]
+
+
+def employee_id(i):
+    return f"EMP{i:06d}"
+
+
+def make_employee_master(n, seed=42):
+    """
+    Builds an Employee_Master-shaped DataFrame with n rows.
+    """
+
+    rng = random.Random(seed)
+    start = date(2015, 1, 1)
+
+    rows = []
+    for i in range(1, n + 1):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        rows.append({
+            "Employee ID": employee_id(i),
+            "Name": f"{first} {last}",
+            "Email": f"{first.lower()}.{last.lower()}{i}@example.com",
+            "Designation": rng.choice(DESIGNATIONS),
+            "Department": rng.choice(DEPARTMENTS),
+            "Date of Joining (DD-MM-YYYY)": (
+                start + timedelta(days=rng.randint(0, 3650))
+            ).strftime("%d-%m-%Y"),
+            "UAN": f"{rng.randint(10**11, 10**12 - 1)}",
+            "PF Number": f"MH/BAN/{rng.randint(10**6, 10**7 - 1)}",
+            "PAN": f"ABCDE{rng.randint(1000, 9999)}F",
+            "Bank Account Number": f"{rng.randint(10**11, 10**12 - 1)}",
+            "IFSC": f"HDFC0{rng.randint(10**5, 10**6 - 1)}",
+        })
+
+    return pd.DataFrame(rows, columns=MASTER_COLUMNS)
+
+
+def write_employee_master(path, n, seed=42):
+    """
+    Writes a synthetic master workbook and returns the DataFrame.
+    """
+
+    df = make_employee_master(n, seed)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_excel(path, index=False)
+    return df
+
+
+def make_salary_inputs(n, seed=7):
+    """
+    Yields n salary input dicts shaped like the generate_salary callback payload.
+    """
+
+    rng = random.Random(seed)
+
+    for i in range(1, n + 1):
+        basic = rng.randrange(15000, 200000, 500)
+        yield {
+            "name": f"Employee {i}",
+            "employee_id": employee_id(i),
+            "basic": basic,
+            "hra": basic * 40 // 100,
+            "allowance": rng.randrange(0, 20000, 500),
+            "bonus": rng.choice([0, 0, 0, 5000, 10000]),
+            "pf": min(basic, 15000) * 12 // 100,
+            "tds": rng.randrange(0, 25000, 100),
+            "pt": 200,
+        }
+
+
+def populate_pdf_folder(folder, n_files, slips_per_employee=12, jd_files=0):
+    """
+    Fills a folder with empty, correctly named slip/JD files so directory
+    scans behave like a production generated_pdfs folder.
+    """
+
+    os.makedirs(folder, exist_ok=True)
+
+    employees = max(1, n_files // slips_per_employee)
+    created = 0
+
+    for i in range(1, employees + 1):
+        for month in range(slips_per_employee):
+            if created >= n_files:
+                break
+            name = f"SalarySlip_{employee_id(i)}_2025{month + 1:02d}01093000.pdf"
+            open(os.path.join(folder, name), "wb").close()
+            created += 1
+
+    for i in range(jd_files):
+        name = f"JD_Role_{i}_20250101093000.pdf"
+        open(os.path.join(folder, name), "wb").close()
+
+    return employees
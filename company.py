@@ -0,0 +1,23 @@
+"""
+Company details printed on every generated document.
+
+Salary slips and job descriptions both read these, so a change here is
+picked up by new documents and by `python rerender.py` for stored ones.
+"""
+
+COMPANY_NAME = "SHEEP.AI ADVISORY LLP"
+COMPANY_TAGLINE = "Incorporated under LLP Act, 2008"
+LLPIN = "abc"
+PAN = "abc1"
+TAN = "abc2"
+
+EMAIL = "hr@sheepai.info"
+WEBSITE = "www.sheepai.info"
+
+
+def registration_line():
+    return f"LLPIN: {LLPIN} | PAN: {PAN} | TAN: {TAN}"
+
+
+def contact_line():
+    return f"Email: {EMAIL} | Website: {WEBSITE}"
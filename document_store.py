@@ -0,0 +1,277 @@
+"""
+Inputs and generated content of every document, keyed by document ID.
+
+Salary slips store the computed salary dict they were drawn from; JDs
+store the form input and the LLM content. That is everything needed to
+draw a document again after a letterhead or layout change, without
+recomputing pay or calling the LLM (see rerender.py).
+
+Documents generated before this store existed cannot be re-rendered.
+
+It also locates a document's PDF by ID and streams a month's slips as a
+zip, for the /documents download routes.
+"""
+
+import os
+import re
+import json
+import sqlite3
+import zipfile
+from datetime import datetime
+from contextlib import closing
+
+import metrics
+import payroll_ledger
+from storage import parse_document_name
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+DOCUMENT_DB = "data/documents.sqlite"
+
+KINDS = ["salary_slip", "jd"]
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PDF_DIR = os.path.join(BASE_DIR, "static", "generated_pdfs")
+
+DOCUMENT_ID = re.compile(r"^\d{14}(?:_[0-9a-f]{8})?$")
+
+# Bytes read per chunk when adding a PDF to a streamed zip.
+ZIP_CHUNK_BYTES = 64 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    employee_id TEXT,
+    month TEXT,
+    created_at TEXT NOT NULL,
+    rendered_at TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    content TEXT
+);
+
+CREATE INDEX IF NOT EXISTS documents_kind_month ON documents (kind, month);
+CREATE INDEX IF NOT EXISTS documents_employee ON documents (employee_id);
+"""
+
+_FIELDS = ["document_id", "kind", "file_name", "employee_id", "month",
+           "created_at", "rendered_at", "inputs", "content"]
+
+
+# ==========================================
+# CONNECTION
+# ==========================================
+
+def _connect(path=None):
+    path = path or DOCUMENT_DB
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    con = sqlite3.connect(path, timeout=30, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.executescript(SCHEMA)
+    return con
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _record(row):
+    record = dict(zip(_FIELDS, row))
+    record["inputs"] = json.loads(record["inputs"])
+    record["content"] = json.loads(record["content"]) if record["content"] else None
+    return record
+
+
+# ==========================================
+# WRITE
+# ==========================================
+
+def save_document(kind, document_id, file_name, inputs, content=None,
+                  employee_id=None, month=None, path=None):
+    """
+    Stores one document's inputs (and generated content). Saving the same
+    document ID again replaces it.
+    """
+
+    if kind not in KINDS:
+        raise ValueError(f"Unknown document kind {kind!r}")
+
+    now = _now()
+    with closing(_connect(path)) as con:
+        con.execute(
+            "INSERT INTO documents (document_id, kind, file_name, employee_id, month, "
+            "created_at, rendered_at, inputs, content) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (document_id) DO UPDATE SET kind = excluded.kind, "
+            "file_name = excluded.file_name, employee_id = excluded.employee_id, "
+            "month = excluded.month, rendered_at = excluded.rendered_at, "
+            "inputs = excluded.inputs, content = excluded.content",
+            (
+                document_id, kind, file_name,
+                None if employee_id is None else str(employee_id),
+                month, now, now,
+                json.dumps(inputs, default=str),
+                None if content is None else json.dumps(content, default=str),
+            ),
+        )
+
+
+def mark_rendered(document_ids, path=None):
+    """
+    Stamps documents as re-rendered now.
+    """
+
+    now = _now()
+    with closing(_connect(path)) as con:
+        con.execute("BEGIN IMMEDIATE")
+        con.executemany(
+            "UPDATE documents SET rendered_at = ? WHERE document_id = ?",
+            [(now, document_id) for document_id in document_ids],
+        )
+        con.execute("COMMIT")
+
+
+# ==========================================
+# READ
+# ==========================================
+
+def get_document(document_id, path=None):
+    """
+    One stored document with inputs and content parsed, or None.
+    """
+
+    path = path or DOCUMENT_DB
+    if not os.path.exists(path):
+        return None
+
+    with closing(_connect(path)) as con:
+        row = con.execute(
+            f"SELECT {', '.join(_FIELDS)} FROM documents WHERE document_id = ?",
+            (document_id,),
+        ).fetchone()
+
+    return _record(row) if row else None
+
+
+def select_documents(kind=None, month=None, employee_id=None, document_ids=None,
+                     rendered_before=None, path=None):
+    """
+    Stored documents matching every given filter, oldest first.
+    """
+
+    path = path or DOCUMENT_DB
+    if not os.path.exists(path):
+        return []
+
+    clauses, params = [], []
+    if kind:
+        clauses.append("kind = ?")
+        params.append(kind)
+    if month:
+        clauses.append("month = ?")
+        params.append(month)
+    if employee_id:
+        clauses.append("employee_id = ?")
+        params.append(str(employee_id))
+    if document_ids:
+        clauses.append(f"document_id IN ({', '.join('?' for _ in document_ids)})")
+        params.extend(document_ids)
+    if rendered_before:
+        clauses.append("rendered_at < ?")
+        params.append(rendered_before)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    with closing(_connect(path)) as con:
+        rows = con.execute(
+            f"SELECT {', '.join(_FIELDS)} FROM documents {where} ORDER BY created_at, document_id",
+            params,
+        ).fetchall()
+
+    return [_record(row) for row in rows]
+
+
+# ==========================================
+# FILES
+# ==========================================
+
+def document_path(document_id):
+    """
+    Absolute path of a document's PDF, or None. Documents missing from
+    the store (older ones) are found by file name.
+    """
+
+    if not DOCUMENT_ID.match(document_id or ""):
+        return None
+
+    record = get_document(document_id)
+    if record is not None:
+        path = os.path.join(PDF_DIR, record["file_name"])
+        return path if os.path.exists(path) else None
+
+    if not os.path.isdir(PDF_DIR):
+        return None
+    with os.scandir(PDF_DIR) as entries:
+        for entry in entries:
+            parsed = parse_document_name(entry.name)
+            if parsed and parsed[2] == document_id:
+                return entry.path
+    return None
+
+
+class _ZipStream:
+    # Write-only sink for zipfile; bytes are taken out with drain().
+    # Without seek/tell zipfile writes data descriptors after each entry.
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_month_slips_zip(month):
+    """
+    Yields a zip of the latest slip of every employee for `month`, in
+    chunks, reading one PDF chunk at a time. PDFs are already compressed,
+    so entries are stored, not deflated.
+    """
+
+    month = payroll_ledger.normalize_month(month)
+    slips = payroll_ledger.read_ledger(["document_id"], start=month, end=month)
+
+    stream = _ZipStream()
+    with metrics.stage("slips_zip", rows=len(slips)):
+        with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_STORED) as bundle:
+            for employee_id, document_id in zip(slips["employee_id"], slips["document_id"]):
+                if not document_id:
+                    continue
+                file_name = f"SalarySlip_{employee_id}_{document_id}.pdf"
+                path = os.path.join(PDF_DIR, file_name)
+                if not os.path.exists(path):
+                    continue
+
+                with open(path, "rb") as source, bundle.open(file_name, "w") as target:
+                    while True:
+                        chunk = source.read(ZIP_CHUNK_BYTES)
+                        if not chunk:
+                            break
+                        target.write(chunk)
+                        yield stream.drain()
+
+        yield stream.drain()
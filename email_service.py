@@ -1,7 +1,6 @@
 import os
 import glob
 import base64
-import pandas as pd
 from dotenv import load_dotenv
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import (
@@ -13,6 +12,11 @@ from sendgrid.helpers.mail import (
     Disposition,
 )
 
+import metrics
+import tracing
+from employee_store import get_employee
+from storage import parse_document_name
+
 # ==========================================
 # LOAD ENV
 # ==========================================
@@ -20,6 +24,7 @@ from sendgrid.helpers.mail import (
 load_dotenv()
 
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
+SENDGRID_HOST = os.getenv("SENDGRID_HOST", "https://api.sendgrid.com")
 SENDER = "hr@sheepai.info"
 
 PDF_FOLDER = "static/generated_pdfs"
@@ -30,9 +35,21 @@ EMPLOYEE_FILE = "data/Employee_Master.xlsx"
 # FILE HELPERS
 # ==========================================
 
+def _matching_documents(kind, key, pattern):
+    # The glob also matches longer keys (EMP1 vs EMP10), so compare the
+    # parsed key exactly.
+    files = []
+    for path in glob.glob(pattern):
+        parsed = parse_document_name(path)
+        if parsed and parsed[0] == kind and parsed[1] == key:
+            files.append(path)
+    return files
+
+
 def get_latest_salary_slip(employee_id):
     pattern = os.path.join(PDF_FOLDER, f"SalarySlip_{employee_id}_*.pdf")
-    files = glob.glob(pattern)
+    with tracing.span("pdf_lookup", employee_id=employee_id):
+        files = _matching_documents("SalarySlip", str(employee_id), pattern)
     if not files:
         return None
     return max(files, key=os.path.getctime)
@@ -41,23 +58,20 @@ def get_latest_salary_slip(employee_id):
 def get_latest_jd(role):
     role_clean = role.replace(" ", "_")
     pattern = os.path.join(PDF_FOLDER, f"JD_{role_clean}_*.pdf")
-    files = glob.glob(pattern)
+    files = _matching_documents("JD", role_clean, pattern)
     if not files:
         return None
     return max(files, key=os.path.getctime)
 
 
 def get_employee_email(employee_id):
-    if not os.path.exists(EMPLOYEE_FILE):
-        return None
-
-    df = pd.read_excel(EMPLOYEE_FILE)
-    row = df[df["Employee ID"] == employee_id]
+    with tracing.span("employee_email_lookup", employee_id=employee_id):
+        record = get_employee(employee_id, EMPLOYEE_FILE)
 
-    if row.empty:
+    if record is None:
         return None
 
-    return row.iloc[0]["Email"]
+    return record.email
 
 
 # ==========================================
@@ -78,8 +92,12 @@ def _send_email(to_email, subject, body, attachment_path=None):
 
     # Attach PDF if provided
     if attachment_path:
-        with open(attachment_path, "rb") as f:
-            encoded_file = base64.b64encode(f.read()).decode()
+        with tracing.span("attachment_read", path=attachment_path):
+            with open(attachment_path, "rb") as f:
+                raw = f.read()
+
+        with metrics.stage("encode", bytes=len(raw)):
+            encoded_file = base64.b64encode(raw).decode()
 
         attachment = Attachment(
             FileContent(encoded_file),
@@ -90,8 +108,9 @@ def _send_email(to_email, subject, body, attachment_path=None):
 
         message.attachment = attachment
 
-    sg = SendGridAPIClient(SENDGRID_API_KEY)
-    response = sg.send(message)
+    sg = SendGridAPIClient(SENDGRID_API_KEY, host=SENDGRID_HOST)
+    with metrics.stage("send"):
+        response = sg.send(message)
 
     if response.status_code >= 400:
         raise Exception(f"SendGrid Error: {response.body}")
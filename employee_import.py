@@ -0,0 +1,289 @@
+"""
+Bulk employee onboarding from a CSV or Excel file laid out like the
+employee master (same column headers, any order, case-insensitive).
+
+The file is read in chunks and each chunk is validated column-wise.
+Accepted rows are appended to the master in a single write; rejected
+rows go to an error report CSV with the reason(s) per row.
+
+    python employee_import.py new_hires.csv
+    python employee_import.py acquisition.xlsx --dry-run
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+import metrics
+import tracing
+from employee_store import (
+    EMPLOYEE_FILE,
+    MASTER_COLUMNS,
+    DOJ_COLUMN,
+    ID_COLUMNS,
+    load_employee_master,
+    master_signature,
+    employees_added,
+)
+from storage import file_lock, atomic_path
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+IMPORT_ERRORS_DIR = "data/import_errors"
+
+CHUNK_ROWS = 1000
+
+REQUIRED_COLUMNS = ["Employee ID", "Name", "Email"]
+
+EMAIL_PATTERN = r"[^@\s]+@[^@\s]+\.[^@\s]+"
+PAN_PATTERN = r"[A-Z]{5}[0-9]{4}[A-Z]"
+UAN_PATTERN = r"[0-9]{12}"
+ACCOUNT_PATTERN = r"[0-9]{9,18}"
+IFSC_PATTERN = r"[A-Z]{4}0[A-Z0-9]{6}"
+
+
+# ==========================================
+# READING
+# ==========================================
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if np.isnan(value):
+            return ""
+        if value.is_integer():
+            value = int(value)
+    if isinstance(value, datetime):
+        return value.strftime("%d-%m-%Y")
+    return str(value).strip()
+
+
+def _xlsx_chunks(path, chunk_rows):
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_text(v) for v in next(rows, ())]
+
+        batch = []
+        for row in rows:
+            batch.append([_text(v) for v in row])
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    """
+    Yields DataFrames of at most `chunk_rows` rows, every cell as a
+    stripped string ("" when blank), so IDs keep leading zeros.
+    """
+
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        yield from _xlsx_chunks(path, chunk_rows)
+        return
+
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_rows,
+                             encoding="utf-8-sig"):
+        yield chunk.apply(lambda column: column.str.strip())
+
+
+def _normalize_columns(chunk):
+    known = {column.lower(): column for column in MASTER_COLUMNS}
+    chunk = chunk.rename(columns=lambda c: known.get(str(c).strip().lower(), c))
+    for column in MASTER_COLUMNS:
+        if column not in chunk.columns:
+            chunk[column] = ""
+    return chunk
+
+
+# ==========================================
+# VALIDATION
+# ==========================================
+
+def _invalid(values, pattern):
+    # Blank optional values are fine.
+    return (values != "") & ~values.str.fullmatch(pattern)
+
+
+def validate_chunk(chunk, existing_ids, seen_ids):
+    """
+    Returns a Series with the rejection reasons for each row ("" when the
+    row is accepted). `seen_ids` collects the IDs of earlier chunks.
+    """
+
+    ids = chunk["Employee ID"]
+
+    checks = [(chunk[column] == "", f"{column} is required") for column in REQUIRED_COLUMNS]
+    checks += [
+        (_invalid(chunk["Email"], EMAIL_PATTERN), "Invalid email"),
+        (_invalid(chunk["PAN"], PAN_PATTERN), "PAN must look like ABCDE1234F"),
+        (_invalid(chunk["UAN"], UAN_PATTERN), "UAN must be 12 digits"),
+        (_invalid(chunk["Bank Account Number"], ACCOUNT_PATTERN),
+         "Bank account must be 9-18 digits"),
+        (_invalid(chunk["IFSC"], IFSC_PATTERN), "IFSC must look like HDFC0001234"),
+        ((chunk[DOJ_COLUMN] != "")
+         & pd.to_datetime(chunk[DOJ_COLUMN], format="%d-%m-%Y", errors="coerce").isna(),
+         "Date of joining must be DD-MM-YYYY"),
+        ((ids != "") & ids.isin(existing_ids), "Employee ID already exists"),
+        ((ids != "") & (ids.duplicated(keep="first") | ids.isin(seen_ids)),
+         "Duplicate Employee ID in file"),
+    ]
+
+    reasons = pd.Series("", index=chunk.index)
+    for mask, message in checks:
+        mask = mask.to_numpy(dtype=bool)
+        reasons[mask] = reasons[mask] + np.where(reasons[mask] == "", "", "; ") + message
+
+    seen_ids.update(ids[ids != ""])
+    return reasons
+
+
+def _master_dtypes(df, accepted):
+    # Match the master's column types so the workbook (and its Arrow
+    # sidecar) never mixes types within a column. Identifiers always
+    # stay text; numbers would drop leading zeros and round long ones.
+    accepted = accepted.astype(object).where(accepted != "", np.nan)
+    for column in accepted.columns:
+        if column in ID_COLUMNS or column not in df.columns:
+            continue
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            accepted[column] = pd.to_datetime(accepted[column], format="%d-%m-%Y")
+        elif pd.api.types.is_numeric_dtype(df[column]):
+            numbers = pd.to_numeric(accepted[column], errors="coerce")
+            if numbers.count() == accepted[column].count():
+                accepted[column] = numbers
+    return accepted
+
+
+def _append(df, accepted):
+    if df.empty:
+        return accepted.reset_index(drop=True)
+    # Columns blank in every imported row take the master's type, so
+    # concat does not have to guess one from an all-NA column.
+    for column in accepted.columns:
+        if column in df.columns and accepted[column].isna().all():
+            accepted[column] = pd.Series(np.nan, index=accepted.index).astype(df[column].dtype)
+    return pd.concat([df, accepted.reset_index(drop=True)], ignore_index=True)
+
+
+# ==========================================
+# IMPORT
+# ==========================================
+
+def import_employees(path, dry_run=False, master_path=None, chunk_rows=CHUNK_ROWS):
+    """
+    Validates `path` and appends the accepted rows to the master in one
+    write. Returns a summary dict; `error_report` is the path of the
+    rejected-rows CSV, or None when every row was accepted.
+    """
+
+    master_path = master_path or EMPLOYEE_FILE
+    started = time.perf_counter()
+
+    accepted = []
+    rejected = []
+    rows = 0
+    ignored_columns = set()
+
+    with tracing.span("employee_import", source=os.path.basename(path), dry_run=dry_run), \
+            file_lock(master_path):
+
+        before = master_signature(master_path)
+        df = load_employee_master(master_path)
+        if df is None:
+            df = pd.DataFrame(columns=MASTER_COLUMNS)
+        existing_ids = set(df["Employee ID"].astype(str))
+        seen_ids = set()
+
+        with metrics.stage("import_validate"):
+            for chunk in read_chunks(path, chunk_rows):
+                chunk = _normalize_columns(chunk)
+                ignored_columns.update(c for c in chunk.columns if c not in MASTER_COLUMNS)
+                chunk = chunk[MASTER_COLUMNS].copy()
+                chunk["PAN"] = chunk["PAN"].str.upper()
+                chunk["IFSC"] = chunk["IFSC"].str.upper()
+
+                # Line numbers as the user sees them (header is line 1).
+                chunk.index = pd.RangeIndex(rows + 2, rows + 2 + len(chunk))
+                rows += len(chunk)
+
+                reasons = validate_chunk(chunk, existing_ids, seen_ids)
+                ok = reasons == ""
+                accepted.append(chunk[ok])
+
+                if not ok.all():
+                    errors = chunk[~ok].copy()
+                    errors.insert(0, "Row", errors.index)
+                    errors["Errors"] = reasons[~ok]
+                    rejected.append(errors)
+
+        accepted = pd.concat(accepted) if accepted else pd.DataFrame(columns=MASTER_COLUMNS)
+
+        if len(accepted) and not dry_run:
+            records = accepted.to_dict("records")
+            merged = _append(df, _master_dtypes(df, accepted))
+            with metrics.stage("excel_write", rows=len(merged)), \
+                    atomic_path(master_path) as tmp_path:
+                merged.to_excel(tmp_path, index=False, engine="openpyxl")
+
+            employees_added(records, before, master_path)
+
+    error_report = None
+    if rejected:
+        os.makedirs(IMPORT_ERRORS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        base = os.path.splitext(os.path.basename(path))[0]
+        error_report = os.path.join(IMPORT_ERRORS_DIR, f"{base}_{stamp}_errors.csv")
+        with atomic_path(error_report) as tmp_path:
+            pd.concat(rejected).to_csv(tmp_path, index=False, encoding="utf-8-sig")
+
+    return {
+        "source": path,
+        "rows": rows,
+        "accepted": len(accepted),
+        "rejected": rows - len(accepted),
+        "committed": bool(len(accepted)) and not dry_run,
+        "error_report": error_report,
+        "ignored_columns": sorted(ignored_columns),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import employees into the employee master")
+    parser.add_argument("file", help="CSV or XLSX with employee master columns")
+    parser.add_argument("--dry-run", action="store_true", help="validate only, do not write")
+    parser.add_argument("--master", help=f"defaults to {EMPLOYEE_FILE}")
+    args = parser.parse_args(argv)
+
+    summary = import_employees(args.file, dry_run=args.dry_run, master_path=args.master)
+
+    action = "would be added" if args.dry_run else "added"
+    print(f"{summary['accepted']} of {summary['rows']} rows {action} ({summary['seconds']}s)")
+    if summary["ignored_columns"]:
+        print(f"Ignored columns: {', '.join(summary['ignored_columns'])}")
+    if summary["error_report"]:
+        print(f"{summary['rejected']} rejected, see {summary['error_report']}")
+
+    return 1 if summary["rejected"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
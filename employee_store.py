@@ -0,0 +1,775 @@
+import os
+import re
+import heapq
+import bisect
+import hashlib
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import metrics
+from storage import atomic_path
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+EMPLOYEE_FILE = "data/Employee_Master.xlsx"
+
+MASTER_COLUMNS = [
+    "Employee ID", "Name", "Email", "Designation",
+    "Department", "Date of Joining (DD-MM-YYYY)",
+    "UAN", "PF Number", "PAN", "Bank Account Number", "IFSC"
+]
+
+DOJ_COLUMN = "Date of Joining (DD-MM-YYYY)"
+
+# Identifiers are always text: read as numbers, leading zeros are lost
+# and long account numbers turn into floats.
+ID_COLUMNS = ["Employee ID", "UAN", "PF Number", "PAN", "Bank Account Number", "IFSC"]
+
+# Columns the directory can filter on by exact value.
+FACET_COLUMNS = ["Department", "Designation"]
+
+# Text columns are held in Arrow buffers rather than as one Python
+# object per cell; missing values still read as NaN.
+TEXT_DTYPE = pd.StringDtype("pyarrow_numpy")
+
+# Arrow IPC copy of the workbook, kept next to it
+# (data/Employee_Master.arrow) and tagged with the workbook's hash.
+SIDECAR_SUFFIX = ".arrow"
+SIDECAR_HASH_KEY = b"hrms.source_sha256"
+# Bumped when the sidecar's column types change, so older files are rebuilt.
+SIDECAR_VERSION = "2"
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+_tables = {}
+_indexes = {}
+_search_indexes = {}
+
+
+# ==========================================
+# COLUMNAR SIDECAR
+# ==========================================
+
+def sidecar_path(path=None):
+    return os.path.splitext(path or EMPLOYEE_FILE)[0] + SIDECAR_SUFFIX
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _sidecar_tag(digest):
+    return f"{digest}:v{SIDECAR_VERSION}".encode()
+
+
+def _is_text(column):
+    return column.map(lambda v: isinstance(v, str) or pd.isna(v)).all()
+
+
+def _as_date(value):
+    if isinstance(value, str):
+        return pd.to_datetime(value.strip(), format="%d-%m-%Y", errors="coerce")
+    return pd.NaT if pd.isna(value) else pd.Timestamp(value)
+
+
+def _single_type(name, values):
+    # Rows appended by the app keep form text (e.g. "05-01-2026") next to
+    # Excel dates; Arrow needs one type per column.
+    if name == DOJ_COLUMN:
+        return pd.to_datetime(values.map(_as_date))
+    return values.map(lambda v: v if pd.isna(v) else str(v))
+
+
+def _compact(df):
+    df = df.copy(deep=False)
+    for column in df.columns:
+        if df[column].dtype == object and not _is_text(df[column]):
+            df[column] = _single_type(column, df[column])
+        if column in FACET_COLUMNS and df[column].dtype == object:
+            df[column] = df[column].astype("category")
+        elif df[column].dtype == object and _is_text(df[column]):
+            df[column] = df[column].astype(TEXT_DTYPE)
+        elif pd.api.types.is_integer_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
+
+
+def _arrow_types(arrow_type):
+    if arrow_type in (pa.string(), pa.large_string()):
+        return TEXT_DTYPE
+    return None
+
+
+def _read_sidecar(path, digest):
+    sidecar = sidecar_path(path)
+    if not os.path.exists(sidecar):
+        return None
+
+    try:
+        with pa.memory_map(sidecar) as source:
+            reader = pa.ipc.open_file(source)
+            if (reader.schema.metadata or {}).get(SIDECAR_HASH_KEY) != _sidecar_tag(digest):
+                return None
+            # Text columns keep pointing into the mapped file, so workers
+            # loading the same sidecar share those pages.
+            df = reader.read_all().to_pandas(types_mapper=_arrow_types)
+    except (OSError, pa.ArrowException):
+        return None
+
+    # Blank text cells come back as None; read_excel gives NaN.
+    for column in df.columns:
+        if df[column].dtype == object:
+            df[column] = df[column].where(df[column].notna(), np.nan)
+    return df
+
+
+def _write_sidecar(path, df, digest):
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        # The workbook still loads; only the fast path is lost.
+        logger.warning("Employee master sidecar skipped: %s", e)
+        return
+
+    metadata = dict(table.schema.metadata or {})
+    metadata[SIDECAR_HASH_KEY] = _sidecar_tag(digest)
+    table = table.replace_schema_metadata(metadata)
+
+    try:
+        with atomic_path(sidecar_path(path)) as tmp_path:
+            with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    except OSError as e:
+        logger.warning("Employee master sidecar not written: %s", e)
+
+
+def _read_master(path):
+    """
+    The workbook as a compact DataFrame: from the sidecar when it was
+    built from identical bytes, otherwise parsed from Excel and the
+    sidecar rebuilt for the next process.
+    """
+
+    digest = _file_hash(path)
+
+    with metrics.stage("sidecar_load"):
+        df = _read_sidecar(path, digest)
+    if df is not None:
+        return df
+
+    with metrics.stage("excel_load"):
+        df = _compact(pd.read_excel(path, dtype={column: str for column in ID_COLUMNS}))
+
+    _write_sidecar(path, df, digest)
+    return df
+
+
+# ==========================================
+# CACHED MASTER LOADER
+# ==========================================
+
+def _file_signature(path):
+    # Writers replace the workbook atomically, so the inode changes on
+    # every write; this keeps each worker's cache honest without any
+    # cross-process messaging.
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def load_employee_master(path=None):
+    """
+    Returns the employee master as a DataFrame, re-reading the workbook
+    only when the file on disk changes. Department and Designation are
+    categoricals and other text columns are Arrow-backed strings.
+    The returned frame is shared; callers must not modify it in place.
+    """
+
+    path = path or EMPLOYEE_FILE
+
+    if not os.path.exists(path):
+        return None
+
+    signature = _file_signature(path)
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == signature:
+            metrics.cache_hit("employee_master")
+            return cached[1]
+
+    metrics.cache_miss("employee_master")
+
+    df = _read_master(path)
+
+    with _cache_lock:
+        _cache[path] = (signature, df)
+
+    return df
+
+
+def master_signature(path=None):
+    path = path or EMPLOYEE_FILE
+    if not os.path.exists(path):
+        return None
+    return _file_signature(path)
+
+
+def invalidate(path=None):
+    with _cache_lock:
+        _cache.pop(path or EMPLOYEE_FILE, None)
+        _tables.pop(path or EMPLOYEE_FILE, None)
+        _indexes.pop(path or EMPLOYEE_FILE, None)
+        _search_indexes.pop(path or EMPLOYEE_FILE, None)
+
+
+# ==========================================
+# LOOKUPS
+# ==========================================
+
+class EmployeeRecord:
+    """
+    Read-only view of one master row. Values are read from the table's
+    column arrays on access; nothing is copied when the view is made.
+    """
+
+    __slots__ = ("_columns", "_row")
+
+    def __init__(self, columns, row):
+        self._columns = columns
+        self._row = row
+
+    def __getitem__(self, column):
+        return self._columns[column][self._row]
+
+    def __contains__(self, column):
+        return column in self._columns
+
+    def get(self, column, default=None):
+        values = self._columns.get(column)
+        return default if values is None else values[self._row]
+
+    @property
+    def employee_id(self):
+        return self.get("Employee ID")
+
+    @property
+    def name(self):
+        return self.get("Name", "")
+
+    @property
+    def email(self):
+        return self.get("Email")
+
+    def details(self):
+        return _details(self)
+
+    def __repr__(self):
+        return f"EmployeeRecord({self.employee_id!r})"
+
+
+class EmployeeTable:
+    """
+    Lookup by Employee ID over one version of the master. Holds the
+    frame's column arrays (no copies) and a row number per ID.
+    """
+
+    def __init__(self, df):
+        self.columns = {column: df[column].array for column in df.columns}
+        self.rows = {}
+        ids = df["Employee ID"].tolist() if "Employee ID" in df.columns else []
+        for row, employee_id in enumerate(ids):
+            # First row wins, as with a filtered lookup.
+            self.rows.setdefault(str(employee_id), row)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, employee_id):
+        row = self.rows.get(str(employee_id))
+        return None if row is None else EmployeeRecord(self.columns, row)
+
+
+def get_employee_table(path=None):
+    """
+    Table for the current version of the master, rebuilt only when the
+    cached DataFrame is replaced.
+    """
+
+    path = path or EMPLOYEE_FILE
+    df = load_employee_master(path)
+    if df is None:
+        return None
+
+    with _cache_lock:
+        cached = _tables.get(path)
+        if cached and cached[0] is df:
+            return cached[1]
+
+    table = EmployeeTable(df)
+
+    with _cache_lock:
+        _tables[path] = (df, table)
+
+    return table
+
+
+def get_employee(employee_id, path=None):
+    """
+    EmployeeRecord view for `employee_id`, or None.
+    """
+
+    table = get_employee_table(path)
+    return table.get(employee_id) if table else None
+
+
+def get_employee_details(employee_id, path=None):
+    record = get_employee(employee_id, path)
+    if record is None:
+        return {}
+
+    return record.details()
+
+
+def _details(row):
+    return {
+        "designation": row.get("Designation", ""),
+        "department": row.get("Department", ""),
+        "doj": row.get("Date of Joining (DD-MM-YYYY)", ""),
+        "uan": row.get("UAN", ""),
+        "pf_number": row.get("PF Number", ""),
+        "employee_pan": row.get("PAN", ""),
+        "bank_account": row.get("Bank Account Number", "")
+    }
+
+
+def employee_details_by_id(path=None):
+    """
+    {employee_id: (name, details)} for every employee, for bulk jobs that
+    would otherwise call get_employee_details once per employee.
+    """
+
+    df = load_employee_master(path)
+    if df is None:
+        return {}
+
+    return {
+        str(record["Employee ID"]): (record.get("Name", ""), _details(record))
+        for record in df.to_dict("records")
+    }
+
+
+# ==========================================
+# DIRECTORY INDEX
+# ==========================================
+
+def _parse_joining_dates(column):
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column
+    parsed = pd.to_datetime(column, format="%d-%m-%Y", errors="coerce")
+    # Rows written through the workbook directly may hold real dates.
+    fallback = pd.to_datetime(column.where(parsed.isna()), errors="coerce")
+    return parsed.fillna(fallback)
+
+
+class EmployeeIndex:
+    """
+    Read-only indexes over one version of the employee master: row
+    positions per facet value, joining dates in sorted order, and a
+    lazily built sort order per column. Queries touch only the
+    matching positions and materialize only the requested page.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.size = len(df)
+
+        self.facets = {}
+        for column in FACET_COLUMNS:
+            if column in df.columns:
+                self.facets[column] = {
+                    str(value): np.asarray(positions)
+                    for value, positions in df.groupby(column, sort=True, observed=True).indices.items()
+                }
+
+        joined = _parse_joining_dates(df[DOJ_COLUMN]) if DOJ_COLUMN in df.columns else pd.Series(
+            pd.NaT, index=df.index
+        )
+        self.joined = joined.to_numpy(dtype="datetime64[ns]")
+        valid = np.flatnonzero(~np.isnat(self.joined))
+        self._joined_order = valid[np.argsort(self.joined[valid], kind="stable")]
+        self._joined_sorted = self.joined[self._joined_order]
+
+        self._orders = {}
+        self._orders_lock = threading.Lock()
+
+    def facet_values(self, column):
+        return list(self.facets.get(column, {}))
+
+    def _order(self, column):
+        """
+        (row positions sorted by `column`, blank-row mask), blanks last.
+        """
+
+        with self._orders_lock:
+            cached = self._orders.get(column)
+        if cached is not None:
+            return cached
+
+        if column == DOJ_COLUMN:
+            keys = pd.Series(self.joined)
+        else:
+            values = self.df[column].reset_index(drop=True)
+            keys = values.astype(str).str.lower().where(values.notna())
+        blank = keys.isna().to_numpy()
+        order = keys.sort_values(kind="stable", na_position="last").index.to_numpy()
+
+        with self._orders_lock:
+            self._orders[column] = (order, blank)
+        return order, blank
+
+    def _joined_between(self, start, end):
+        lo = 0 if start is None else np.searchsorted(
+            self._joined_sorted, np.datetime64(pd.Timestamp(start)), side="left"
+        )
+        hi = len(self._joined_sorted) if end is None else np.searchsorted(
+            self._joined_sorted, np.datetime64(pd.Timestamp(end)), side="right"
+        )
+        return np.sort(self._joined_order[lo:hi])
+
+    def query(self, filters=None, joined_from=None, joined_to=None,
+              sort_by=None, descending=False, page=0, page_size=25):
+        """
+        Returns (page DataFrame, total matches). `filters` maps facet
+        columns to a value or a list of values.
+        """
+
+        candidates = None
+
+        for column, wanted in (filters or {}).items():
+            if wanted in (None, "", []):
+                continue
+            postings = self.facets.get(column, {})
+            values = wanted if isinstance(wanted, (list, tuple)) else [wanted]
+            matched = [postings[str(v)] for v in values if str(v) in postings]
+            positions = np.unique(np.concatenate(matched)) if matched else np.empty(0, dtype=np.intp)
+            candidates = positions if candidates is None else np.intersect1d(
+                candidates, positions, assume_unique=True
+            )
+
+        if joined_from or joined_to:
+            positions = self._joined_between(joined_from, joined_to)
+            candidates = positions if candidates is None else np.intersect1d(
+                candidates, positions, assume_unique=True
+            )
+
+        total = self.size if candidates is None else len(candidates)
+
+        if sort_by and sort_by in self.df.columns:
+            order, blank = self._order(sort_by)
+            if candidates is not None:
+                mask = np.zeros(self.size, dtype=bool)
+                mask[candidates] = True
+                order = order[mask[order]]
+            if descending:
+                # Keep blanks last either way.
+                blank = blank[order]
+                order = np.concatenate([order[~blank][::-1], order[blank]])
+        else:
+            order = np.arange(self.size) if candidates is None else candidates
+
+        start = max(page, 0) * page_size
+        return self.df.iloc[order[start:start + page_size]], total
+
+
+def get_employee_index(path=None):
+    """
+    Index for the current version of the master, rebuilt only when the
+    cached DataFrame is replaced.
+    """
+
+    path = path or EMPLOYEE_FILE
+    df = load_employee_master(path)
+    if df is None:
+        return None
+
+    with _cache_lock:
+        cached = _indexes.get(path)
+        if cached and cached[0] is df:
+            return cached[1]
+
+    with metrics.stage("employee_index_build", rows=len(df)):
+        index = EmployeeIndex(df)
+
+    with _cache_lock:
+        _indexes[path] = (df, index)
+
+    return index
+
+
+def query_employees(filters=None, joined_from=None, joined_to=None,
+                    sort_by=None, descending=False, page=0, page_size=25, path=None):
+    index = get_employee_index(path)
+    if index is None:
+        return pd.DataFrame(), 0
+    return index.query(filters, joined_from, joined_to, sort_by, descending, page, page_size)
+
+
+# ==========================================
+# TYPE-AHEAD SEARCH INDEX
+# ==========================================
+
+SEARCH_LIMIT = 20
+GRAM = 3
+
+_TOKEN_SPLIT = re.compile(r"[^0-9a-z]+")
+
+
+def _clean(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value).strip()
+
+
+class EmployeeSearchIndex:
+    """
+    In-memory search over Employee ID, Name and Email.
+
+    Every word of the query must be a prefix of some token of the
+    employee (sorted token list + bisect). When prefixes find fewer than
+    `limit` employees, queries of three or more characters fall back to
+    substring matches through a trigram index, built on first use.
+    `add` keeps both structures current without a rebuild.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self._ids = {}
+        self._tokens = []
+        self._grams = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df):
+        index = cls()
+        columns = [df.get(c, pd.Series("", index=df.index)) for c in ("Employee ID", "Name", "Email")]
+        for employee_id, name, email in zip(*columns):
+            index._add(employee_id, name, email, sort=False)
+        index._tokens.sort()
+        return index
+
+    @staticmethod
+    def _tokenize(employee_id, name, email):
+        text = f"{employee_id} {name} {email}".lower()
+        tokens = {t for t in _TOKEN_SPLIT.split(text) if t}
+        # Whole values too, so "emp00" and "priya.verma@" match as typed.
+        tokens.update(v.lower() for v in (employee_id, email) if v)
+        return tokens
+
+    def _add(self, employee_id, name, email, sort=True):
+        employee_id, name, email = _clean(employee_id), _clean(name), _clean(email)
+        if not employee_id or employee_id in self._ids:
+            return
+
+        doc = len(self.entries)
+        self.entries.append((employee_id, name, email))
+        self._ids[employee_id] = doc
+
+        for token in self._tokenize(employee_id, name, email):
+            if sort:
+                bisect.insort(self._tokens, (token, doc))
+            else:
+                self._tokens.append((token, doc))
+
+        if self._grams is not None:
+            self._index_grams(doc)
+
+    def _text(self, doc):
+        return " ".join(self.entries[doc]).lower()
+
+    def _index_grams(self, doc):
+        text = self._text(doc)
+        for gram in {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}:
+            self._grams.setdefault(gram, []).append(doc)
+
+    def add(self, employee_id, name, email):
+        with self._lock:
+            self._add(employee_id, name, email)
+
+    def add_many(self, employees):
+        """
+        Adds (employee_id, name, email) tuples, re-sorting the token list
+        once instead of inserting into it per token.
+        """
+
+        with self._lock:
+            for employee_id, name, email in employees:
+                self._add(employee_id, name, email, sort=False)
+            self._tokens.sort()
+
+    def _prefix_docs(self, term):
+        start = bisect.bisect_left(self._tokens, (term,))
+        docs = set()
+        for token, doc in self._tokens[start:]:
+            if not token.startswith(term):
+                break
+            docs.add(doc)
+        return docs
+
+    def warm(self):
+        """
+        Builds the trigram index without holding the lock for the whole
+        build; employees added meanwhile are indexed before it goes live.
+        """
+
+        with self._lock:
+            if self._grams is not None:
+                return
+            count = len(self.entries)
+
+        grams = {}
+        for doc in range(count):
+            text = self._text(doc)
+            for gram in {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}:
+                grams.setdefault(gram, []).append(doc)
+
+        with self._lock:
+            if self._grams is not None:
+                return
+            self._grams = grams
+            for doc in range(count, len(self.entries)):
+                self._index_grams(doc)
+
+    def _substring_docs(self, query):
+        if self._grams is None:
+            self._grams = {}
+            for doc in range(len(self.entries)):
+                self._index_grams(doc)
+
+        grams = {query[i:i + GRAM] for i in range(len(query) - GRAM + 1)}
+        postings = sorted((self._grams.get(g, ()) for g in grams), key=len)
+        if not postings or not postings[0]:
+            return set()
+        docs = set(postings[0]).intersection(*postings[1:])
+        return {d for d in docs if query in self._text(d)}
+
+    def _rank(self, doc, query):
+        employee_id, name, _ = self.entries[doc]
+        employee_id, name = employee_id.lower(), name.lower()
+        if employee_id == query:
+            return (0, employee_id)
+        if employee_id.startswith(query):
+            return (1, employee_id)
+        if name.startswith(query):
+            return (2, name)
+        return (3, name)
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        query = _clean(query).lower()
+        if not query:
+            return []
+
+        terms = [t for t in query.split() if t]
+
+        with self._lock:
+            # Narrowest term first keeps the intersections small.
+            matches = sorted((self._prefix_docs(t) for t in terms), key=len)
+            docs = matches[0].intersection(*matches[1:])
+
+            if len(docs) < limit and len(query) >= GRAM:
+                docs |= self._substring_docs(query)
+
+            ranked = heapq.nsmallest(limit, docs, key=lambda d: self._rank(d, query))
+            return [
+                {"employee_id": e, "name": n, "email": m}
+                for e, n, m in (self.entries[d] for d in ranked)
+            ]
+
+    def get(self, employee_id):
+        with self._lock:
+            doc = self._ids.get(_clean(employee_id))
+            if doc is None:
+                return None
+            e, n, m = self.entries[doc]
+            return {"employee_id": e, "name": n, "email": m}
+
+
+def get_search_index(path=None):
+    """
+    Search index for the current master. Built once per workbook version;
+    employees added through `employee_added` are indexed in place.
+    """
+
+    path = path or EMPLOYEE_FILE
+    signature = master_signature(path)
+    if signature is None:
+        return None
+
+    with _cache_lock:
+        cached = _search_indexes.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+    df = load_employee_master(path)
+    if df is None:
+        return None
+
+    with metrics.stage("search_index_build", rows=len(df)):
+        index = EmployeeSearchIndex.from_frame(df)
+
+    with _cache_lock:
+        _search_indexes[path] = (signature, index)
+
+    threading.Thread(target=index.warm, daemon=True).start()
+    return index
+
+
+def employee_added(data, previous_signature, path=None):
+    """
+    Call after appending `data` to the master (while still holding the
+    master's file lock). If this process's search index was built from
+    the workbook as it was before the write, the new employee is added
+    to it and it is carried over to the new workbook version.
+    """
+
+    employees_added([data], previous_signature, path)
+
+
+def employees_added(records, previous_signature, path=None):
+    """
+    employee_added for several employees appended in one write.
+    """
+
+    path = path or EMPLOYEE_FILE
+
+    with _cache_lock:
+        cached = _search_indexes.get(path)
+        if not cached or cached[0] != previous_signature:
+            return
+        index = cached[1]
+
+    index.add_many(
+        (data.get("Employee ID"), data.get("Name"), data.get("Email")) for data in records
+    )
+
+    with _cache_lock:
+        _search_indexes[path] = (master_signature(path), index)
+
+
+def search_employees(query, limit=SEARCH_LIMIT, path=None):
+    index = get_search_index(path)
+    if index is None:
+        return []
+    return index.search(query, limit)
@@ -0,0 +1,62 @@
+import os
+import glob
+import shutil
+import tempfile
+import multiprocessing
+
+# ==========================================
+# SERVER
+# ==========================================
+
+bind = os.getenv("HRMS_BIND", "0.0.0.0:8080")
+
+# Slip and JD rendering is CPU bound, so one worker per core.
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.getenv("HRMS_THREADS", 4))
+
+# JD generation waits on the LLM; keep slow requests alive.
+timeout = int(os.getenv("HRMS_TIMEOUT", 120))
+graceful_timeout = 30
+
+accesslog = "-"
+
+
+# ==========================================
+# HOOKS
+# ==========================================
+
+# Set by on_starting when it had to create the directory itself.
+_created_metrics_dir = None
+
+
+def _metrics_files(metrics_dir):
+    # Only the per-worker dumps written by metrics.flush().
+    return glob.glob(os.path.join(metrics_dir, "metrics-*.json*"))
+
+
+def on_starting(server):
+    # One metrics directory per deployment, shared by all workers.
+    global _created_metrics_dir
+    metrics_dir = os.environ.get("HRMS_METRICS_DIR")
+    if not metrics_dir:
+        metrics_dir = tempfile.mkdtemp(prefix="hrms-metrics-")
+        os.environ["HRMS_METRICS_DIR"] = metrics_dir
+        _created_metrics_dir = metrics_dir
+    else:
+        # A user-supplied directory may hold other files; remove only
+        # dumps left over from an earlier run.
+        os.makedirs(metrics_dir, exist_ok=True)
+        for path in _metrics_files(metrics_dir):
+            os.remove(path)
+    server.log.info("Merging worker metrics in %s", metrics_dir)
+
+
+def on_exit(server):
+    # The fallback directory is ours alone; a configured one is left in
+    # place with its dumps removed.
+    metrics_dir = os.environ.get("HRMS_METRICS_DIR")
+    if _created_metrics_dir and metrics_dir == _created_metrics_dir:
+        shutil.rmtree(_created_metrics_dir, ignore_errors=True)
+    elif metrics_dir and os.path.isdir(metrics_dir):
+        for path in _metrics_files(metrics_dir):
+            os.remove(path)
@@ -1,24 +1,24 @@
 import os
+import re
 import json
-from datetime import datetime
+import time
+import sqlite3
+import logging
 from dotenv import load_dotenv
 from openai import OpenAI
 
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import inch
-from reportlab.lib import enums
 
-# ==========================================
-# STATIC COMPANY DETAILS (NON-MODIFIABLE)
-# ==========================================
-
-COMPANY_NAME = "SHEEP.AI ADVISORY LLP"
-COMPANY_TAGLINE = "Incorporated under LLP Act, 2008"
-LLPIN = "abc"
-PAN = "abc1"
-TAN = "abc2"
+import metrics
+import tracing
+import pdf_assets
+import jd_index
+import document_store
+import llm_usage
+import company
+from storage import new_document_id, atomic_path
 
 # ==========================================
 # CONFIG
@@ -27,8 +27,26 @@ TAN = "abc2"
 # Load .env file
 load_dotenv(override=True)
 
-# Initialize client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Created on first use, so rendering stored JDs (rerender.py) works
+# without an API key.
+client = None
+
+logger = logging.getLogger(__name__)
+
+JD_MODEL = os.getenv("HRMS_JD_MODEL", "gpt-4o-mini")
+
+# Caps the completion so a runaway answer cannot blow the budget.
+JD_MAX_TOKENS = 1500
+
+JD_KEYS = [
+    "job_summary",
+    "key_responsibilities",
+    "required_skills",
+    "preferred_skills",
+    "qualifications",
+    "compensation_note",
+    "compliance_note",
+]
 
 PDF_DIR = "static/generated_pdfs"
 LOGO_PATH = "static/logo.png"
@@ -40,16 +58,21 @@ os.makedirs(PDF_DIR, exist_ok=True)
 # OPENAI JD CONTENT GENERATOR
 # ==========================================
 
-def generate_jd_content(data: dict) -> dict:
+def generate_jd_content(data: dict, document_id: str = None) -> dict:
     """
     Uses OpenAI to generate structured Job Description content.
+    Every call is recorded in llm_usage against `document_id`. Malformed
+    JSON is repaired locally where possible, otherwise with one small
+    repair call instead of a full regeneration.
     """
 
+    llm_usage.check_budget()
+
     system_prompt = f"""
 You are an expert HR consultant drafting legally structured Job Descriptions for Indian companies.
 
-Company Name: {COMPANY_NAME}
-LLPIN: {LLPIN}
+Company Name: {company.COMPANY_NAME}
+LLPIN: {company.LLPIN}
 
 Return STRICT JSON only in the following structure:
 
@@ -81,21 +104,105 @@ Reports To: {data.get("reporting_to")}
 Company Overview: {data.get("company_overview")}
 """
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
+    with metrics.stage("llm_call"):
+        content, usage = _chat("jd", document_id, [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
-        ],
-        temperature=0.7
-    )
+        ], temperature=0.7)
+
+    jd_content, repaired = parse_jd_content(content)
+    if jd_content is not None:
+        usage(status="repaired" if repaired else "ok")
+        return jd_content
+
+    usage(status="invalid_json")
+
+    # Only the broken answer is sent back, not the full prompt.
+    llm_usage.check_budget()
+    with metrics.stage("llm_repair"):
+        content, usage = _chat("jd_repair", document_id, [
+            {"role": "system", "content": (
+                "Rewrite the user's text as one valid JSON object with exactly these keys: "
+                f"{', '.join(JD_KEYS)}. Keep the wording. Return JSON only."
+            )},
+            {"role": "user", "content": content}
+        ], temperature=0)
+
+    jd_content, _ = parse_jd_content(content)
+    usage(status="ok" if jd_content is not None else "invalid_json")
+    if jd_content is None:
+        raise Exception("OpenAI did not return valid JSON.")
+    return jd_content
+
+
+def _client():
+    global client
+    if client is None:
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return client
 
-    content = response.choices[0].message.content.strip()
 
+def _chat(purpose, document_id, messages, temperature):
+    """
+    One JSON-mode completion. Returns the text and a function that
+    records the call with its final status.
+    """
+
+    started = time.perf_counter()
     try:
-        return json.loads(content)
-    except:
-        raise Exception("OpenAI did not return valid JSON.")
+        response = _client().chat.completions.create(
+            model=JD_MODEL,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=JD_MAX_TOKENS,
+            response_format={"type": "json_object"},
+        )
+    except Exception as e:
+        llm_usage.record_call(purpose, JD_MODEL, 0, 0, time.perf_counter() - started, "error",
+                              document_id=document_id, error=str(e))
+        raise
+
+    latency = time.perf_counter() - started
+    usage = response.usage
+
+    def record(status):
+        llm_usage.record_call(
+            purpose, JD_MODEL,
+            usage.prompt_tokens if usage else 0,
+            usage.completion_tokens if usage else 0,
+            latency, status, document_id=document_id,
+        )
+
+    return (response.choices[0].message.content or "").strip(), record
+
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def parse_jd_content(text):
+    """
+    Returns (content, repaired). Fixes the usual slips locally (code
+    fences, text around the object, trailing commas); content is None
+    when that is not enough or a JD key is missing.
+    """
+
+    candidates = [text]
+    fixed = _FENCE.sub("", text.strip())
+    start, end = fixed.find("{"), fixed.rfind("}")
+    if start != -1 and end > start:
+        fixed = fixed[start:end + 1]
+    candidates.append(_TRAILING_COMMA.sub(r"\1", fixed))
+
+    for repaired, candidate in enumerate(candidates):
+        try:
+            content = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(content, dict) and all(key in content for key in JD_KEYS):
+            return content, bool(repaired)
+
+    return None, False
 
 
 # ==========================================
@@ -104,21 +211,49 @@ Company Overview: {data.get("company_overview")}
 
 def generate_jd_pdf(data: dict) -> str:
 
-    jd_content = generate_jd_content(data)
+    with tracing.span("jd_pdf", role=data.get("role")):
+        return _render_jd_pdf(data)
+
 
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    file_name = f"JD_{data.get('role','Role').replace(' ','_')}_{timestamp}.pdf"
+def _render_jd_pdf(data: dict) -> str:
+
+    document_id = new_document_id()
+    jd_content = generate_jd_content(data, document_id)
+
+    file_name = f"JD_{data.get('role','Role').replace(' ','_')}_{document_id}.pdf"
     file_path = os.path.join(PDF_DIR, file_name)
 
-    doc = SimpleDocTemplate(file_path, pagesize=A4)
+    write_jd_pdf(data, jd_content, file_path)
+
+    # The PDF is the deliverable; failed store or index writes must not
+    # fail it, and one failing must not skip the other.
+    try:
+        document_store.save_document("jd", document_id, file_name, data, jd_content)
+    except sqlite3.Error:
+        logger.warning("Document store update failed for JD %s", document_id, exc_info=True)
+
+    try:
+        jd_index.add_jd(document_id, data.get("role"), data.get("department"), file_name, jd_content)
+    except sqlite3.Error:
+        logger.warning("JD index update failed for %s", document_id, exc_info=True)
+
+    return file_path
+
+
+def write_jd_pdf(data: dict, jd_content: dict, file_path: str) -> str:
+    """
+    Draws a JD from its form input and generated content and atomically
+    writes (or replaces) `file_path`. No LLM call.
+    """
+
     elements = []
-    styles = getSampleStyleSheet()
+    styles, centered = pdf_assets.stylesheet()
 
     # ==================================
     # LOGO
     # ==================================
     if os.path.exists(LOGO_PATH):
-        img = Image(LOGO_PATH, width=1.2 * inch, height=1.2 * inch)
+        img = pdf_assets.logo(LOGO_PATH, width=1.2 * inch, height=1.2 * inch)
         elements.append(img)
 
     elements.append(Spacer(1, 10))
@@ -126,16 +261,11 @@ def generate_jd_pdf(data: dict) -> str:
     # ==================================
     # LETTERHEAD HEADER
     # ==================================
-    elements.append(Paragraph(f"<b>{COMPANY_NAME}</b>", styles['Title']))
+    elements.append(Paragraph(f"<b>{company.COMPANY_NAME}</b>", styles['Title']))
     elements.append(Spacer(1, 4))
-    elements.append(Paragraph(COMPANY_TAGLINE, styles['Normal']))
+    elements.append(Paragraph(company.COMPANY_TAGLINE, styles['Normal']))
     elements.append(Spacer(1, 4))
-    elements.append(
-        Paragraph(
-            f"LLPIN: {LLPIN} | PAN: {PAN} | TAN: {TAN}",
-            styles['Normal']
-        )
-    )
+    elements.append(Paragraph(company.registration_line(), styles['Normal']))
 
     elements.append(Spacer(1, 12))
     elements.append(HRFlowable(width="100%"))
@@ -144,12 +274,6 @@ def generate_jd_pdf(data: dict) -> str:
     # ==================================
     # TITLE
     # ==================================
-    centered = ParagraphStyle(
-        name='centered',
-        parent=styles['Heading1'],
-        alignment=enums.TA_CENTER
-    )
-
     elements.append(Paragraph(
         f"Job Description – {data.get('role')}",
         centered
@@ -214,7 +338,8 @@ def generate_jd_pdf(data: dict) -> str:
     elements.append(Spacer(1, 8))
     elements.append(Paragraph(jd_content["compliance_note"], styles['Normal']))
 
-    doc.build(elements)
-
+    with metrics.stage("pdf_build"), atomic_path(file_path) as tmp_path:
+        doc = SimpleDocTemplate(tmp_path, pagesize=A4, **pdf_assets.document_options())
+        doc.build(elements)
 
     return file_path
@@ -0,0 +1,265 @@
+"""
+Full-text index over generated job descriptions.
+
+The structured content returned by jd_generator.generate_jd_content is
+stored with each JD's document ID and indexed in SQLite FTS5, so JDs can
+be ranked by skill or keyword without opening the PDFs.
+
+    python jd_index.py search "spark kafka"
+    python jd_index.py rebuild     # re-index the stored content
+
+JDs generated before this index existed have no stored content and are
+not searchable.
+"""
+
+import os
+import re
+import sys
+import json
+import sqlite3
+import argparse
+from datetime import datetime
+from contextlib import closing
+
+import metrics
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+JD_INDEX_DB = "data/jd_index.sqlite"
+
+SEARCH_LIMIT = 20
+
+# (column, content key, bm25 weight); skills count for the most.
+FIELDS = [
+    ("role", None, 4.0),
+    ("department", None, 1.0),
+    ("summary", "job_summary", 1.0),
+    ("responsibilities", "key_responsibilities", 1.5),
+    ("required_skills", "required_skills", 5.0),
+    ("preferred_skills", "preferred_skills", 3.0),
+    ("qualifications", "qualifications", 2.0),
+]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS jds (
+    id INTEGER PRIMARY KEY,
+    document_id TEXT NOT NULL UNIQUE,
+    role TEXT NOT NULL,
+    department TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS jd_fts USING fts5(
+    {", ".join(column for column, _, _ in FIELDS)},
+    tokenize = 'porter unicode61'
+);
+"""
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+# Snippet highlight markers, split out again by the caller.
+MARK_START, MARK_END = "\x02", "\x03"
+
+
+# ==========================================
+# CONNECTION
+# ==========================================
+
+def _connect(path=None):
+    path = path or JD_INDEX_DB
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    con = sqlite3.connect(path, timeout=30, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(SCHEMA)
+    return con
+
+
+def _text(value):
+    if isinstance(value, (list, tuple)):
+        return "\n".join(str(v) for v in value)
+    return str(value or "")
+
+
+def _fts_values(role, department, content):
+    values = []
+    for column, key, _ in FIELDS:
+        if column == "role":
+            values.append(role)
+        elif column == "department":
+            values.append(department)
+        else:
+            values.append(_text(content.get(key)))
+    return values
+
+
+def _index(con, rowid, role, department, content):
+    con.execute("DELETE FROM jd_fts WHERE rowid = ?", (rowid,))
+    con.execute(
+        f"INSERT INTO jd_fts (rowid, {', '.join(c for c, _, _ in FIELDS)}) "
+        f"VALUES (?, {', '.join('?' for _ in FIELDS)})",
+        [rowid] + _fts_values(role, department, content),
+    )
+
+
+# ==========================================
+# WRITE
+# ==========================================
+
+def add_jd(document_id, role, department, file_name, content, path=None):
+    """
+    Stores and indexes one JD. Re-adding a document ID replaces it.
+    """
+
+    with closing(_connect(path)) as con:
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.execute(
+                "INSERT INTO jds (document_id, role, department, file_name, created_at, content) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (document_id) DO UPDATE SET role = excluded.role, "
+                "department = excluded.department, file_name = excluded.file_name, "
+                "content = excluded.content",
+                (document_id, role or "", department or "", file_name,
+                 datetime.now().isoformat(timespec="seconds"), json.dumps(content)),
+            )
+            rowid = con.execute(
+                "SELECT id FROM jds WHERE document_id = ?", (document_id,)
+            ).fetchone()[0]
+            _index(con, rowid, role or "", department or "", content)
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+
+
+def rebuild(path=None):
+    """
+    Re-indexes every stored JD. Returns the number indexed.
+    """
+
+    with closing(_connect(path)) as con:
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.execute("DELETE FROM jd_fts")
+            rows = con.execute("SELECT id, role, department, content FROM jds").fetchall()
+            for rowid, role, department, content in rows:
+                _index(con, rowid, role, department, json.loads(content))
+            con.execute("INSERT INTO jd_fts (jd_fts) VALUES ('optimize')")
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+
+    return len(rows)
+
+
+# ==========================================
+# SEARCH
+# ==========================================
+
+def match_query(text):
+    """
+    Free text -> FTS5 query: every word must match, as a prefix, so
+    "pyth spark" finds JDs mentioning both Python and Spark. Returns
+    None when there is nothing to search for.
+    """
+
+    terms = _TERM.findall((text or "").lower())
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_jds(text, limit=SEARCH_LIMIT, path=None):
+    """
+    JDs matching `text`, best first, with a highlighted snippet.
+    """
+
+    query = match_query(text)
+    path = path or JD_INDEX_DB
+    if query is None or not os.path.exists(path):
+        return []
+
+    weights = ", ".join(str(weight) for _, _, weight in FIELDS)
+
+    with metrics.stage("jd_search"), closing(_connect(path)) as con:
+        rows = con.execute(
+            f"SELECT jds.document_id, jds.role, jds.department, jds.file_name, jds.created_at, "
+            f"snippet(jd_fts, -1, ?, ?, '…', 16), bm25(jd_fts, {weights}) AS rank "
+            f"FROM jd_fts JOIN jds ON jds.id = jd_fts.rowid "
+            f"WHERE jd_fts MATCH ? ORDER BY rank LIMIT ?",
+            (MARK_START, MARK_END, query, limit),
+        ).fetchall()
+
+    return [
+        {
+            "document_id": document_id,
+            "role": role,
+            "department": department,
+            "file_name": file_name,
+            "created_at": created_at,
+            "snippet": snippet,
+            # bm25() is lower-is-better; flip it for callers.
+            "score": round(-rank, 4),
+        }
+        for document_id, role, department, file_name, created_at, snippet, rank in rows
+    ]
+
+
+def get_jd(document_id, path=None):
+    """
+    Stored row for one JD with its content parsed, or None.
+    """
+
+    path = path or JD_INDEX_DB
+    if not os.path.exists(path):
+        return None
+
+    with closing(_connect(path)) as con:
+        row = con.execute(
+            "SELECT document_id, role, department, file_name, created_at, content "
+            "FROM jds WHERE document_id = ?",
+            (document_id,),
+        ).fetchone()
+
+    if row is None:
+        return None
+
+    keys = ["document_id", "role", "department", "file_name", "created_at", "content"]
+    record = dict(zip(keys, row))
+    record["content"] = json.loads(record["content"])
+    return record
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Job description full-text index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    search = commands.add_parser("search")
+    search.add_argument("text")
+    search.add_argument("--limit", type=int, default=SEARCH_LIMIT)
+    commands.add_parser("rebuild")
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        print(f"Indexed {rebuild()} JDs")
+        return 0
+
+    for result in search_jds(args.text, args.limit):
+        snippet = result["snippet"].replace(MARK_START, "[").replace(MARK_END, "]")
+        print(f"{result['score']:8.3f}  {result['role']} ({result['file_name']})\n          {snippet}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
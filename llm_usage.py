@@ -0,0 +1,264 @@
+"""
+Token, latency and cost accounting for LLM calls, with a daily budget.
+
+Every call made for a JD is recorded in data/llm_usage.sqlite with its
+token counts, latency, estimated cost and outcome (ok, repaired,
+invalid_json, error), keyed by the JD's document ID so the cost of each
+JD can be summed over its calls, including any repair call.
+
+    python llm_usage.py report --days 7
+    python llm_usage.py documents
+
+HRMS_LLM_DAILY_TOKENS caps the tokens spent per calendar day (0, the
+default, means no cap). The check runs before each call against what
+has already been recorded, so calls already in flight in other workers
+can overshoot it by one call each.
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import logging
+import argparse
+from datetime import datetime, timedelta
+from contextlib import closing
+
+import metrics
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+LLM_USAGE_DB = "data/llm_usage.sqlite"
+
+DAILY_TOKEN_BUDGET = int(os.getenv("HRMS_LLM_DAILY_TOKENS", "0"))
+
+# USD per million (prompt, completion) tokens. HRMS_LLM_PRICES may hold
+# a JSON object of the same shape for other models or new prices.
+PRICES_PER_MILLION = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+PRICES_PER_MILLION.update(
+    {model: tuple(prices) for model, prices in json.loads(os.getenv("HRMS_LLM_PRICES", "{}")).items()}
+)
+
+STATUSES = ["ok", "repaired", "invalid_json", "error"]
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY,
+    called_at TEXT NOT NULL,
+    day TEXT NOT NULL,
+    purpose TEXT NOT NULL,
+    model TEXT NOT NULL,
+    document_id TEXT,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    latency_ms INTEGER NOT NULL,
+    cost REAL NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS calls_day ON calls (day);
+CREATE INDEX IF NOT EXISTS calls_document ON calls (document_id);
+"""
+
+
+class BudgetExceeded(Exception):
+    """The daily LLM token budget is used up."""
+
+
+# ==========================================
+# CONNECTION
+# ==========================================
+
+def _connect(path=None):
+    path = path or LLM_USAGE_DB
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    con = sqlite3.connect(path, timeout=30, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(SCHEMA)
+    return con
+
+
+def _today():
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+# ==========================================
+# RECORDING
+# ==========================================
+
+def call_cost(model, prompt_tokens, completion_tokens):
+    """
+    Estimated USD cost of one call; 0 for models without a price.
+    """
+
+    prompt_price, completion_price = PRICES_PER_MILLION.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def record_call(purpose, model, prompt_tokens, completion_tokens, latency, status,
+                document_id=None, error=None, path=None):
+    """
+    Records one call (`latency` in seconds) and returns its cost.
+    """
+
+    if status not in STATUSES:
+        raise ValueError(f"Unknown LLM call status {status!r}")
+
+    prompt_tokens = prompt_tokens or 0
+    completion_tokens = completion_tokens or 0
+    cost = call_cost(model, prompt_tokens, completion_tokens)
+
+    metrics.LLM_CALLS.inc(purpose=purpose, status=status)
+    metrics.LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    metrics.LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+
+    # Accounting must not fail the JD the call was made for, but a lost
+    # row means the daily budget under-counts, so it is logged.
+    try:
+        with closing(_connect(path)) as con:
+            con.execute(
+                "INSERT INTO calls (called_at, day, purpose, model, document_id, prompt_tokens, "
+                "completion_tokens, latency_ms, cost, status, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    datetime.now().isoformat(timespec="seconds"), _today(), purpose, model,
+                    document_id, prompt_tokens, completion_tokens, int(round(latency * 1000)),
+                    cost, status, error,
+                ),
+            )
+    except sqlite3.Error:
+        logger.warning(
+            "LLM usage update failed; %d tokens for %s are missing from the daily budget",
+            prompt_tokens + completion_tokens, purpose, exc_info=True,
+        )
+
+    return cost
+
+
+# ==========================================
+# BUDGET
+# ==========================================
+
+def tokens_today(path=None):
+    path = path or LLM_USAGE_DB
+    if not os.path.exists(path):
+        return 0
+
+    with closing(_connect(path)) as con:
+        row = con.execute(
+            "SELECT COALESCE(SUM(prompt_tokens + completion_tokens), 0) FROM calls WHERE day = ?",
+            (_today(),),
+        ).fetchone()
+    return row[0]
+
+
+def check_budget(path=None):
+    """
+    Raises BudgetExceeded when today's tokens have reached the budget.
+    """
+
+    if DAILY_TOKEN_BUDGET <= 0:
+        return
+
+    used = tokens_today(path)
+    if used >= DAILY_TOKEN_BUDGET:
+        raise BudgetExceeded(
+            f"Daily LLM token budget reached ({used:,} of {DAILY_TOKEN_BUDGET:,} tokens)."
+        )
+
+
+# ==========================================
+# REPORTS
+# ==========================================
+
+def daily_report(days=7, path=None):
+    """
+    Per day: calls, failures, tokens, cost and latency, newest first.
+    """
+
+    path = path or LLM_USAGE_DB
+    if not os.path.exists(path):
+        return []
+
+    since = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    with closing(_connect(path)) as con:
+        rows = con.execute(
+            "SELECT day, COUNT(*), "
+            "SUM(status IN ('invalid_json', 'error')), SUM(status = 'repaired'), "
+            "SUM(prompt_tokens), SUM(completion_tokens), SUM(cost), "
+            "AVG(latency_ms), MAX(latency_ms), COUNT(DISTINCT document_id) "
+            "FROM calls WHERE day >= ? GROUP BY day ORDER BY day DESC",
+            (since,),
+        ).fetchall()
+
+    keys = ["day", "calls", "failed", "repaired", "prompt_tokens", "completion_tokens",
+            "cost", "avg_latency_ms", "max_latency_ms", "documents"]
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def document_costs(limit=20, path=None):
+    """
+    Cost per JD over all of its calls, most recent first.
+    """
+
+    path = path or LLM_USAGE_DB
+    if not os.path.exists(path):
+        return []
+
+    with closing(_connect(path)) as con:
+        rows = con.execute(
+            "SELECT document_id, COUNT(*), SUM(prompt_tokens + completion_tokens), SUM(cost), "
+            "SUM(latency_ms), MAX(called_at) "
+            "FROM calls WHERE document_id IS NOT NULL "
+            "GROUP BY document_id ORDER BY MAX(called_at) DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+
+    keys = ["document_id", "calls", "tokens", "cost", "latency_ms", "last_call"]
+    return [dict(zip(keys, row)) for row in rows]
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LLM usage and spend")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report = commands.add_parser("report")
+    report.add_argument("--days", type=int, default=7)
+    documents = commands.add_parser("documents")
+    documents.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command == "report":
+        budget = f"{DAILY_TOKEN_BUDGET:,}" if DAILY_TOKEN_BUDGET > 0 else "none"
+        print(f"Tokens today: {tokens_today():,} (budget {budget})")
+        for day in daily_report(args.days):
+            print(
+                f"{day['day']}  {day['calls']:5d} calls  {day['failed']:3d} failed  "
+                f"{day['repaired']:3d} repaired  "
+                f"{day['prompt_tokens'] + day['completion_tokens']:>10,} tokens  "
+                f"${day['cost']:.4f}  avg {day['avg_latency_ms']:.0f} ms  max {day['max_latency_ms']} ms"
+            )
+        return 0
+
+    for row in document_costs(args.limit):
+        print(f"{row['document_id']}  {row['calls']} calls  {row['tokens']:>7,} tokens  "
+              f"${row['cost']:.5f}  {row['latency_ms']} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
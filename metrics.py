@@ -0,0 +1,386 @@
+import os
+import json
+import time
+import atexit
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+from flask import Response
+
+import tracing
+import profiling
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+METRICS_PATH = "/metrics"
+
+# Under several worker processes each one periodically dumps its samples
+# here and /metrics merges them, so a scrape sees the whole deployment.
+MULTIPROCESS_DIR = os.getenv("HRMS_METRICS_DIR")
+FLUSH_INTERVAL = 5.0
+
+# Seconds. Covers cached lookups through to slow LLM calls.
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+# ==========================================
+# METRIC TYPES
+# ==========================================
+
+class Counter:
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(label, "") for label in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return dict(self._values)
+
+    def dump(self):
+        return [[list(key), value] for key, value in self.samples().items()]
+
+    def merge(self, dumped):
+        with self._lock:
+            for key, value in dumped:
+                key = tuple(key)
+                self._values[key] = self._values.get(key, 0) + value
+
+    def empty_copy(self):
+        return Counter(self.name, self.help_text, self.label_names)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} counter",
+        ]
+        for key, value in sorted(self.samples().items()):
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(label, "") for label in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "buckets": [0] * len(self.buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def dump(self):
+        with self._lock:
+            return [
+                [list(key), list(s["buckets"]), s["sum"], s["count"]]
+                for key, s in self._series.items()
+            ]
+
+    def merge(self, dumped):
+        with self._lock:
+            for key, buckets, total, count in dumped:
+                key = tuple(key)
+                series = self._series.setdefault(key, {
+                    "buckets": [0] * len(self.buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                })
+                series["buckets"] = [a + b for a, b in zip(series["buckets"], buckets)]
+                series["sum"] += total
+                series["count"] += count
+
+    def empty_copy(self):
+        return Histogram(self.name, self.help_text, self.label_names, self.buckets)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series_items = sorted(
+                (key, dict(s, buckets=list(s["buckets"]))) for key, s in self._series.items()
+            )
+
+        bucket_labels = self.label_names + ("le",)
+        for key, series in series_items:
+            for bound, count in zip(self.buckets, series["buckets"]):
+                lines.append(
+                    f"{self.name}_bucket{_labels(bucket_labels, key + (_number(bound),))} {count}"
+                )
+            lines.append(f"{self.name}_bucket{_labels(bucket_labels, key + ('+Inf',))} {series['count']}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(series['sum'])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {series['count']}")
+        return lines
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# ==========================================
+# REGISTRY
+# ==========================================
+
+CALLBACK_DURATION = Histogram(
+    "hrms_callback_duration_seconds",
+    "Dash callback latency in seconds.",
+    ("callback",),
+)
+
+CALLBACK_TOTAL = Counter(
+    "hrms_callback_total",
+    "Dash callback invocations by outcome.",
+    ("callback", "status"),
+)
+
+STAGE_DURATION = Histogram(
+    "hrms_stage_duration_seconds",
+    "Latency of internal stages (Excel load, PDF build, LLM call, encode, send).",
+    ("stage",),
+)
+
+STAGE_ERRORS = Counter(
+    "hrms_stage_errors_total",
+    "Internal stages that raised an exception.",
+    ("stage",),
+)
+
+CACHE_REQUESTS = Counter(
+    "hrms_cache_requests_total",
+    "Cache lookups by result.",
+    ("cache", "result"),
+)
+
+LLM_CALLS = Counter(
+    "hrms_llm_calls_total",
+    "LLM calls by purpose and outcome.",
+    ("purpose", "status"),
+)
+
+LLM_TOKENS = Counter(
+    "hrms_llm_tokens_total",
+    "LLM tokens used, by model and prompt/completion.",
+    ("model", "kind"),
+)
+
+REGISTRY = [
+    CALLBACK_DURATION,
+    CALLBACK_TOTAL,
+    STAGE_DURATION,
+    STAGE_ERRORS,
+    CACHE_REQUESTS,
+    LLM_CALLS,
+    LLM_TOKENS,
+]
+
+
+# ==========================================
+# INSTRUMENTATION HELPERS
+# ==========================================
+
+def track_callback(name):
+    """
+    Decorator for Dash callbacks. Place it below @app.callback.
+    """
+
+    def decorator(func):
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            status = "ok"
+            try:
+                with tracing.span(f"callback.{name}"):
+                    return func(*args, **kwargs)
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                CALLBACK_DURATION.observe(time.perf_counter() - start, callback=name)
+                CALLBACK_TOTAL.inc(callback=name, status=status)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def stage(name, **attrs):
+    """
+    Times an internal stage, e.g. `with metrics.stage("pdf_build"):`.
+    Every stage is also recorded as a trace span and, when a batch is
+    being profiled, as a profiling stage.
+    """
+
+    start = time.perf_counter()
+    try:
+        with tracing.span(name, **attrs), profiling.stage(name):
+            yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, stage=name)
+
+
+def cache_hit(cache):
+    CACHE_REQUESTS.inc(cache=cache, result="hit")
+
+
+def cache_miss(cache):
+    CACHE_REQUESTS.inc(cache=cache, result="miss")
+
+
+# ==========================================
+# MULTI-PROCESS AGGREGATION
+# ==========================================
+
+_flusher = None
+
+
+def _dump_file():
+    return os.path.join(MULTIPROCESS_DIR, f"metrics-{os.getpid()}.json")
+
+
+def flush():
+    """
+    Writes this process's samples to MULTIPROCESS_DIR.
+    """
+
+    if not MULTIPROCESS_DIR:
+        return
+
+    os.makedirs(MULTIPROCESS_DIR, exist_ok=True)
+    payload = {metric.name: metric.dump() for metric in REGISTRY}
+    tmp_path = f"{_dump_file()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, _dump_file())
+
+
+def _flush_forever():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush()
+        except OSError:
+            pass
+
+
+def _start_flusher():
+    global _flusher
+    if not MULTIPROCESS_DIR or _flusher is not None:
+        return
+    _flusher = threading.Thread(target=_flush_forever, name="metrics-flush", daemon=True)
+    _flusher.start()
+    atexit.register(flush)
+
+
+def _merged_registry():
+    """
+    Sums the dumps of every worker (including exited ones, so counters
+    never go backwards) into fresh metric objects.
+    """
+
+    flush()
+
+    merged = [metric.empty_copy() for metric in REGISTRY]
+    by_name = {metric.name: metric for metric in merged}
+
+    for file_name in os.listdir(MULTIPROCESS_DIR):
+        if not (file_name.startswith("metrics-") and file_name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(MULTIPROCESS_DIR, file_name)) as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, dumped in payload.items():
+            if name in by_name:
+                by_name[name].merge(dumped)
+
+    return merged
+
+
+# ==========================================
+# EXPOSITION
+# ==========================================
+
+def render_metrics():
+    registry = _merged_registry() if MULTIPROCESS_DIR else REGISTRY
+    cache_requests = next(m for m in registry if m.name == CACHE_REQUESTS.name)
+
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+
+    # Derived hit ratio so dashboards do not need to compute it.
+    totals = {}
+    for (cache, result), value in cache_requests.samples().items():
+        hits, requests = totals.get(cache, (0, 0))
+        totals[cache] = (hits + (value if result == "hit" else 0), requests + value)
+
+    lines.append("# HELP hrms_cache_hit_ratio Fraction of cache lookups served from cache.")
+    lines.append("# TYPE hrms_cache_hit_ratio gauge")
+    for cache, (hits, requests) in sorted(totals.items()):
+        ratio = hits / requests if requests else 0.0
+        lines.append(f"hrms_cache_hit_ratio{_labels(('cache',), (cache,))} {_number(ratio)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def init_app(server):
+    """
+    Registers the /metrics endpoint on the Flask server.
+    """
+
+    _start_flusher()
+
+    @server.route(METRICS_PATH)
+    def metrics_endpoint():
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+    return server
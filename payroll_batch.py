@@ -0,0 +1,378 @@
+"""
+Batch payroll: builds a salary slip for every row of a salary sheet
+(the data/Salary_Template.xlsx layout) and optionally emails them.
+
+    python payroll_batch.py data/Salary_Template.xlsx
+    python payroll_batch.py data/Salary_Template.xlsx --month "Jan 2026" --send
+    python payroll_batch.py data/Salary_Template.xlsx --bank-file
+    python payroll_batch.py --resume payroll-20260131093000-1a2b3c4d
+    python payroll_batch.py data/Salary_Template.xlsx --send --since payroll-20260131093000-1a2b3c4d
+
+Progress is checkpointed per employee, so a resumed run skips slips
+that were already built (and mailed) and retries only the rest.
+
+With --since, a re-run compares each employee's inputs (sheet amounts
+and the master fields printed on the slip) with the earlier run and only
+re-renders and re-mails employees whose inputs changed; the others keep
+their earlier slip. --since cannot be combined with --bank-file: the
+earlier run's transfer file already paid everyone.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from datetime import datetime
+from contextlib import nullcontext
+
+import pandas as pd
+
+import metrics
+import tracing
+import payroll_ledger
+import statutory
+from bank_file import write_bank_file, DEBIT_ACCOUNT
+from payroll_checkpoint import Checkpoint, load_states, reached
+from profiling import StageProfiler
+from employee_store import employee_details_by_id
+from email_service import get_employee_email, send_salary_email
+from salary_slip_engine import generate_salary_slip, calculate_salary_components, DEDUCTION_MODE
+from storage import stable_document_id
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+SALARY_SHEET = "data/Salary_Template.xlsx"
+RUNS_DIR = "data/payroll_runs"
+
+SHEET_COLUMNS = {
+    "Employee ID": "employee_id",
+    "Month (e.g., Jan 2026)": "month",
+    "Basic Salary": "basic",
+    "HRA": "hra",
+    "Allowance": "allowance",
+    "Bonus": "bonus",
+    "Provident Fund": "pf",
+    "TDS": "tds",
+    "Professional Tax": "pt",
+    # Optional, used by statutory deductions.
+    "State": "state",
+    "Tax Regime": "tax_regime",
+}
+
+AMOUNT_FIELDS = ["basic", "hra", "allowance", "bonus", "pf", "tds", "pt"]
+OPTIONAL_FIELDS = ["state", "tax_regime"]
+
+
+# ==========================================
+# INPUT
+# ==========================================
+
+def _amount(value, blank=0):
+    if value is None or pd.isna(value):
+        return blank
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def load_salary_sheet(path=SALARY_SHEET, month=None):
+    """
+    Reads the salary sheet and returns one salary input dict per row.
+    Blank PF/TDS/PT cells are None, so statutory mode can fill them.
+    """
+
+    with metrics.stage("excel_load", path=path):
+        sheet = pd.read_excel(path)
+
+    sheet = sheet.rename(columns=SHEET_COLUMNS)
+
+    rows = []
+    for record in sheet.to_dict("records"):
+        employee_id = record.get("employee_id")
+        if employee_id is None or pd.isna(employee_id):
+            continue
+
+        data = {"employee_id": str(employee_id).strip()}
+        for field in AMOUNT_FIELDS:
+            blank = None if field in statutory.DEDUCTION_FIELDS else 0
+            data[field] = _amount(record.get(field), blank)
+        for field in OPTIONAL_FIELDS:
+            value = record.get(field)
+            if value is not None and not pd.isna(value):
+                data[field] = str(value).strip()
+
+        data["month"] = month or str(record.get("month") or "").strip()
+        rows.append(data)
+
+    return rows
+
+
+def input_fingerprint(data):
+    """
+    Hash of everything a slip is built from: the sheet row plus the
+    name and master details merged into it. Call before computing.
+    """
+
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _recorded_documents(*run_ids):
+    recorded = set()
+    for run_id in run_ids:
+        df = payroll_ledger.read_ledger(["document_id"], latest=False, run_id=run_id)
+        recorded.update(df["document_id"].dropna())
+    return recorded
+
+
+# ==========================================
+# RUN
+# ==========================================
+
+def run_payroll(sheet_path=SALARY_SHEET, month=None, send=False, run_id=None, profile=False,
+                bank_file=False, resume=False, since=None):
+    """
+    Generates (and optionally emails) slips for every sheet row.
+    Returns the run summary, which is also written to RUNS_DIR/<run_id>/.
+    With profile=True a per-stage memory/CPU report is written alongside it;
+    with bank_file=True so is the NEFT/RTGS transfer file for the run.
+    With resume=True the checkpointed run `run_id` is continued with its
+    original sheet, month and send settings. With since=<earlier run ID>
+    only employees whose inputs changed since that run are rendered and
+    mailed again.
+    """
+
+    if bank_file and not DEBIT_ACCOUNT:
+        raise ValueError("No debit account for the bank file: set HRMS_DEBIT_ACCOUNT.")
+
+    # Unchanged employees keep their earlier slip and were paid by the
+    # earlier run's file, so this run's file would pay the others twice.
+    incremental_bank_file = "A bank file cannot be written for an incremental (--since) run."
+    if bank_file and since:
+        raise ValueError(incremental_bank_file)
+
+    if resume:
+        if not run_id:
+            raise ValueError("A run ID is required to resume.")
+        run_dir = os.path.join(RUNS_DIR, run_id)
+        if not Checkpoint.exists(run_dir):
+            raise FileNotFoundError(f"No checkpoint for run {run_id}")
+        checkpoint = Checkpoint(run_dir)
+        options = checkpoint.meta()
+        sheet_path, month, send = options["sheet"], options["month"], options["send"]
+        since = options.get("since")
+        if bank_file and since:
+            checkpoint.close()
+            raise ValueError(incremental_bank_file)
+    else:
+        run_id = run_id or tracing.new_run_id("payroll")
+        run_dir = os.path.join(RUNS_DIR, run_id)
+        checkpoint = Checkpoint(run_dir)
+        checkpoint.set_meta(
+            sheet=sheet_path,
+            month=month,
+            send=send,
+            since=since,
+            stamp=datetime.now().strftime("%Y%m%d%H%M%S"),
+        )
+
+    profiler = StageProfiler() if profile else None
+
+    try:
+        with profiler.activate() if profiler else nullcontext():
+            summary = _run(sheet_path, month, send, run_id, checkpoint, resume, since)
+    finally:
+        checkpoint.close()
+
+    if profiler:
+        summary["profile_report"] = profiler.write_report(run_dir)
+
+    if bank_file:
+        summary["bank_file"] = write_bank_file(
+            os.path.join(run_dir, "bank_transfer.csv"), run_id=run_id
+        )
+
+    with open(os.path.join(run_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2, default=str)
+
+    return summary
+
+
+def _run(sheet_path, month, send, run_id, checkpoint, resume, since):
+    results = []
+    started = time.time()
+    stamp = checkpoint.meta()["stamp"]
+
+    with tracing.span("payroll_batch", run_id=run_id, sheet=sheet_path, send=send, resume=resume,
+                      since=since):
+        rows = load_salary_sheet(sheet_path, month)
+        master = employee_details_by_id()
+
+        if DEDUCTION_MODE == "statutory":
+            # The whole sheet in one pass rather than per employee. Rows it
+            # cannot compute fail on their own in _process_employee.
+            with metrics.stage("statutory_deductions", rows=len(rows)):
+                statutory.fill_deductions(rows)
+        previous = load_states(os.path.join(RUNS_DIR, since)) if since else {}
+
+        # Ledger rows buffered by an interrupted attempt never reached
+        # disk; employees it finished are re-recorded, not re-rendered.
+        recorded = None
+        if resume:
+            recorded = _recorded_documents(run_id, since) if since else _recorded_documents(run_id)
+
+        # One ledger file per month for the whole run.
+        with payroll_ledger.batch():
+            for data in rows:
+                document_id = stable_document_id(stamp, run_id, data["employee_id"])
+                results.append(_process_employee(
+                    data, master, send, checkpoint, document_id, recorded,
+                    previous.get(data["employee_id"]),
+                ))
+
+    summary = {
+        "run_id": run_id,
+        "sheet": sheet_path,
+        "month": month,
+        "send": send,
+        "resumed": resume,
+        "since": since,
+        "started_at": started,
+        "seconds": round(time.time() - started, 3),
+        "employees": len(results),
+        "skipped": sum(1 for r in results if r["status"] == "skipped"),
+        "unchanged": sum(1 for r in results if r["status"] == "unchanged"),
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+        "results": results,
+    }
+
+    return summary
+
+
+def _process_employee(data, master, send, checkpoint, document_id, recorded, previous=None):
+    employee_id = data["employee_id"]
+    result = {"employee_id": employee_id, "status": "ok"}
+    employee_start = time.perf_counter()
+
+    state = checkpoint.get(employee_id)
+    done = "mailed" if send else "rendered"
+    status = "skipped"
+
+    try:
+        with tracing.span("employee", employee_id=employee_id):
+            if employee_id not in master:
+                raise Exception("Employee not found in master.")
+
+            data["name"], details = master[employee_id]
+            data.update(details)
+            fingerprint = input_fingerprint(data)
+
+            # Inputs edited since this run's earlier attempt.
+            if state and state["fingerprint"] and state["fingerprint"] != fingerprint:
+                state = None
+
+            # Unchanged since the earlier run: carry its slip over.
+            if (not reached(state, "rendered") and previous
+                    and previous["fingerprint"] == fingerprint and reached(previous, "rendered")):
+                checkpoint.advance(
+                    employee_id, previous["stage"],
+                    **{k: previous[k] for k in ("document_id", "slip_path", "net", "emailed_to")},
+                    fingerprint=fingerprint,
+                )
+                state = checkpoint.get(employee_id)
+                status = "unchanged"
+
+            if state and state["document_id"]:
+                document_id = state["document_id"]
+
+            slip = state["slip_path"] if reached(state, "rendered") else None
+
+            if slip and os.path.exists(slip):
+                if recorded is not None and document_id not in recorded:
+                    payroll_ledger.record(calculate_salary_components(data), document_id=document_id)
+                if reached(state, done):
+                    result.update(status=status, slip=slip, net=state["net"])
+                    return result
+            else:
+                calculate_salary_components(data)
+                checkpoint.advance(
+                    employee_id, "computed",
+                    document_id=document_id, net=data["net"], fingerprint=fingerprint,
+                )
+
+                slip = generate_salary_slip(data, document_id=document_id)
+                checkpoint.advance(employee_id, "rendered", slip_path=slip)
+
+            result["slip"] = slip
+            result["net"] = data.get("net", state and state["net"])
+
+            if send:
+                recipient = get_employee_email(employee_id)
+                if not recipient:
+                    raise Exception("Employee email not found.")
+                send_salary_email(data["name"], recipient, data["month"], slip)
+                checkpoint.advance(employee_id, "mailed", emailed_to=recipient)
+                result["emailed_to"] = recipient
+
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+        checkpoint.fail(employee_id, str(e))
+
+    finally:
+        result["seconds"] = round(time.perf_counter() - employee_start, 4)
+
+    return result
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run batch payroll from a salary sheet")
+    parser.add_argument("sheet", nargs="?", default=SALARY_SHEET)
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="continue an interrupted run with its original settings")
+    parser.add_argument("--since", metavar="RUN_ID",
+                        help="only re-render and re-mail employees whose inputs changed since this run")
+    parser.add_argument("--month", help="override the month printed on every slip")
+    parser.add_argument("--send", action="store_true", help="email each slip to the employee")
+    parser.add_argument("--profile", action="store_true",
+                        help="record per-stage memory and CPU profiles next to the run summary")
+    parser.add_argument("--bank-file", action="store_true",
+                        help="write the NEFT/RTGS transfer file for the run")
+    args = parser.parse_args(argv)
+
+    if args.bank_file and args.since:
+        parser.error("--bank-file cannot be combined with --since: the earlier run's file "
+                     "already pays these employees")
+    if args.bank_file and not DEBIT_ACCOUNT:
+        parser.error("--bank-file needs HRMS_DEBIT_ACCOUNT to be set")
+
+    summary = run_payroll(args.sheet, month=args.month, send=args.send, profile=args.profile,
+                          bank_file=args.bank_file, run_id=args.resume, resume=bool(args.resume),
+                          since=args.since)
+
+    print(f"Run {summary['run_id']}: {summary['employees']} employees, "
+          f"{summary['skipped']} already done, {summary['unchanged']} unchanged, "
+          f"{summary['failed']} failed, {summary['seconds']}s")
+    if summary["failed"]:
+        print(f"Retry failures: python payroll_batch.py --resume {summary['run_id']}")
+    if tracing.TRACING_ENABLED:
+        print(f"Trace summary: python trace_viewer.py --run {summary['run_id']}")
+    if summary.get("profile_report"):
+        print(f"Profile report: {summary['profile_report']}")
+    if summary.get("bank_file"):
+        bank = summary["bank_file"]
+        print(f"Bank file: {bank['path']} ({bank['transfers']} transfers, total {bank['total']}, "
+              f"{bank['skipped']} skipped)")
+
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
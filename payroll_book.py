@@ -0,0 +1,178 @@
+"""
+Payroll book: every salary slip of a month in one PDF, with an outline
+entry per employee.
+
+Slips are rebuilt from the payroll ledger (the latest computation per
+employee) and the employee master, and fed to a single document build
+from a generator, so only a couple of slips' flowables exist at a time.
+
+    python payroll_book.py 2026-01
+    python payroll_book.py 2026-01 -o book.pdf
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime
+
+from reportlab.platypus import SimpleDocTemplate, PageBreak, Flowable
+from reportlab.lib.pagesizes import A4
+
+import metrics
+import tracing
+import payroll_ledger
+import pdf_assets
+from employee_store import employee_details_by_id
+from salary_slip_engine import PDF_DIR, calculate_salary_components, salary_slip_flowables
+from storage import new_document_id, atomic_path
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+# Refill the flowable queue when fewer than this many are left.
+# Comfortably more than one slip, so keepWithNext chains and split
+# remainders always have what follows them in the queue.
+QUEUE_LOW_WATER = 64
+
+BOOK_COLUMNS = ["document_id"] + payroll_ledger.AMOUNT_COLUMNS
+
+
+# ==========================================
+# FLOWABLES
+# ==========================================
+
+class Bookmark(Flowable):
+    """
+    Zero-size flowable that bookmarks the page it lands on and adds a
+    top-level outline entry for it.
+    """
+
+    def __init__(self, key, title):
+        super().__init__()
+        self.key = key
+        self.title = title
+        self.width = self.height = 0
+
+    def wrap(self, available_width, available_height):
+        return 0, 0
+
+    def draw(self):
+        self.canv.bookmarkPage(self.key)
+        self.canv.addOutlineEntry(self.title, self.key, level=0)
+
+
+class LazyFlowables(list):
+    """
+    A flowable list for doc.build() that refills itself from an iterator
+    of flowable chunks. build() checks len() before every flowable and
+    only edits the front of the list, so topping up in __len__ keeps the
+    queue short without changing how the document is laid out.
+    """
+
+    def __init__(self, chunks, low_water=QUEUE_LOW_WATER):
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._low_water = low_water
+
+    def __len__(self):
+        while self._chunks is not None and list.__len__(self) < self._low_water:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._chunks = None
+            else:
+                self.extend(chunk)
+        return list.__len__(self)
+
+
+def _rupees(paise):
+    paise = paise or 0
+    return paise // 100 if paise % 100 == 0 else paise / 100
+
+
+def _month_label(month):
+    return datetime.strptime(month, "%Y-%m").strftime("%b %Y")
+
+
+def iter_slip_data(month):
+    """
+    Yields slip inputs for every employee with a ledger entry in `month`,
+    in ledger order.
+    """
+
+    master = employee_details_by_id()
+    label = _month_label(month)
+
+    for rows in payroll_ledger.iter_latest(BOOK_COLUMNS, start=month, end=month):
+        for row in rows:
+            name, details = master.get(row["employee_id"], ("", {}))
+            data = {"employee_id": row["employee_id"], "name": name, "month": label}
+            data.update(details)
+            for column in payroll_ledger.AMOUNT_COLUMNS:
+                data[column] = _rupees(row[column])
+            yield calculate_salary_components(data)
+
+
+def _book_chunks(slips, counter):
+    for data in slips:
+        counter["slips"] += 1
+        key = f"slip-{counter['slips']}"
+        title = f"{data['employee_id']} - {data['name']}" if data["name"] else data["employee_id"]
+        # Break before rather than after, so the book does not end on a blank page.
+        page_break = [PageBreak()] if counter["slips"] > 1 else []
+        yield page_break + [Bookmark(key, title)] + salary_slip_flowables(data)
+
+
+def _show_outline(canvas, doc):
+    canvas.showOutline()
+
+
+# ==========================================
+# BUILD
+# ==========================================
+
+def generate_payroll_book(month, path=None):
+    """
+    Renders all slips for `month` into one PDF. Returns (path, slips).
+    """
+
+    month = payroll_ledger.normalize_month(month)
+    path = path or os.path.join(PDF_DIR, f"PayrollBook_{month}_{new_document_id()}.pdf")
+
+    counter = {"slips": 0}
+
+    with tracing.span("payroll_book", month=month):
+        with metrics.stage("pdf_build"), atomic_path(path) as tmp_path:
+            doc = SimpleDocTemplate(
+                tmp_path,
+                pagesize=A4,
+                title=f"Payroll Book {month}",
+                **pdf_assets.document_options(),
+            )
+            flowables = LazyFlowables(_book_chunks(iter_slip_data(month), counter))
+            if not len(flowables):
+                raise ValueError(f"No payroll recorded for {month}.")
+            doc.build(flowables, onFirstPage=_show_outline)
+
+        tracing.set_attribute("slips", counter["slips"])
+
+    return path, counter["slips"]
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a month's salary slips into one PDF")
+    parser.add_argument("month", help="pay month, e.g. 2026-01")
+    parser.add_argument("-o", "--output")
+    args = parser.parse_args(argv)
+
+    path, slips = generate_payroll_book(args.month, args.output)
+    print(f"{slips} slips -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
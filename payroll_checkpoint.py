@@ -0,0 +1,180 @@
+"""
+Durable per-employee progress for batch payroll runs.
+
+Each run keeps a small SQLite file next to its summary
+(data/payroll_runs/<run_id>/checkpoint.sqlite). Every stage an employee
+completes is committed before the next one starts, so a crashed run can
+be resumed without rebuilding or re-mailing finished slips. Each row
+also keeps a fingerprint of the inputs its slip was built from, which
+lets a later run tell which employees changed.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+CHECKPOINT_FILE = "checkpoint.sqlite"
+
+# In order. advance() sets the stage it is given, so passing an earlier
+# stage moves an employee back (payroll_batch does this when inputs
+# changed and the slip has to be rebuilt and re-mailed).
+STAGES = ("pending", "computed", "rendered", "mailed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS employees (
+    employee_id TEXT PRIMARY KEY,
+    stage TEXT NOT NULL,
+    document_id TEXT,
+    slip_path TEXT,
+    net REAL,
+    emailed_to TEXT,
+    fingerprint TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+"""
+
+_FIELDS = ("document_id", "slip_path", "net", "emailed_to", "fingerprint")
+
+
+class Checkpoint:
+    """
+        checkpoint = Checkpoint(run_dir)
+        checkpoint.advance("EMP001", "rendered", slip_path=path)
+        checkpoint.get("EMP001")["stage"]  # "rendered"
+    """
+
+    def __init__(self, run_dir):
+        os.makedirs(run_dir, exist_ok=True)
+        self.path = os.path.join(run_dir, CHECKPOINT_FILE)
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._con.row_factory = sqlite3.Row
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.executescript(SCHEMA)
+
+        # Checkpoints written before fingerprints were recorded.
+        columns = {row["name"] for row in self._con.execute("PRAGMA table_info(employees)")}
+        if "fingerprint" not in columns:
+            self._con.execute("ALTER TABLE employees ADD COLUMN fingerprint TEXT")
+
+    @staticmethod
+    def exists(run_dir):
+        return os.path.exists(os.path.join(run_dir, CHECKPOINT_FILE))
+
+    def close(self):
+        with self._lock:
+            self._con.close()
+
+    # ==========================================
+    # RUN METADATA
+    # ==========================================
+
+    def set_meta(self, **values):
+        with self._lock, self._con:
+            self._con.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in values.items()],
+            )
+
+    def meta(self):
+        with self._lock:
+            rows = self._con.execute("SELECT key, value FROM meta").fetchall()
+        return {row["key"]: json.loads(row["value"]) for row in rows}
+
+    # ==========================================
+    # EMPLOYEE PROGRESS
+    # ==========================================
+
+    def get(self, employee_id):
+        with self._lock:
+            row = self._con.execute(
+                "SELECT * FROM employees WHERE employee_id = ?", (employee_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def all(self):
+        with self._lock:
+            rows = self._con.execute("SELECT * FROM employees ORDER BY employee_id").fetchall()
+        return [dict(row) for row in rows]
+
+    def advance(self, employee_id, stage, **fields):
+        """
+        Records that `employee_id` completed `stage` and clears any
+        earlier error. Committed before returning. Fields not passed
+        keep their stored value. The stage is set as given, even if it
+        is earlier than the stored one.
+        """
+
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage {stage!r}")
+
+        values = {k: fields.get(k) for k in _FIELDS}
+        with self._lock, self._con:
+            self._con.execute(
+                f"""
+                INSERT INTO employees (employee_id, stage, {", ".join(_FIELDS)}, error, updated_at)
+                VALUES (?, ?, {", ".join("?" for _ in _FIELDS)}, NULL, ?)
+                ON CONFLICT (employee_id) DO UPDATE SET
+                    stage = excluded.stage,
+                    {", ".join(f"{k} = COALESCE(excluded.{k}, {k})" for k in _FIELDS)},
+                    error = NULL,
+                    updated_at = excluded.updated_at
+                """,
+                [employee_id, stage] + [values[k] for k in _FIELDS] + [datetime.now().isoformat()],
+            )
+
+    def fail(self, employee_id, error):
+        """
+        Records a failed attempt; the stage already reached is kept.
+        """
+
+        with self._lock, self._con:
+            self._con.execute(
+                """
+                INSERT INTO employees (employee_id, stage, error, attempts, updated_at)
+                VALUES (?, 'pending', ?, 1, ?)
+                ON CONFLICT (employee_id) DO UPDATE SET
+                    error = excluded.error,
+                    attempts = attempts + 1,
+                    updated_at = excluded.updated_at
+                """,
+                (employee_id, error, datetime.now().isoformat()),
+            )
+
+
+def load_states(run_dir):
+    """
+    {employee_id: checkpoint row} for a finished or interrupted run.
+    """
+
+    if not Checkpoint.exists(run_dir):
+        raise FileNotFoundError(f"No checkpoint in {run_dir}")
+
+    checkpoint = Checkpoint(run_dir)
+    try:
+        return {row["employee_id"]: row for row in checkpoint.all()}
+    finally:
+        checkpoint.close()
+
+
+def reached(state, stage):
+    """
+    True if a checkpoint row (or None) has completed `stage`.
+    """
+
+    if not state:
+        return False
+    return STAGES.index(state["stage"]) >= STAGES.index(stage)
@@ -0,0 +1,483 @@
+"""
+Columnar payroll ledger.
+
+Every salary computation that becomes a slip is appended to Parquet
+files partitioned by pay month (data/payroll_ledger/month=YYYY-MM/).
+Amounts are stored as int64 paise and repeated strings as dictionary
+columns. Re-generating a slip for the same employee and month supersedes
+the earlier computation in every aggregate.
+
+    python payroll_ledger.py ytd --fy 2025
+    python payroll_ledger.py departments --from 2025-04 --to 2026-03
+    python payroll_ledger.py statutory --from 2025-04 --to 2026-03
+    python payroll_ledger.py compact
+"""
+
+import os
+import sys
+import glob
+import uuid
+import sqlite3
+import logging
+import argparse
+import contextvars
+from datetime import datetime
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import metrics
+import tracing
+import payroll_rollups
+from storage import file_lock, atomic_path
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+LEDGER_DIR = "data/payroll_ledger"
+
+logger = logging.getLogger(__name__)
+
+# Buffered batch writes are flushed every this many rows.
+BATCH_FLUSH_ROWS = 5000
+
+# Rows per record batch when streaming the ledger.
+SCAN_BATCH_ROWS = 2048
+
+AMOUNT_COLUMNS = [
+    "basic", "hra", "allowance", "bonus", "gross",
+    "pf", "pt", "tds", "total_deductions", "net",
+]
+
+STATUTORY_COLUMNS = ["pf", "pt", "tds"]
+
+_dict_string = pa.dictionary(pa.int32(), pa.string())
+
+SCHEMA = pa.schema(
+    [
+        ("record_id", pa.string()),
+        ("recorded_at", pa.timestamp("ms")),
+        ("run_id", pa.string()),
+        ("document_id", pa.string()),
+        ("employee_id", _dict_string),
+        ("department", _dict_string),
+        ("designation", _dict_string),
+    ]
+    + [(column, pa.int64()) for column in AMOUNT_COLUMNS]
+)
+
+PARTITIONING = ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+
+MONTH_FORMATS = ["%Y-%m", "%b %Y", "%B %Y", "%m-%Y", "%m/%Y", "%b-%Y", "%B-%Y"]
+
+_batch = contextvars.ContextVar("hrms_ledger_batch", default=None)
+
+
+# ==========================================
+# HELPERS
+# ==========================================
+
+def normalize_month(value=None):
+    """
+    "Jan 2026", "January 2026", "2026-01" ... -> "2026-01".
+    Empty values fall back to the current month.
+    """
+
+    if value is None or (isinstance(value, float) and pd.isna(value)) or str(value).strip() == "":
+        return datetime.now().strftime("%Y-%m")
+
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m")
+
+    text = str(value).strip()
+    for fmt in MONTH_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m")
+        except ValueError:
+            continue
+
+    raise ValueError(f"Unrecognised pay month: {value!r}")
+
+
+def fiscal_year_months(fiscal_year):
+    """
+    Indian financial year: FY 2025 runs from 2025-04 to 2026-03.
+    """
+
+    return f"{fiscal_year}-04", f"{fiscal_year + 1}-03"
+
+
+def current_fiscal_year():
+    today = datetime.now()
+    return today.year if today.month >= 4 else today.year - 1
+
+
+def _paise(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return 0
+    return int(round(float(value) * 100))
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return str(value)
+
+
+# ==========================================
+# WRITING
+# ==========================================
+
+def ledger_row(data, document_id=None):
+    """
+    Converts a calculate_salary_components result into a ledger row.
+    """
+
+    row = {
+        "record_id": uuid.uuid4().hex,
+        "recorded_at": datetime.now(),
+        "run_id": tracing.current_run_id(),
+        "document_id": document_id,
+        "employee_id": _text(data.get("employee_id")),
+        "department": _text(data.get("department")),
+        "designation": _text(data.get("designation")),
+        "month": normalize_month(data.get("month")),
+    }
+    for column in AMOUNT_COLUMNS:
+        row[column] = _paise(data.get(column))
+    return row
+
+
+def _write_rows(rows):
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(row["month"], []).append(row)
+
+    paths = []
+    with metrics.stage("ledger_write", rows=len(rows)):
+        for month, month_rows in by_month.items():
+            table = pa.Table.from_pylist(
+                [{k: v for k, v in r.items() if k != "month"} for r in month_rows],
+                schema=SCHEMA,
+            )
+            directory = os.path.join(LEDGER_DIR, f"month={month}")
+            path = os.path.join(
+                directory,
+                f"part-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet",
+            )
+            with atomic_path(path) as tmp_path:
+                pq.write_table(table, tmp_path, compression="zstd")
+            paths.append(path)
+
+    # Rollups are derived data and can be rebuilt from the ledger, so a
+    # failure here must not fail the slip that was just recorded.
+    try:
+        payroll_rollups.apply(rows)
+    except sqlite3.Error:
+        logger.warning(
+            "Payroll rollup update failed; run `python payroll_rollups.py rebuild`", exc_info=True
+        )
+
+    return paths
+
+
+def record(data, document_id=None):
+    """
+    Appends one computation to the ledger. Inside `batch()` rows are
+    buffered and written together.
+    """
+
+    return record_row(ledger_row(data, document_id))
+
+
+def record_row(row):
+    """
+    Appends a row built by ledger_row(), for callers that validate it
+    before producing the document it belongs to.
+    """
+
+    buffer = _batch.get()
+    if buffer is not None:
+        buffer.append(row)
+        if len(buffer) >= BATCH_FLUSH_ROWS:
+            _write_rows(buffer)
+            buffer.clear()
+        return row
+
+    _write_rows([row])
+    return row
+
+
+@contextmanager
+def batch():
+    """
+    Buffers ledger writes so a payroll run produces one file per month
+    instead of one per employee.
+    """
+
+    if _batch.get() is not None:
+        yield
+        return
+
+    buffer = []
+    token = _batch.set(buffer)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+        if buffer:
+            _write_rows(buffer)
+
+
+def compact(month=None):
+    """
+    Merges each month's part files into one. Readers may briefly see
+    both the merged file and the parts; aggregates de-duplicate on
+    record_id so results do not change.
+    """
+
+    months = [month] if month else [
+        os.path.basename(p).split("=", 1)[1]
+        for p in glob.glob(os.path.join(LEDGER_DIR, "month=*"))
+    ]
+
+    compacted = 0
+    with file_lock(f"{LEDGER_DIR}.compact"):
+        for m in months:
+            directory = os.path.join(LEDGER_DIR, f"month={m}")
+            parts = sorted(glob.glob(os.path.join(directory, "*.parquet")))
+            if len(parts) < 2:
+                continue
+
+            table = pa.concat_tables([pq.read_table(p, schema=SCHEMA) for p in parts])
+            path = os.path.join(
+                directory,
+                f"compacted-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet",
+            )
+            with atomic_path(path) as tmp_path:
+                pq.write_table(table, tmp_path, compression="zstd")
+
+            for p in parts:
+                if p != path:
+                    os.remove(p)
+            compacted += 1
+
+    return compacted
+
+
+# ==========================================
+# READING
+# ==========================================
+
+def _dataset():
+    # Only committed parquet files; temp files from in-flight writes are
+    # dot-prefixed and never match.
+    files = glob.glob(os.path.join(LEDGER_DIR, "month=*", "*.parquet"))
+    if not files:
+        return None
+    return ds.dataset(
+        files,
+        format="parquet",
+        partitioning=PARTITIONING,
+        partition_base_dir=LEDGER_DIR,
+        schema=SCHEMA.append(pa.field("month", pa.string())),
+    )
+
+
+def _filter(start=None, end=None, employee_id=None, run_id=None):
+    expression = None
+    for condition in (
+        (ds.field("month") >= normalize_month(start)) if start else None,
+        (ds.field("month") <= normalize_month(end)) if end else None,
+        (ds.field("employee_id") == str(employee_id)) if employee_id else None,
+        (ds.field("run_id") == str(run_id)) if run_id else None,
+    ):
+        if condition is not None:
+            expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_ledger(columns=None, start=None, end=None, employee_id=None, latest=True, run_id=None):
+    """
+    Loads ledger rows as a DataFrame, reading only the requested columns
+    and month partitions. With latest=True only the most recent
+    computation per employee and month is kept. Amounts stay in paise.
+    """
+
+    dataset = _dataset()
+    wanted = ["month", "employee_id", "recorded_at", "record_id"] + list(columns or [])
+    wanted = list(dict.fromkeys(wanted))
+
+    if dataset is None:
+        return pd.DataFrame(columns=wanted)
+
+    expression = _filter(start, end, employee_id, run_id)
+
+    with metrics.stage("ledger_read"):
+        table = dataset.to_table(columns=wanted, filter=expression)
+
+    df = table.to_pandas()
+    df = df.drop_duplicates(subset="record_id")
+
+    if latest and not df.empty:
+        df = df.sort_values("recorded_at").drop_duplicates(["employee_id", "month"], keep="last")
+
+    return df
+
+
+def iter_latest(columns=None, start=None, end=None, run_id=None, batch_size=SCAN_BATCH_ROWS):
+    """
+    Streams the latest computation per employee and month as lists of
+    row dicts (amounts in paise), one record batch at a time. With
+    `run_id` only that payroll run's computations are considered.
+
+    A first pass reads only the key columns to pick the winning
+    record_ids; the second pass streams the requested columns for those
+    records. Memory grows with the number of keys, not with the width
+    of the rows, and rows arrive in file order.
+    """
+
+    dataset = _dataset()
+    if dataset is None:
+        return
+
+    expression = _filter(start, end, run_id=run_id)
+    wanted = list(dict.fromkeys(["month", "employee_id", "record_id"] + list(columns or [])))
+
+    with metrics.stage("ledger_read"):
+        keys = dataset.to_table(
+            columns=["month", "employee_id", "recorded_at", "record_id"], filter=expression
+        ).to_pandas()
+
+    if keys.empty:
+        return
+
+    keys = keys.sort_values("recorded_at").drop_duplicates(["employee_id", "month"], keep="last")
+    winners = pa.array(keys["record_id"].tolist(), type=pa.string())
+    del keys
+
+    selected = ds.field("record_id").isin(winners)
+    scanner = dataset.scanner(
+        columns=wanted,
+        filter=selected if expression is None else expression & selected,
+        batch_size=batch_size,
+    )
+
+    # Parts and their compacted copy can briefly coexist.
+    seen = set()
+    for record_batch in scanner.to_batches():
+        rows = [r for r in record_batch.to_pylist() if r["record_id"] not in seen]
+        seen.update(r["record_id"] for r in rows)
+        if rows:
+            yield rows
+
+
+def _rupees(df, columns):
+    for column in columns:
+        df[column] = df[column] / 100
+    return df
+
+
+# ==========================================
+# AGGREGATES
+# ==========================================
+
+def ytd_by_employee(fiscal_year=None, upto=None, employee_id=None):
+    """
+    Year-to-date totals per employee for an Indian financial year,
+    optionally only up to (and including) month `upto`.
+    """
+
+    fiscal_year = fiscal_year or current_fiscal_year()
+    start, end = fiscal_year_months(fiscal_year)
+    if upto:
+        end = min(end, normalize_month(upto))
+
+    columns = ["gross", "pf", "pt", "tds", "total_deductions", "net"]
+    df = read_ledger(columns, start=start, end=end, employee_id=employee_id)
+
+    result = (
+        df.groupby("employee_id", observed=True)
+        .agg(months=("month", "nunique"), **{c: (c, "sum") for c in columns})
+        .reset_index()
+    )
+    return _rupees(result, columns)
+
+
+def monthly_department_totals(start=None, end=None):
+    columns = ["gross", "total_deductions", "net"]
+    df = read_ledger(["department"] + columns, start=start, end=end)
+    df["department"] = df["department"].astype("object").fillna("Unassigned")
+
+    result = (
+        df.groupby(["month", "department"], observed=True)
+        .agg(headcount=("employee_id", "nunique"), **{c: (c, "sum") for c in columns})
+        .reset_index()
+        .sort_values(["month", "department"])
+    )
+    return _rupees(result, columns)
+
+
+def statutory_totals(start=None, end=None):
+    """
+    PF / professional tax / TDS totals per month for remittance.
+    """
+
+    df = read_ledger(STATUTORY_COLUMNS, start=start, end=end)
+
+    result = (
+        df.groupby("month", observed=True)
+        .agg(employees=("employee_id", "nunique"), **{c: (c, "sum") for c in STATUTORY_COLUMNS})
+        .reset_index()
+        .sort_values("month")
+    )
+    return _rupees(result, STATUTORY_COLUMNS)
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Payroll ledger aggregates")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ytd = sub.add_parser("ytd", help="year-to-date totals per employee")
+    ytd.add_argument("--fy", type=int, help="financial year start, e.g. 2025 for FY 2025-26")
+    ytd.add_argument("--upto", help="last month to include")
+    ytd.add_argument("--employee")
+
+    for name in ("departments", "statutory"):
+        p = sub.add_parser(name)
+        p.add_argument("--from", dest="start")
+        p.add_argument("--to", dest="end")
+
+    sub.add_parser("compact", help="merge part files per month")
+
+    parser.add_argument("--csv", help="write the result to this CSV file")
+    args = parser.parse_args(argv)
+
+    if args.command == "compact":
+        print(f"Compacted {compact()} month(s)")
+        return 0
+
+    if args.command == "ytd":
+        result = ytd_by_employee(args.fy, args.upto, args.employee)
+    elif args.command == "departments":
+        result = monthly_department_totals(args.start, args.end)
+    else:
+        result = statutory_totals(args.start, args.end)
+
+    if args.csv:
+        result.to_csv(args.csv, index=False)
+    else:
+        print(result.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+Monthly payroll register export.
+
+Rows are streamed from the payroll ledger one record batch at a time,
+so memory stays flat regardless of headcount.
+
+    python payroll_register.py 2026-01 --format csv -o register.csv
+    python payroll_register.py 2026-01 --format xlsx -o register.xlsx
+"""
+
+import io
+import os
+import csv
+import sys
+import tempfile
+import argparse
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+import metrics
+import payroll_ledger
+from employee_store import get_search_index
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+# (header, ledger column); amounts are converted from paise.
+REGISTER_COLUMNS = [
+    ("Month", "month"),
+    ("Employee ID", "employee_id"),
+    ("Name", None),
+    ("Department", "department"),
+    ("Designation", "designation"),
+    ("Basic", "basic"),
+    ("HRA", "hra"),
+    ("Allowance", "allowance"),
+    ("Bonus", "bonus"),
+    ("Gross", "gross"),
+    ("PF", "pf"),
+    ("Professional Tax", "pt"),
+    ("TDS", "tds"),
+    ("Total Deductions", "total_deductions"),
+    ("Net Pay", "net"),
+    ("Document ID", "document_id"),
+]
+
+HEADERS = [header for header, _ in REGISTER_COLUMNS]
+AMOUNT_COLUMNS = [c for _, c in REGISTER_COLUMNS if c in payroll_ledger.AMOUNT_COLUMNS]
+
+# CSV rows buffered per yielded chunk.
+CSV_CHUNK_ROWS = 500
+
+# File chunk size when streaming a finished workbook.
+FILE_CHUNK_BYTES = 64 * 1024
+
+AMOUNT_FORMAT = "#,##0.00"
+
+
+# ==========================================
+# ROWS
+# ==========================================
+
+def iter_register_rows(month):
+    """
+    Yields one list per employee in HEADERS order, amounts in rupees,
+    followed by a totals row.
+    """
+
+    month = payroll_ledger.normalize_month(month)
+    index = get_search_index()
+    totals = dict.fromkeys(AMOUNT_COLUMNS, 0)
+    count = 0
+
+    columns = [c for _, c in REGISTER_COLUMNS if c]
+    for rows in payroll_ledger.iter_latest(columns, start=month, end=month):
+        for row in rows:
+            employee = index.get(row["employee_id"]) if index else None
+            record = []
+            for _, column in REGISTER_COLUMNS:
+                if column is None:
+                    record.append(employee["name"] if employee else "")
+                elif column in totals:
+                    totals[column] += row[column] or 0
+                    record.append((row[column] or 0) / 100)
+                else:
+                    record.append(row[column] or "")
+            count += 1
+            yield record
+
+    yield [
+        "TOTAL" if column == "month" else
+        f"{count} employees" if column == "employee_id" else
+        totals[column] / 100 if column in totals else ""
+        for _, column in REGISTER_COLUMNS
+    ]
+
+
+# ==========================================
+# CSV
+# ==========================================
+
+def iter_register_csv(month):
+    """
+    Yields the register as UTF-8 CSV chunks.
+    """
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM so Excel opens the file as UTF-8.
+    buffer.write("\ufeff")
+    writer.writerow(HEADERS)
+
+    # No metrics.stage here: a span held open across yields would
+    # become the parent of whatever the consumer does in between.
+    for n, record in enumerate(iter_register_rows(month), start=1):
+        writer.writerow([f"{v:.2f}" if isinstance(v, float) else v for v in record])
+        if n % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+# ==========================================
+# EXCEL
+# ==========================================
+
+def write_register_xlsx(month, path):
+    """
+    Writes the register with a write-only workbook, which serializes
+    rows as they are appended instead of keeping cells in memory.
+    """
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=f"Register {payroll_ledger.normalize_month(month)}")
+    sheet.freeze_panes = "C2"
+
+    bold = Font(bold=True)
+
+    # Write-only rows are serialized on append, so one styled cell per
+    # amount column can be reused for every row; styling a fresh cell
+    # each time costs more than writing the value.
+    amount_cells = {}
+
+    def cells(record, font=None):
+        if font:
+            row = []
+            for value in record:
+                cell = WriteOnlyCell(sheet, value=value)
+                cell.font = font
+                if isinstance(value, float):
+                    cell.number_format = AMOUNT_FORMAT
+                row.append(cell)
+            return row
+
+        row = list(record)
+        for i, value in enumerate(record):
+            if isinstance(value, float):
+                cell = amount_cells.get(i)
+                if cell is None:
+                    cell = amount_cells[i] = WriteOnlyCell(sheet)
+                    cell.number_format = AMOUNT_FORMAT
+                cell.value = value
+                row[i] = cell
+        return row
+
+    with metrics.stage("register_export", format="xlsx", month=month):
+        sheet.append(cells(HEADERS, bold))
+
+        pending = None
+        for record in iter_register_rows(month):
+            if pending is not None:
+                sheet.append(cells(pending))
+            pending = record
+        sheet.append(cells(pending, bold))
+
+        workbook.save(path)
+
+    return path
+
+
+def iter_register_xlsx(month):
+    """
+    Builds the workbook in a temporary file and yields it in chunks.
+    """
+
+    fd, path = tempfile.mkstemp(prefix="register-", suffix=".xlsx")
+    os.close(fd)
+    try:
+        write_register_xlsx(month, path)
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(FILE_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+EXPORTS = {
+    "csv": (iter_register_csv, "text/csv"),
+    "xlsx": (iter_register_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the monthly payroll register")
+    parser.add_argument("month", help="pay month, e.g. 2026-01")
+    parser.add_argument("--format", choices=sorted(EXPORTS), default="csv")
+    parser.add_argument("-o", "--output", help="defaults to Payroll_Register_<month>.<format>")
+    args = parser.parse_args(argv)
+
+    month = payroll_ledger.normalize_month(args.month)
+    output = args.output or f"Payroll_Register_{month}.{args.format}"
+
+    if args.format == "xlsx":
+        write_register_xlsx(month, output)
+    else:
+        with open(output, "wb") as f:
+            for chunk in iter_register_csv(month):
+                f.write(chunk)
+
+    print(f"Register written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+Materialized payroll rollups for the analytics page.
+
+Ledger writes are folded into small SQLite tables as they happen, so
+the analytics page reads months x departments rows instead of
+rescanning payroll history.
+
+    python payroll_rollups.py rebuild     # recompute from the ledger
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+from contextlib import closing
+
+import metrics
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+ROLLUP_DB = "data/payroll_rollups.sqlite"
+
+AMOUNTS = ["gross", "pf", "pt", "tds", "total_deductions", "net"]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS contributions (
+    month TEXT NOT NULL,
+    employee_id TEXT NOT NULL,
+    department TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    {", ".join(f"{a} INTEGER NOT NULL" for a in AMOUNTS)},
+    PRIMARY KEY (month, employee_id)
+);
+
+CREATE TABLE IF NOT EXISTS month_department (
+    month TEXT NOT NULL,
+    department TEXT NOT NULL,
+    headcount INTEGER NOT NULL,
+    {", ".join(f"{a} INTEGER NOT NULL" for a in AMOUNTS)},
+    PRIMARY KEY (month, department)
+);
+"""
+
+UNASSIGNED = "Unassigned"
+
+
+# ==========================================
+# CONNECTION
+# ==========================================
+
+def _connect(path=None):
+    path = path or ROLLUP_DB
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Autocommit; apply() manages its own transaction.
+    con = sqlite3.connect(path, timeout=30, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(SCHEMA)
+    return con
+
+
+# ==========================================
+# INCREMENTAL UPDATE
+# ==========================================
+
+def _bucket_delta(con, month, department, sign, amounts):
+    assignments = ", ".join(f"{a} = {a} + ?" for a in AMOUNTS)
+    con.execute(
+        f"INSERT INTO month_department (month, department, headcount, {', '.join(AMOUNTS)}) "
+        f"VALUES (?, ?, 0, {', '.join('0' for _ in AMOUNTS)}) "
+        f"ON CONFLICT (month, department) DO NOTHING",
+        (month, department),
+    )
+    con.execute(
+        f"UPDATE month_department SET headcount = headcount + ?, {assignments} "
+        f"WHERE month = ? AND department = ?",
+        [sign] + [sign * amounts[a] for a in AMOUNTS] + [month, department],
+    )
+    con.execute(
+        "DELETE FROM month_department WHERE month = ? AND department = ? AND headcount <= 0",
+        (month, department),
+    )
+
+
+def _apply_rows(con, rows):
+    applied = 0
+    for row in rows:
+        month = row["month"]
+        employee_id = row["employee_id"]
+        department = row.get("department") or UNASSIGNED
+        recorded_at = row["recorded_at"].isoformat()
+
+        previous = con.execute(
+            f"SELECT department, recorded_at, {', '.join(AMOUNTS)} "
+            f"FROM contributions WHERE month = ? AND employee_id = ?",
+            (month, employee_id),
+        ).fetchone()
+
+        if previous is not None:
+            if previous[1] > recorded_at:
+                continue
+            _bucket_delta(con, month, previous[0], -1, dict(zip(AMOUNTS, previous[2:])))
+
+        amounts = {a: int(row.get(a) or 0) for a in AMOUNTS}
+        _bucket_delta(con, month, department, 1, amounts)
+
+        con.execute(
+            f"INSERT OR REPLACE INTO contributions "
+            f"(month, employee_id, department, recorded_at, {', '.join(AMOUNTS)}) "
+            f"VALUES (?, ?, ?, ?, {', '.join('?' for _ in AMOUNTS)})",
+            [month, employee_id, department, recorded_at] + [amounts[a] for a in AMOUNTS],
+        )
+        applied += 1
+
+    return applied
+
+
+def apply(rows, path=None):
+    """
+    Folds ledger rows (see payroll_ledger.ledger_row) into the rollups.
+    A newer row for the same employee and month replaces that
+    employee's earlier contribution; older rows arriving late are ignored.
+    """
+
+    if not rows:
+        return 0
+
+    with metrics.stage("rollup_update", rows=len(rows)), closing(_connect(path)) as con:
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            applied = _apply_rows(con, rows)
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+    return applied
+
+
+def rebuild(path=None):
+    """
+    Recomputes every rollup from the ledger. Only needed after restoring
+    or hand-editing ledger files. The old rollups stay visible until the
+    new ones are committed.
+    """
+
+    import payroll_ledger
+
+    df = payroll_ledger.read_ledger(["department", "recorded_at"] + AMOUNTS, latest=False)
+
+    rows = df.sort_values("recorded_at").to_dict("records")
+    for row in rows:
+        row["department"] = row["department"] if isinstance(row["department"], str) else None
+        row["recorded_at"] = row["recorded_at"].to_pydatetime()
+
+    path = path or ROLLUP_DB
+    with metrics.stage("rollup_rebuild", rows=len(rows)), closing(_connect(path)) as con:
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.execute("DELETE FROM contributions")
+            con.execute("DELETE FROM month_department")
+            applied = _apply_rows(con, rows)
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+
+    return applied
+
+
+# ==========================================
+# QUERIES
+# ==========================================
+
+def month_department_totals(months=24, path=None):
+    """
+    Rollup rows for the most recent `months` pay months, amounts in rupees.
+    """
+
+    path = path or ROLLUP_DB
+    if not os.path.exists(path):
+        return []
+
+    with metrics.stage("rollup_read"), closing(_connect(path)) as con:
+        cursor = con.execute(
+            f"SELECT month, department, headcount, {', '.join(AMOUNTS)} "
+            f"FROM month_department "
+            f"WHERE month IN (SELECT DISTINCT month FROM month_department ORDER BY month DESC LIMIT ?) "
+            f"ORDER BY month, department",
+            (months,),
+        )
+        columns = [c[0] for c in cursor.description]
+        rows = [dict(zip(columns, r)) for r in cursor.fetchall()]
+
+    for row in rows:
+        for a in AMOUNTS:
+            row[a] = row[a] / 100
+    return rows
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Payroll rollups")
+    parser.add_argument("command", choices=["rebuild"])
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        print(f"Applied {rebuild()} ledger rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
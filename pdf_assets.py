@@ -0,0 +1,160 @@
+"""
+Shared PDF output settings for the slip and JD generators.
+
+With HRMS_PDF_OPTIMIZE (on by default) documents embed a copy of the
+logo pre-scaled to its printed size, compress page streams, and store
+binary streams without ASCII85 armour. HRMS_PDF_FONT (and optionally
+HRMS_PDF_FONT_BOLD) point at TrueType files to use instead of
+Helvetica; reportlab embeds only the glyphs a document uses. A Unicode
+font also renders the rupee sign, which Helvetica lacks.
+"""
+
+import os
+from functools import lru_cache
+
+from PIL import Image as PILImage
+from reportlab import rl_config
+from reportlab.platypus import Image
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.lib.fonts import addMapping
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib import enums
+
+from storage import atomic_path
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+PDF_OPTIMIZE = os.getenv("HRMS_PDF_OPTIMIZE", "1") != "0"
+PDF_FONT = os.getenv("HRMS_PDF_FONT")
+PDF_FONT_BOLD = os.getenv("HRMS_PDF_FONT_BOLD")
+
+# Print resolution for the scaled logo.
+LOGO_DPI = 200
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "static", ".cache")
+
+FONT_NAME = "HRMSBody"
+FONT_NAME_BOLD = "HRMSBody-Bold"
+
+if PDF_OPTIMIZE:
+    # ASCII85 grows every image and font stream by a quarter and is
+    # encoded in pure Python; plain binary streams are valid PDF.
+    rl_config.useA85 = 0
+
+
+# ==========================================
+# DOCUMENT OPTIONS
+# ==========================================
+
+def document_options():
+    """
+    Extra keyword arguments for SimpleDocTemplate.
+    """
+
+    return {"pageCompression": 1} if PDF_OPTIMIZE else {}
+
+
+# ==========================================
+# LOGO
+# ==========================================
+
+@lru_cache(maxsize=None)
+def _scaled_logo(path, signature, width_px, height_px):
+    base, _ = os.path.splitext(os.path.basename(path))
+    cached = os.path.join(
+        CACHE_DIR, f"{base}_{width_px}x{height_px}_{signature[0]}_{signature[1]}.png"
+    )
+    if os.path.exists(cached):
+        return cached
+
+    with PILImage.open(path) as source:
+        image = source.copy()
+    image.thumbnail((width_px, height_px), PILImage.LANCZOS)
+
+    with atomic_path(cached) as tmp_path:
+        image.save(tmp_path, format="PNG", optimize=True)
+    return cached
+
+
+def logo(path, width, height):
+    """
+    Image flowable for the logo at `width` x `height` points. When
+    optimizing, the embedded bitmap is scaled to LOGO_DPI at that size
+    once and reused by every later document.
+    """
+
+    source = path
+    if PDF_OPTIMIZE:
+        stat = os.stat(path)
+        source = _scaled_logo(
+            path,
+            (stat.st_mtime_ns, stat.st_size),
+            max(1, round(width / inch * LOGO_DPI)),
+            max(1, round(height / inch * LOGO_DPI)),
+        )
+    return Image(source, width=width, height=height)
+
+
+# ==========================================
+# FONTS AND STYLES
+# ==========================================
+
+@lru_cache(maxsize=None)
+def _register_fonts():
+    if not PDF_FONT:
+        return None
+
+    pdfmetrics.registerFont(TTFont(FONT_NAME, PDF_FONT))
+    bold = FONT_NAME
+    if PDF_FONT_BOLD:
+        pdfmetrics.registerFont(TTFont(FONT_NAME_BOLD, PDF_FONT_BOLD))
+        bold = FONT_NAME_BOLD
+
+    # So <b> in paragraphs picks the bold face.
+    addMapping(FONT_NAME, 0, 0, FONT_NAME)
+    addMapping(FONT_NAME, 1, 0, bold)
+    addMapping(FONT_NAME, 0, 1, FONT_NAME)
+    addMapping(FONT_NAME, 1, 1, bold)
+    for bold_flag in (0, 1):
+        for italic_flag in (0, 1):
+            addMapping(bold, bold_flag, italic_flag, bold)
+    return FONT_NAME, bold
+
+
+def body_font():
+    """
+    Font for table cells, which do not take it from the stylesheet.
+    """
+
+    fonts = _register_fonts()
+    return fonts[0] if fonts else "Helvetica"
+
+
+@lru_cache(maxsize=None)
+def stylesheet():
+    """
+    (sample stylesheet, centered heading style), using the configured
+    TrueType font when there is one. Shared; do not modify.
+    """
+
+    styles = getSampleStyleSheet()
+
+    fonts = _register_fonts()
+    if fonts:
+        regular, bold = fonts
+        for style in styles.byName.values():
+            font = getattr(style, "fontName", "")
+            if font.startswith("Helvetica"):
+                style.fontName = bold if "Bold" in font else regular
+
+    centered = ParagraphStyle(
+        name='centered',
+        parent=styles['Heading1'],
+        alignment=enums.TA_CENTER
+    )
+    return styles, centered
@@ -0,0 +1,276 @@
+import io
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import tracemalloc
+import contextvars
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+TOP_FUNCTIONS = 15
+TOP_ALLOCATIONS = 10
+
+# Allocation snapshots are expensive, so only the first few
+# invocations of each stage are diffed.
+ALLOCATION_SAMPLES = 3
+
+_active = contextvars.ContextVar("hrms_profiler", default=None)
+
+
+def _max_rss_kb():
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux.
+    return usage // 1024 if sys.platform == "darwin" else usage
+
+
+# ==========================================
+# STAGE PROFILER
+# ==========================================
+
+class StageProfiler:
+    """
+    Opt-in per-stage profiler for batch runs: tracemalloc peak and
+    top allocation sites plus cProfile hot functions for each stage.
+
+        profiler = StageProfiler()
+        with profiler.activate():
+            run_batch()
+        profiler.write_report(run_dir)
+    """
+
+    def __init__(self, top_functions=TOP_FUNCTIONS, top_allocations=TOP_ALLOCATIONS):
+        self.top_functions = top_functions
+        self.top_allocations = top_allocations
+        self.stages = {}
+        self._stack = []
+        self._started = None
+        self._elapsed = None
+        self._owns_tracemalloc = False
+
+    def _stats(self, name):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = {
+                "calls": 0,
+                "seconds": 0.0,
+                "peak_bytes": 0,
+                "peak_delta_bytes": 0,
+                "max_rss_kb": None,
+                "profile": cProfile.Profile(),
+                "allocations": [],
+                "allocation_delta": 0,
+            }
+        return stats
+
+    @contextmanager
+    def activate(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+
+        self._started = time.perf_counter()
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+            self._elapsed = time.perf_counter() - self._started
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+
+    def _fold_peak(self):
+        """
+        Credits the current tracemalloc peak to every open stage before
+        it is reset for a nested stage.
+        """
+
+        peak = tracemalloc.get_traced_memory()[1]
+        for frame in self._stack:
+            frame["peak"] = max(frame["peak"], peak)
+
+    @contextmanager
+    def stage(self, name):
+        stats = self._stats(name)
+
+        self._fold_peak()
+        if self._stack:
+            self._stack[-1]["stats"]["profile"].disable()
+
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+        snapshot = None
+        if stats["calls"] < ALLOCATION_SAMPLES:
+            snapshot = tracemalloc.take_snapshot()
+
+        frame = {"stats": stats, "start_bytes": current, "peak": 0}
+        self._stack.append(frame)
+
+        start = time.perf_counter()
+        stats["profile"].enable()
+        try:
+            yield
+        finally:
+            stats["profile"].disable()
+            elapsed = time.perf_counter() - start
+
+            self._fold_peak()
+            self._stack.pop()
+
+            stats["calls"] += 1
+            stats["seconds"] += elapsed
+            stats["peak_bytes"] = max(stats["peak_bytes"], frame["peak"])
+            stats["peak_delta_bytes"] = max(
+                stats["peak_delta_bytes"], frame["peak"] - frame["start_bytes"]
+            )
+            stats["max_rss_kb"] = _max_rss_kb()
+
+            if snapshot is not None:
+                self._record_allocations(stats, snapshot)
+
+            if self._stack:
+                self._stack[-1]["stats"]["profile"].enable()
+
+    def _record_allocations(self, stats, before):
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        after = tracemalloc.take_snapshot().filter_traces(ignore)
+        diff = after.compare_to(before.filter_traces(ignore), "lineno")
+        diff = [d for d in diff if d.size_diff > 0]
+        total = sum(d.size_diff for d in diff)
+
+        # Keep the heaviest sampled invocation of the stage.
+        if total < stats["allocation_delta"]:
+            return
+
+        stats["allocation_delta"] = total
+        stats["allocations"] = [
+            {
+                "site": f"{d.traceback[0].filename}:{d.traceback[0].lineno}",
+                "size_bytes": d.size_diff,
+                "count": d.count_diff,
+            }
+            for d in sorted(diff, key=lambda d: d.size_diff, reverse=True)[:self.top_allocations]
+        ]
+
+    # ==========================================
+    # REPORT
+    # ==========================================
+
+    def _hot_functions(self, profile):
+        try:
+            stats = pstats.Stats(profile, stream=io.StringIO())
+        except TypeError:  # stage never ran with profiling enabled
+            return []
+        rows = []
+        for func, (cc, nc, tt, ct, _) in stats.stats.items():
+            filename, lineno, funcname = func
+            rows.append({
+                "function": f"{os.path.basename(filename)}:{lineno}({funcname})",
+                "calls": nc,
+                "tottime": round(tt, 6),
+                "cumtime": round(ct, 6),
+            })
+        rows.sort(key=lambda r: r["tottime"], reverse=True)
+        return rows[:self.top_functions]
+
+    def report(self):
+        stages = {}
+        for name, stats in self.stages.items():
+            stages[name] = {
+                "calls": stats["calls"],
+                "seconds": round(stats["seconds"], 6),
+                "peak_bytes": stats["peak_bytes"],
+                "peak_delta_bytes": stats["peak_delta_bytes"],
+                "max_rss_kb": stats["max_rss_kb"],
+                "top_allocations": stats["allocations"],
+                "hot_functions": self._hot_functions(stats["profile"]),
+            }
+
+        return {
+            "elapsed_seconds": round(self._elapsed or 0.0, 6),
+            "max_rss_kb": _max_rss_kb(),
+            "stages": stages,
+        }
+
+    def format_report(self, report=None):
+        report = report or self.report()
+        lines = [
+            f"Profile: {report['elapsed_seconds']:.2f}s elapsed, "
+            f"max RSS {report['max_rss_kb'] or '-'} KB",
+            "",
+            f"{'stage':<22} {'calls':>7} {'seconds':>10} {'peak MB':>9} {'delta MB':>9} {'RSS KB':>10}",
+            "-" * 72,
+        ]
+
+        ordered = sorted(report["stages"].items(), key=lambda kv: kv[1]["seconds"], reverse=True)
+        for name, stage in ordered:
+            lines.append(
+                f"{name:<22} {stage['calls']:>7} {stage['seconds']:>10.3f} "
+                f"{stage['peak_bytes'] / 2**20:>9.2f} {stage['peak_delta_bytes'] / 2**20:>9.2f} "
+                f"{stage['max_rss_kb'] or '-':>10}"
+            )
+
+        for name, stage in ordered:
+            lines.append("")
+            lines.append(f"== {name} ==")
+            lines.append("Hot functions (tottime):")
+            for row in stage["hot_functions"]:
+                lines.append(f"  {row['tottime']:>9.4f}s {row['cumtime']:>9.4f}s "
+                             f"{row['calls']:>8}  {row['function']}")
+            if stage["top_allocations"]:
+                lines.append("Top allocation sites:")
+                for row in stage["top_allocations"]:
+                    lines.append(f"  {row['size_bytes'] / 1024:>10.1f} KB {row['count']:>8}  {row['site']}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, directory, name="profile"):
+        """
+        Writes <name>.json and <name>.txt into `directory`.
+        Returns the text report path.
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        report = self.report()
+
+        with open(os.path.join(directory, f"{name}.json"), "w") as f:
+            json.dump(report, f, indent=2)
+
+        text_path = os.path.join(directory, f"{name}.txt")
+        with open(text_path, "w") as f:
+            f.write(self.format_report(report))
+
+        return text_path
+
+
+# ==========================================
+# MODULE HELPERS
+# ==========================================
+
+def active_profiler():
+    return _active.get()
+
+
+def stage(name):
+    """
+    Profiles `name` under the active profiler; a no-op otherwise.
+    """
+
+    profiler = _active.get()
+    if profiler is None:
+        return nullcontext()
+    return profiler.stage(name)
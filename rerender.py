@@ -0,0 +1,139 @@
+"""
+Bulk re-render of stored documents, e.g. after a letterhead change in
+company.py or a layout change in the slip or JD templates.
+
+Each document is drawn again from its stored inputs (document_store.py)
+into its original file, replaced atomically, on a pool of worker
+processes. Pay is not recomputed, the ledger is not touched and JDs do
+not call the LLM again.
+
+    python rerender.py --kind salary_slip --month 2026-01
+    python rerender.py --kind jd --workers 8
+    python rerender.py --document 20260131093000_1a2b3c4d
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import tracing
+import document_store
+import payroll_ledger
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+WORKERS = os.cpu_count() or 1
+
+# Documents handed to a worker at a time.
+CHUNK_SIZE = 16
+
+
+# ==========================================
+# WORKER
+# ==========================================
+
+def _rerender_one(document):
+    # Imported here so the parent process does not load the PDF stack
+    # just to hand out work. Rendering never creates an LLM client.
+    started = time.perf_counter()
+    result = {"document_id": document["document_id"], "kind": document["kind"], "status": "ok"}
+
+    try:
+        if document["kind"] == "salary_slip":
+            from salary_slip_engine import PDF_DIR, write_salary_slip_pdf
+            path = os.path.join(PDF_DIR, document["file_name"])
+            write_salary_slip_pdf(document["inputs"], path)
+        else:
+            from jd_generator import PDF_DIR, write_jd_pdf
+            path = os.path.join(PDF_DIR, document["file_name"])
+            write_jd_pdf(document["inputs"], document["content"], path)
+        result["path"] = path
+
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+# ==========================================
+# RE-RENDER
+# ==========================================
+
+def rerender(documents, workers=WORKERS):
+    """
+    Re-renders `documents` (document_store records) and returns a summary
+    with per-document results and throughput.
+    """
+
+    started = time.perf_counter()
+
+    with tracing.span("rerender", documents=len(documents), workers=workers):
+        if workers <= 1 or len(documents) <= 1:
+            results = [_rerender_one(document) for document in documents]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_rerender_one, documents, chunksize=CHUNK_SIZE))
+
+    done = [r["document_id"] for r in results if r["status"] == "ok"]
+    if done:
+        document_store.mark_rendered(done)
+
+    seconds = time.perf_counter() - started
+    return {
+        "documents": len(results),
+        "rendered": len(done),
+        "failed": len(results) - len(done),
+        "workers": workers,
+        "seconds": round(seconds, 3),
+        "per_second": round(len(results) / seconds, 1) if seconds else None,
+        "results": results,
+    }
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-render stored salary slips and JDs")
+    parser.add_argument("--kind", choices=document_store.KINDS)
+    parser.add_argument("--month", help="pay month of the slips, e.g. 2026-01 or 'Jan 2026'")
+    parser.add_argument("--employee", help="employee ID")
+    parser.add_argument("--document", action="append", dest="documents", metavar="DOCUMENT_ID",
+                        help="a document ID; repeat for several")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--dry-run", action="store_true", help="only count the selected documents")
+    args = parser.parse_args(argv)
+
+    documents = document_store.select_documents(
+        kind=args.kind,
+        month=payroll_ledger.normalize_month(args.month) if args.month else None,
+        employee_id=args.employee,
+        document_ids=args.documents,
+    )
+
+    if args.dry_run or not documents:
+        print(f"{len(documents)} documents selected")
+        return 0
+
+    summary = rerender(documents, workers=args.workers)
+
+    for result in summary["results"]:
+        if result["status"] == "failed":
+            print(f"{result['document_id']}: {result['error']}")
+    print(
+        f"Re-rendered {summary['rendered']} of {summary['documents']} documents in "
+        f"{summary['seconds']}s ({summary['per_second']}/s, {summary['workers']} workers)"
+    )
+
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
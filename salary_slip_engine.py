@@ -1,30 +1,28 @@
 import os
-from datetime import datetime
+import sqlite3
+import logging
 from reportlab.platypus import (
     SimpleDocTemplate,
     Paragraph,
     Spacer,
     Table,
     TableStyle,
-    Image,
     HRFlowable
 )
 from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.pagesizes import A4
-from reportlab.lib import enums
 from num2words import num2words
+import pyarrow as pa
 
-# ==========================================
-# STATIC COMPANY DETAILS (WILL NOT CHANGE)
-# ==========================================
-
-COMPANY_NAME = "SHEEP.AI ADVISORY LLP"
-COMPANY_TAGLINE = "Incorporated under LLP Act, 2008"
-LLPIN = "abc"
-PAN = "abc1"
-TAN = "abc2"
+import metrics
+import tracing
+import pdf_assets
+import statutory
+import company
+import document_store
+from storage import new_document_id, atomic_path
+import payroll_ledger
 
 # ==================================
 # CONFIGURATION
@@ -37,6 +35,12 @@ LOGO_PATH = os.path.join(STATIC_DIR, "logo.png")
 
 os.makedirs(PDF_DIR, exist_ok=True)
 
+# "manual": PF, TDS and PT are entered per employee (blank means 0).
+# "statutory": blank ones are computed by statutory.py.
+DEDUCTION_MODE = os.getenv("HRMS_DEDUCTION_MODE", "manual")
+
+logger = logging.getLogger(__name__)
+
 
 # ==================================
 # CALCULATION ENGINE
@@ -45,6 +49,8 @@ os.makedirs(PDF_DIR, exist_ok=True)
 def calculate_salary_components(data: dict) -> dict:
     """
     Startup mode: All deductions manual.
+    With DEDUCTION_MODE = "statutory", PF, TDS and PT left blank (None)
+    are computed from the statutory tables.
     """
 
     basic = data.get("basic", 0)
@@ -54,10 +60,15 @@ def calculate_salary_components(data: dict) -> dict:
 
     gross = basic + hra + allowance + bonus
 
+    if DEDUCTION_MODE == "statutory":
+        errors = statutory.fill_deductions([data])
+        if errors:
+            raise ValueError(errors[0])
+
     # Manual deductions
-    pf = data.get("pf", 0)
-    tds = data.get("tds", 0)
-    pt = data.get("pt", 0)
+    pf = data.get("pf") or 0
+    tds = data.get("tds") or 0
+    pt = data.get("pt") or 0
 
     total_deductions = pf + tds + pt
 
@@ -80,27 +91,68 @@ def calculate_salary_components(data: dict) -> dict:
 # PDF GENERATOR
 # ==================================
 
-def generate_salary_slip(data: dict) -> str:
+def generate_salary_slip(data: dict, document_id: str = None) -> str:
     """
     Generates legally compliant Indian Salary Slip PDF.
-    Returns file path.
+    Returns file path. Passing a `document_id` (see
+    storage.stable_document_id) makes the file name deterministic.
     """
 
-    data = calculate_salary_components(data)
+    with tracing.span("salary_slip", employee_id=data.get("employee_id")):
+        return _render_salary_slip(data, document_id)
 
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    file_name = f"SalarySlip_{data.get('employee_id','EMP')}_{timestamp}.pdf"
-    file_path = os.path.join(PDF_DIR, file_name)
 
-    doc = SimpleDocTemplate(file_path, pagesize=A4)
+def salary_slip_sections(data: dict) -> dict:
+    """
+    Table rows for the employee, earnings and deductions sections, shared
+    by the PDF and the HTML preview. `data` must hold computed components.
+    """
+
+    return {
+        "employee": [
+            ["Employee Name", data.get("name","")],
+            ["Employee ID", data.get("employee_id","")],
+            ["Designation", data.get("designation","")],
+            ["Department", data.get("department","")],
+            ["Date of Joining", data.get("doj","")],
+            ["UAN", data.get("uan","")],
+            ["PF Number", data.get("pf_number","")],
+            ["PAN", data.get("employee_pan","")],
+            ["Bank Account", data.get("bank_account","")]
+        ],
+        "earnings": [
+            ["Earnings", "Amount (₹)"],
+            ["Basic Salary", data["basic"]],
+            ["HRA", data["hra"]],
+            ["Allowance", data["allowance"]],
+            ["Bonus", data["bonus"]],
+            ["Gross Earnings", data["gross"]],
+        ],
+        "deductions": [
+            ["Deductions", "Amount (₹)"],
+            ["Provident Fund", data["pf"]],
+            ["TDS", data["tds"]],
+            ["Professional Tax", data["pt"]],
+            ["Total Deductions", data["total_deductions"]],
+        ],
+    }
+
+
+def salary_slip_flowables(data: dict) -> list:
+    """
+    Flowables for one slip. `data` must already hold the computed
+    components (see calculate_salary_components).
+    """
+
     elements = []
-    styles = getSampleStyleSheet()
+    styles, centered = pdf_assets.stylesheet()
+    font = pdf_assets.body_font()
 
     # ==================================
     # LOGO
     # ==================================
     if os.path.exists(LOGO_PATH):
-        img = Image(LOGO_PATH, width=1.5 * inch, height=1.5 * inch)
+        img = pdf_assets.logo(LOGO_PATH, width=1.5 * inch, height=1.5 * inch)
         elements.append(img)
 
     elements.append(Spacer(1, 12))
@@ -108,9 +160,9 @@ def generate_salary_slip(data: dict) -> str:
     # ==================================
     # LETTERHEAD HEADER
     # ==================================
-    elements.append(Paragraph("<b>SHEEP.AI ADVISORY LLP</b>", styles['Title']))
-    elements.append(Paragraph("Incorporated under LLP Act, 2008", styles['Normal']))
-    elements.append(Paragraph(f"LLPIN: {LLPIN} | PAN: {PAN} | TAN: {TAN}",styles['Normal']))
+    elements.append(Paragraph(f"<b>{company.COMPANY_NAME}</b>", styles['Title']))
+    elements.append(Paragraph(company.COMPANY_TAGLINE, styles['Normal']))
+    elements.append(Paragraph(company.registration_line(), styles['Normal']))
 
     elements.append(Spacer(1, 10))
     elements.append(HRFlowable(width="100%"))
@@ -119,34 +171,19 @@ def generate_salary_slip(data: dict) -> str:
     # ==================================
     # TITLE
     # ==================================
-    centered = ParagraphStyle(
-        name='centered',
-        parent=styles['Heading1'],
-        alignment=enums.TA_CENTER
-    )
-
     elements.append(Paragraph(f"Salary Slip - {data.get('month','')}", centered))
     elements.append(Spacer(1, 20))
 
     # ==================================
     # EMPLOYEE DETAILS
     # ==================================
-    employee_table_data = [
-        ["Employee Name", data.get("name","")],
-        ["Employee ID", data.get("employee_id","")],
-        ["Designation", data.get("designation","")],
-        ["Department", data.get("department","")],
-        ["Date of Joining", data.get("doj","")],
-        ["UAN", data.get("uan","")],
-        ["PF Number", data.get("pf_number","")],
-        ["PAN", data.get("employee_pan","")],
-        ["Bank Account", data.get("bank_account","")]
-    ]
-
-    employee_table = Table(employee_table_data, colWidths=[2.5*inch, 3*inch])
+    sections = salary_slip_sections(data)
+
+    employee_table = Table(sections["employee"], colWidths=[2.5*inch, 3*inch])
     employee_table.setStyle(TableStyle([
         ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
         ('BACKGROUND', (0,0), (0,-1), colors.whitesmoke),
+        ('FONTNAME', (0,0), (-1,-1), font),
     ]))
 
     elements.append(employee_table)
@@ -155,19 +192,11 @@ def generate_salary_slip(data: dict) -> str:
     # ==================================
     # EARNINGS
     # ==================================
-    earnings_data = [
-        ["Earnings", "Amount (₹)"],
-        ["Basic Salary", data["basic"]],
-        ["HRA", data["hra"]],
-        ["Allowance", data["allowance"]],
-        ["Bonus", data["bonus"]],
-        ["Gross Earnings", data["gross"]],
-    ]
-
-    earnings_table = Table(earnings_data, colWidths=[3*inch, 2.5*inch])
+    earnings_table = Table(sections["earnings"], colWidths=[3*inch, 2.5*inch])
     earnings_table.setStyle(TableStyle([
         ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
         ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+        ('FONTNAME', (0,0), (-1,-1), font),
     ]))
 
     elements.append(earnings_table)
@@ -176,18 +205,11 @@ def generate_salary_slip(data: dict) -> str:
     # ==================================
     # DEDUCTIONS
     # ==================================
-    deductions_data = [
-        ["Deductions", "Amount (₹)"],
-        ["Provident Fund", data["pf"]],
-        ["TDS", data["tds"]],
-        ["Professional Tax", data["pt"]],
-        ["Total Deductions", data["total_deductions"]],
-    ]
-
-    deductions_table = Table(deductions_data, colWidths=[3*inch, 2.5*inch])
+    deductions_table = Table(sections["deductions"], colWidths=[3*inch, 2.5*inch])
     deductions_table.setStyle(TableStyle([
         ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
         ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+        ('FONTNAME', (0,0), (-1,-1), font),
     ]))
 
     elements.append(deductions_table)
@@ -228,12 +250,56 @@ def generate_salary_slip(data: dict) -> str:
     elements.append(Paragraph(compliance_text, styles['Normal']))
 
     elements.append(Spacer(1, 20))
-    elements.append(Paragraph(
-        "Email: hr@sheepai.info | Website: www.sheepai.info",
-        styles['Normal']
-    ))
+    elements.append(Paragraph(company.contact_line(), styles['Normal']))
+
+    return elements
+
+
+def write_salary_slip_pdf(data: dict, file_path: str) -> str:
+    """
+    Draws a slip from computed components and atomically writes (or
+    replaces) `file_path`. Used by rerender.py for stored slips.
+    """
+
+    elements = salary_slip_flowables(data)
 
-    doc.build(elements)
+    with metrics.stage("pdf_build"), atomic_path(file_path) as tmp_path:
+        doc = SimpleDocTemplate(tmp_path, pagesize=A4, **pdf_assets.document_options())
+        doc.build(elements)
+
+    return file_path
+
+
+def _render_salary_slip(data: dict, document_id: str = None) -> str:
+
+    with metrics.stage("calculate"):
+        data = calculate_salary_components(data)
+
+    document_id = document_id or new_document_id()
+    file_name = f"SalarySlip_{data.get('employee_id','EMP')}_{document_id}.pdf"
+    file_path = os.path.join(PDF_DIR, file_name)
 
+    # Built first so a bad pay month is rejected before any file exists.
+    row = payroll_ledger.ledger_row(data, document_id=document_id)
+
+    write_salary_slip_pdf(data, file_path)
+
+    # Kept so the slip can be re-rendered; the PDF itself is already safe.
+    try:
+        document_store.save_document(
+            "salary_slip", document_id, file_name, data,
+            employee_id=data.get("employee_id"),
+            month=row["month"],
+        )
+    except (sqlite3.Error, ValueError):
+        logger.warning("Document store update failed for slip %s", document_id, exc_info=True)
+
+    # The slip exists at this point, so a failed ledger write is logged
+    # rather than raised. The stored inputs above are enough to record
+    # it again by hand.
+    try:
+        payroll_ledger.record_row(row)
+    except (OSError, pa.ArrowException):
+        logger.error("Payroll ledger update failed for document %s", document_id, exc_info=True)
 
     return file_path
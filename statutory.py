@@ -0,0 +1,301 @@
+"""
+Statutory deductions: employee PF, professional tax and monthly TDS
+from a projected annual income-tax liability.
+
+The slab tables below are FY 2025-26 figures. HRMS_STATUTORY_TABLES may
+name a JSON file with the same layout to replace them. Tables are turned
+into numpy arrays once, and every function works on whole columns, so a
+payroll run computes deductions for all employees in a handful of array
+operations instead of looping over slabs per employee.
+
+Projection rules:
+
+    PF     rate x min(basic, wage ceiling)
+    PT     monthly slab of the employee's state (gross pay)
+    TDS    regular pay x 12 + this month's bonus, less the standard
+           deduction (and, in the old regime, PF up to the 80C limit and
+           PT), taxed by regime slabs with the 87A rebate and cess. The
+           tax on regular pay is spread over 12 months; the extra tax
+           caused by the bonus is deducted in the month it is paid.
+
+State may be a code ("MH") or a name ("Maharashtra"). A row whose state
+or tax regime has no table is not computed; fill_deductions reports it
+for that row and leaves the others alone.
+
+Not modelled: surcharge (income above Rs 50 lakh), HRA exemption and
+other declarations, and tax already deducted earlier in the year.
+"""
+
+import os
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import payroll_ledger
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+TABLES_FILE = os.getenv("HRMS_STATUTORY_TABLES")
+DEFAULT_STATE = os.getenv("HRMS_PT_STATE", "MH")
+DEFAULT_REGIME = os.getenv("HRMS_TAX_REGIME", "new")
+
+DEDUCTION_FIELDS = ["pf", "tds", "pt"]
+
+# State and union territory names -> the codes used in the PT tables.
+STATE_CODES = {
+    "ANDHRA PRADESH": "AP", "ARUNACHAL PRADESH": "AR", "ASSAM": "AS", "BIHAR": "BR",
+    "CHHATTISGARH": "CG", "GOA": "GA", "GUJARAT": "GJ", "HARYANA": "HR",
+    "HIMACHAL PRADESH": "HP", "JHARKHAND": "JH", "KARNATAKA": "KA", "KERALA": "KL",
+    "MADHYA PRADESH": "MP", "MAHARASHTRA": "MH", "MANIPUR": "MN", "MEGHALAYA": "ML",
+    "MIZORAM": "MZ", "NAGALAND": "NL", "ODISHA": "OD", "ORISSA": "OD", "PUNJAB": "PB",
+    "RAJASTHAN": "RJ", "SIKKIM": "SK", "TAMIL NADU": "TN", "TELANGANA": "TS",
+    "TRIPURA": "TR", "UTTAR PRADESH": "UP", "UTTARAKHAND": "UK", "WEST BENGAL": "WB",
+    "DELHI": "DL", "NEW DELHI": "DL", "NCT OF DELHI": "DL", "JAMMU AND KASHMIR": "JK",
+    "LADAKH": "LA", "CHANDIGARH": "CH", "PUDUCHERRY": "PY", "PONDICHERRY": "PY",
+    "BOMBAY": "MH", "BENGALURU": "KA", "BANGALORE": "KA", "KOLKATA": "WB",
+    "HYDERABAD": "TS", "MUMBAI": "MH", "PUNE": "MH", "AHMEDABAD": "GJ",
+    "TG": "TS", "OR": "OD", "CT": "CG", "UT": "UK",
+}
+
+TABLES = {
+    "pf": {
+        "rate": 0.12,
+        "wage_ceiling": 15000,
+    },
+    # Monthly gross from which each amount applies.
+    "professional_tax": {
+        "MH": {"from": [0, 7501, 10001], "tax": [0, 175, 200], "february": [0, 175, 300]},
+        "KA": {"from": [0, 25000], "tax": [0, 200]},
+        "WB": {"from": [0, 10001, 15001, 25001, 40001], "tax": [0, 110, 130, 150, 200]},
+        "TS": {"from": [0, 15001, 20001], "tax": [0, 150, 200]},
+        "GJ": {"from": [0, 12000], "tax": [0, 200]},
+        "DL": {"from": [0], "tax": [0]},
+    },
+    # Annual taxable income from which each rate applies.
+    "income_tax": {
+        "new": {
+            "from": [0, 400000, 800000, 1200000, 1600000, 2000000, 2400000],
+            "rate": [0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30],
+            "standard_deduction": 75000,
+            "rebate_limit": 1200000,
+            "marginal_relief": True,
+            "deduction_80c_limit": 0,
+            "pt_deductible": False,
+        },
+        "old": {
+            "from": [0, 250000, 500000, 1000000],
+            "rate": [0, 0.05, 0.20, 0.30],
+            "standard_deduction": 50000,
+            "rebate_limit": 500000,
+            "marginal_relief": False,
+            "deduction_80c_limit": 150000,
+            "pt_deductible": True,
+        },
+    },
+    "cess": 0.04,
+}
+
+
+# ==========================================
+# TABLES
+# ==========================================
+
+@lru_cache(maxsize=None)
+def tables():
+    """
+    The slab tables, read once per process.
+    """
+
+    if not TABLES_FILE:
+        return TABLES
+    with open(TABLES_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def _pt_slabs(state, february):
+    slabs = tables()["professional_tax"].get(state)
+    if slabs is None:
+        raise ValueError(f"No professional tax slabs for state {state!r}")
+    amounts = slabs.get("february", slabs["tax"]) if february else slabs["tax"]
+    return np.asarray(slabs["from"], dtype=float), np.asarray(amounts, dtype=float)
+
+
+@lru_cache(maxsize=None)
+def _tax_slabs(regime):
+    slabs = tables()["income_tax"].get(regime)
+    if slabs is None:
+        raise ValueError(f"Unknown tax regime {regime!r}")
+
+    starts = np.asarray(slabs["from"], dtype=float)
+    rates = np.asarray(slabs["rate"], dtype=float)
+    # Tax due on income up to the start of each slab.
+    base = np.concatenate([[0.0], np.cumsum(np.diff(starts) * rates[:-1])])
+    return starts, rates, base, slabs
+
+
+# ==========================================
+# COMPONENTS
+# ==========================================
+
+def normalize_state(value):
+    """
+    "Maharashtra", " mh " -> "MH". Unknown values come back upper-cased.
+    """
+
+    text = " ".join(str(value).replace("&", " AND ").split()).upper()
+    return STATE_CODES.get(text, text)
+
+
+def provident_fund(basic):
+    pf = tables()["pf"]
+    return np.rint(np.minimum(basic, pf["wage_ceiling"]) * pf["rate"])
+
+
+def professional_tax(gross, states, february):
+    tax = np.zeros(len(gross))
+    for state in np.unique(states):
+        for is_february in (False, True):
+            mask = (states == state) & (february == is_february)
+            if mask.any():
+                starts, amounts = _pt_slabs(state, is_february)
+                tax[mask] = amounts[np.searchsorted(starts, gross[mask], side="right") - 1]
+    return tax
+
+
+def income_tax(taxable, regime):
+    """
+    Annual tax including the 87A rebate and cess, for one regime.
+    """
+
+    starts, rates, base, slabs = _tax_slabs(regime)
+    taxable = np.maximum(taxable, 0)
+
+    slab = np.searchsorted(starts, taxable, side="right") - 1
+    tax = base[slab] + rates[slab] * (taxable - starts[slab])
+
+    over = taxable - slabs["rebate_limit"]
+    if slabs["marginal_relief"]:
+        # Just above the rebate limit, tax cannot exceed the excess income.
+        tax = np.where(over > 0, np.minimum(tax, over), 0)
+    else:
+        tax = np.where(over > 0, tax, 0)
+
+    return tax * (1 + tables()["cess"])
+
+
+def _is_february(month):
+    try:
+        return payroll_ledger.normalize_month(month).endswith("-02")
+    except ValueError:
+        return False
+
+
+def _february(frame):
+    if "month" not in frame:
+        return np.full(len(frame), _is_february(None))
+    months = frame["month"].astype(str)
+    return months.map({m: _is_february(m) for m in months.unique()}).to_numpy(dtype=bool)
+
+
+def statutory_deductions(frame):
+    """
+    Monthly pf, pt and tds plus the annual projection for every row of
+    `frame` (columns basic, hra, allowance, bonus and optionally month,
+    state and tax_regime). Returns a DataFrame on the same index; `error`
+    is set, and the amounts are 0, for rows with an unknown state or
+    tax regime.
+    """
+
+    def amounts(column):
+        if column not in frame:
+            return np.zeros(len(frame))
+        return pd.to_numeric(frame[column], errors="coerce").fillna(0).to_numpy(dtype=float)
+
+    basic, hra, allowance, bonus = (amounts(c) for c in ("basic", "hra", "allowance", "bonus"))
+
+    def labels(column, default):
+        if column not in frame:
+            return np.full(len(frame), default, dtype=object)
+        return frame[column].fillna(default).replace("", default).astype(str).to_numpy()
+
+    names, positions = np.unique(labels("state", DEFAULT_STATE).astype(str), return_inverse=True)
+    states = np.array([normalize_state(n) for n in names], dtype=str)[positions]
+    regimes = np.char.strip(np.char.lower(labels("tax_regime", DEFAULT_REGIME).astype(str)))
+
+    # Rows without a table are reported, not computed.
+    errors = np.full(len(frame), "", dtype=object)
+    unknown_regime = ~np.isin(regimes, list(tables()["income_tax"]))
+    errors[unknown_regime] = [f"Unknown tax regime {str(r)!r}" for r in regimes[unknown_regime]]
+    unknown_state = ~np.isin(states, list(tables()["professional_tax"]))
+    errors[unknown_state] = [f"No professional tax slabs for state {str(s)!r}" for s in states[unknown_state]]
+    ok = errors == ""
+
+    regular = basic + hra + allowance
+    pf = np.where(ok, provident_fund(basic), 0)
+    pt = np.zeros(len(frame))
+    pt[ok] = professional_tax((regular + bonus)[ok], states[ok], _february(frame)[ok])
+
+    regular_tax = np.zeros(len(frame))
+    annual_tax = np.zeros(len(frame))
+    annual_taxable = np.zeros(len(frame))
+
+    for regime in np.unique(regimes[ok]):
+        mask = ok & (regimes == regime)
+        slabs = _tax_slabs(regime)[3]
+
+        deductions = slabs["standard_deduction"] + np.minimum(
+            pf[mask] * 12, slabs["deduction_80c_limit"]
+        )
+        if slabs["pt_deductible"]:
+            deductions = deductions + pt[mask] * 12
+
+        taxable = np.maximum(regular[mask] * 12 - deductions, 0)
+        regular_tax[mask] = income_tax(taxable, regime)
+        annual_taxable[mask] = taxable + bonus[mask]
+        annual_tax[mask] = income_tax(annual_taxable[mask], regime)
+
+    tds = np.rint(regular_tax / 12 + (annual_tax - regular_tax))
+
+    return pd.DataFrame({
+        "pf": pf.astype(int),
+        "pt": pt.astype(int),
+        "tds": tds.astype(int),
+        "tax_regime": regimes,
+        "annual_taxable": np.rint(annual_taxable).astype(int),
+        "annual_tax": np.rint(annual_tax).astype(int),
+        "error": errors,
+    }, index=frame.index)
+
+
+def fill_deductions(rows):
+    """
+    Sets pf, tds and pt on salary input dicts where they are missing or
+    None, computed for all rows at once. Entered values are kept.
+    Returns {row position: error} for rows that could not be computed;
+    those rows are left unchanged.
+    """
+
+    positions = [
+        i for i, row in enumerate(rows)
+        if any(row.get(field) is None for field in DEDUCTION_FIELDS)
+    ]
+    if not positions:
+        return {}
+
+    computed = statutory_deductions(pd.DataFrame([rows[i] for i in positions]))
+
+    errors = {}
+    for i, values in zip(positions, computed[DEDUCTION_FIELDS + ["error"]].to_dict("records")):
+        if values["error"]:
+            errors[i] = values["error"]
+            continue
+        for field in DEDUCTION_FIELDS:
+            if rows[i].get(field) is None:
+                rows[i][field] = values[field]
+
+    return errors
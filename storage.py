@@ -0,0 +1,139 @@
+import os
+import re
+import time
+import uuid
+import hashlib
+import tempfile
+from datetime import datetime
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ==========================================
+# DOCUMENT IDS
+# ==========================================
+
+# SalarySlip_<employee>_<YYYYmmddHHMMSS>_<8 hex>.pdf
+# Older files carry only the timestamp.
+DOCUMENT_NAME = re.compile(
+    r"^(?P<kind>SalarySlip|JD)_(?P<key>.+)_(?P<doc_id>\d{14}(?:_[0-9a-f]{8})?)\.pdf$"
+)
+
+
+def new_document_id():
+    """
+    Timestamp-prefixed ID that stays unique across worker processes
+    generating in the same second.
+    """
+
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def stable_document_id(stamp, *parts):
+    """
+    Deterministic ID in the new_document_id format: the same `stamp`
+    (YYYYmmddHHMMSS) and parts always give the same ID, so re-rendering
+    a document replaces its file instead of adding another.
+    """
+
+    digest = hashlib.sha1(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f"{stamp}_{digest[:8]}"
+
+
+def parse_document_name(file_name):
+    """
+    Returns (kind, key, doc_id) for a generated PDF name, or None.
+    `key` is the employee ID for slips and the role (underscored) for JDs.
+    """
+
+    match = DOCUMENT_NAME.match(os.path.basename(file_name))
+    if not match:
+        return None
+    return match.group("kind"), match.group("key"), match.group("doc_id")
+
+
+# ==========================================
+# CROSS-PROCESS FILE LOCK
+# ==========================================
+
+@contextmanager
+def file_lock(path, timeout=60.0, poll=0.05):
+    """
+    Exclusive advisory lock on `path + ".lock"`, shared by every process
+    on the host (and every thread, since each call opens its own handle).
+    """
+
+    lock_path = f"{path}.lock"
+    directory = os.path.dirname(lock_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    handle = open(lock_path, "a+")
+    deadline = time.monotonic() + timeout
+
+    try:
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for lock on {path}")
+                time.sleep(poll)
+
+        yield
+
+    finally:
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        handle.close()
+
+
+# ==========================================
+# ATOMIC WRITES
+# ==========================================
+
+@contextmanager
+def atomic_path(path):
+    """
+    Yields a temporary path next to `path`; on success it is fsynced and
+    renamed over `path`, so readers never see a half-written file.
+    The temp name starts with a dot and keeps the extension, so glob
+    patterns for generated documents do not match it but writers that
+    pick a format from the extension still work.
+    """
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    base, ext = os.path.splitext(os.path.basename(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{base}.", suffix=f".tmp{ext}", dir=directory)
+    os.close(fd)
+
+    try:
+        yield tmp_path
+
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,178 @@
+"""
+Summarizes spans written by tracing.py (enable with HRMS_TRACING=1).
+
+    python trace_viewer.py --list              # recent runs
+    python trace_viewer.py                     # latest run
+    python trace_viewer.py --run payroll-20260131093000-1a2b3c4d --top 20
+"""
+
+import sys
+import argparse
+import statistics
+from collections import OrderedDict, defaultdict
+
+import tracing
+
+
+# ==========================================
+# HELPERS
+# ==========================================
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+def _employee_for(span, by_id):
+    """
+    Walks up the parent chain to find the employee a span belongs to.
+    """
+
+    seen = 0
+    while span is not None and seen < 64:
+        employee_id = span.get("attrs", {}).get("employee_id")
+        if employee_id:
+            return employee_id
+        span = by_id.get(span.get("parent_id"))
+        seen += 1
+    return None
+
+
+def list_runs(path=None):
+    runs = OrderedDict()
+    for record in tracing.read_spans(path):
+        run = runs.setdefault(record["run_id"], {"spans": 0, "root": None, "start": record["start"]})
+        run["spans"] += 1
+        run["start"] = min(run["start"], record["start"])
+        if record.get("parent_id") is None:
+            run["root"] = record["name"]
+    return runs
+
+
+# ==========================================
+# REPORTS
+# ==========================================
+
+def summarize_run(spans, top=15):
+    by_id = {s["span_id"]: s for s in spans}
+    lines = []
+
+    roots = [s for s in spans if s.get("parent_id") is None]
+    wall_ms = sum(s["duration_ms"] for s in roots)
+    lines.append(f"Run {spans[0]['run_id']}: {len(spans)} spans, {len(roots)} traces, "
+                 f"{wall_ms / 1000:.2f}s in root spans")
+    lines.append("")
+
+    # Slowest individual spans
+    lines.append(f"Slowest spans (top {top})")
+    lines.append(f"{'span':<28} {'ms':>10} {'employee':<16} {'status':<7}")
+    lines.append("-" * 64)
+    for s in sorted(spans, key=lambda s: s["duration_ms"], reverse=True)[:top]:
+        lines.append(f"{s['name']:<28} {s['duration_ms']:>10.1f} "
+                     f"{_employee_for(s, by_id) or '-':<16} {s.get('status', 'ok'):<7}")
+    lines.append("")
+
+    # Aggregate per span name
+    by_name = defaultdict(list)
+    for s in spans:
+        by_name[s["name"]].append(s["duration_ms"])
+
+    lines.append("By span name")
+    lines.append(f"{'span':<28} {'count':>7} {'total ms':>11} {'p50':>9} {'p95':>9} {'max':>9}")
+    lines.append("-" * 78)
+    for name, values in sorted(by_name.items(), key=lambda kv: sum(kv[1]), reverse=True):
+        lines.append(f"{name:<28} {len(values):>7} {sum(values):>11.1f} "
+                     f"{_percentile(values, 50):>9.1f} {_percentile(values, 95):>9.1f} "
+                     f"{max(values):>9.1f}")
+    lines.append("")
+
+    lines.extend(employee_breakdown(spans, by_id, top))
+    return "\n".join(lines)
+
+
+def employee_breakdown(spans, by_id, top=15):
+    """
+    Per-employee stage totals for batch runs, slowest employees first,
+    with outliers flagged against the median employee.
+    """
+
+    employee_spans = [s for s in spans if s["name"] == "employee"]
+    if not employee_spans:
+        return []
+
+    stages = defaultdict(lambda: defaultdict(float))
+    for s in spans:
+        if s["name"] == "employee":
+            continue
+        parent = by_id.get(s.get("parent_id"))
+        # Columns are the direct children of the employee and salary_slip spans.
+        if parent is not None and parent["name"] not in ("employee", "salary_slip"):
+            continue
+        employee_id = _employee_for(s, by_id)
+        if employee_id:
+            stages[employee_id][s["name"]] += s["duration_ms"]
+
+    totals = {s["attrs"]["employee_id"]: s["duration_ms"] for s in employee_spans}
+    median = statistics.median(totals.values())
+    deviations = [abs(v - median) for v in totals.values()]
+    mad = statistics.median(deviations) or 1.0
+
+    stage_names = sorted({name for per in stages.values() for name in per})
+
+    lines = [f"Per-employee breakdown ({len(totals)} employees, median {median:.1f} ms)"]
+    header = f"{'employee':<16} {'total ms':>10} " + " ".join(f"{n[:12]:>12}" for n in stage_names)
+    lines.append(header + "  outlier")
+    lines.append("-" * len(header) + "---------")
+
+    for employee_id, total in sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        per = stages.get(employee_id, {})
+        outlier = "*" if (total - median) / mad > 5 else ""
+        lines.append(f"{employee_id:<16} {total:>10.1f} "
+                     + " ".join(f"{per.get(n, 0.0):>12.1f}" for n in stage_names)
+                     + f"  {outlier}")
+
+    failed = [s["attrs"]["employee_id"] for s in employee_spans if s.get("status") == "error"]
+    if failed:
+        lines.append("")
+        lines.append(f"Failed employees: {', '.join(failed)}")
+
+    return lines
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize HRMS trace spans")
+    parser.add_argument("--file", default=tracing.TRACE_FILE)
+    parser.add_argument("--run", help="run ID to summarize (default: latest)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--list", action="store_true", help="list runs in the trace file")
+    args = parser.parse_args(argv)
+
+    runs = list_runs(args.file)
+    if not runs:
+        print(f"No spans found in {args.file}")
+        return 1
+
+    if args.list:
+        for run_id, run in list(runs.items())[-50:]:
+            print(f"{run_id:<44} {run['root'] or '-':<28} {run['spans']:>7} spans")
+        return 0
+
+    run_id = args.run or next(reversed(runs))
+    spans = list(tracing.read_spans(args.file, run_id))
+    if not spans:
+        print(f"No spans for run {run_id}")
+        return 1
+
+    print(summarize_run(spans, args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
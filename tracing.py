@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from datetime import datetime
+from contextlib import contextmanager
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+TRACE_FILE = os.getenv("HRMS_TRACE_FILE", "logs/traces.jsonl")
+
+# Opt-in: spans are written only with HRMS_TRACING=1. Run IDs are
+# tracked either way, since the ledger records them.
+TRACING_ENABLED = os.getenv("HRMS_TRACING", "0") == "1"
+
+# Past this size the file is rotated to <TRACE_FILE>.1 (one backup).
+TRACE_MAX_BYTES = int(float(os.getenv("HRMS_TRACE_MAX_MB", "50")) * 1024 * 1024)
+
+_current_span = contextvars.ContextVar("hrms_current_span", default=None)
+_write_lock = threading.Lock()
+
+
+# ==========================================
+# IDS
+# ==========================================
+
+def new_run_id(prefix="run"):
+    """
+    Sortable, collision-free run ID, e.g. payroll-20260131093000-1a2b3c4d.
+    """
+
+    return f"{prefix}-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def current_run_id():
+    span = _current_span.get()
+    return span["run_id"] if span else None
+
+
+def current_trace_id():
+    span = _current_span.get()
+    return span["trace_id"] if span else None
+
+
+# ==========================================
+# SPANS
+# ==========================================
+
+def _write(record):
+    directory = os.path.dirname(TRACE_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    line = json.dumps(record, default=str) + "\n"
+    with _write_lock:
+        try:
+            if os.path.getsize(TRACE_FILE) >= TRACE_MAX_BYTES:
+                os.replace(TRACE_FILE, f"{TRACE_FILE}.1")
+        except FileNotFoundError:
+            pass
+        with open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+@contextmanager
+def span(name, run_id=None, **attrs):
+    """
+    Opens a span nested under the current one. Without an active span
+    a new trace is started; `run_id` groups traces from one batch run
+    or request and defaults to a fresh ID for root spans. The span is
+    only written out when tracing is enabled.
+    """
+
+    parent = _current_span.get()
+
+    record = {
+        "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex,
+        "run_id": run_id or (parent["run_id"] if parent else new_run_id("req")),
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": parent["span_id"] if parent else None,
+        "name": name,
+        "start": time.time(),
+        "attrs": attrs,
+        "status": "ok",
+    }
+
+    token = _current_span.set(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        _current_span.reset(token)
+        if TRACING_ENABLED:
+            try:
+                _write(record)
+            except OSError:
+                pass
+
+
+def set_attribute(key, value):
+    span_record = _current_span.get()
+    if span_record is not None:
+        span_record["attrs"][key] = value
+
+
+# ==========================================
+# READING TRACES
+# ==========================================
+
+def read_spans(path=None, run_id=None):
+    path = path or TRACE_FILE
+    # The rotated file holds the older spans.
+    for part in (f"{path}.1", path):
+        if os.path.exists(part):
+            yield from _read_file(part, run_id)
+
+
+def _read_file(path, run_id):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if run_id is None or record.get("run_id") == run_id:
+                yield record
@@ -0,0 +1,13 @@
+"""
+WSGI entry point for multi-process deployments.
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+Every worker imports the app independently. Shared state lives on disk:
+the employee master is written under a cross-process lock with atomic
+replacement, each worker's master cache revalidates against the file on
+every read, document names carry a unique ID, and metrics are merged
+across workers through HRMS_METRICS_DIR.
+"""
+
+from app import app, server  # noqa: F401